@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,21 +44,29 @@ INSTALLED_APPS = [
     'apps.users', # Custom users app
     'apps.appointments', # Appointments app
     'corsheaders', # CORS headers
-    'debug_toolbar', # Django Debug Toolbar
 ]
 
 MIDDLEWARE = [
+    'apps.metrics.MetricsMiddleware', # Request metrics served at /metrics (keep first)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.db_router.ReplicaRoutingMiddleware', # Replica reads for REPLICA_READ_ROUTES
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware', # CORS middleware
-    'debug_toolbar.middleware.DebugToolbarMiddleware', # Debug Toolbar middleware
 ]
 
+# Django Debug Toolbar is a development aid only; production instrumentation is apps/metrics.py
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
+# Bearer token Prometheus scrapes /metrics with (staff JWTs are accepted too)
+METRICS_TOKEN = os.environ.get('HEALTHSYNC_METRICS_TOKEN')
+
 ROOT_URLCONF = 'HealthSync.urls'
 
 TEMPLATES = [
@@ -89,6 +98,71 @@ DATABASES = {
     }
 }
 
+# Opt-in profile for serving concurrent requests from SQLite (see apps/sqlite.py):
+# WAL journaling so readers never wait for writers, a busy timeout and BEGIN IMMEDIATE
+# so writers queue for the lock instead of failing, and persistent connections.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # Durable at checkpoints; safe with WAL
+    'cache_size': -64000,  # 64 MB page cache per connection
+    'mmap_size': 268435456,  # 256 MB memory-mapped I/O
+    'temp_store': 'MEMORY',
+}
+SQLITE_TUNED_OPTIONS = {
+    'timeout': 20,  # busy timeout in seconds
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+}
+SQLITE_TUNED = os.environ.get('HEALTHSYNC_SQLITE_TUNED', '').lower() in ('1', 'true')
+if SQLITE_TUNED:
+    DATABASES['default']['OPTIONS'] = SQLITE_TUNED_OPTIONS
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+SQLITE_SERIALIZE_WRITES = SQLITE_TUNED  # Queue appointment writes on an in-process lock
+SQLITE_WRITE_LOCK_TIMEOUT = 30  # seconds before a queued write gives up with 503
+
+# Read replicas (see apps/db_router.py). HEALTHSYNC_DB_REPLICAS is a comma-separated
+# list of SQLite files kept in sync with the primary, e.g. by `manage.py sync_sqlite_replicas`.
+REPLICA_DATABASES = []
+for index, path in enumerate(filter(None, os.environ.get('HEALTHSYNC_DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['apps.db_router.PrimaryReplicaRouter']
+REPLICA_READ_ROUTES = ['appointment-list', 'appointment-detail', 'appointment-count', 'appointment-timeline', 'profile']  # URL names
+REPLICA_PIN_SECONDS = 5  # Primary reads for a client after it writes
+REPLICA_HEALTH_CHECK_INTERVAL = 10  # seconds between probes of a healthy replica
+REPLICA_RETRY_SECONDS = 30  # seconds a failed replica is skipped
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'healthsync',
+    }
+}
+
+# State every worker process must see: token revocations, the refresh-token blacklist
+# generation and replica pins (see apps/shared_cache.py). Must be shared by all workers:
+# the file-based default covers one host; use Redis or Memcached across hosts.
+CACHES['shared'] = {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.environ.get('HEALTHSYNC_SHARED_CACHE_DIR', BASE_DIR / 'shared_cache'),
+    'OPTIONS': {'MAX_ENTRIES': 100000},  # culling would drop revocations early
+}
+SHARED_CACHE_ALIAS = 'shared'
+
+# Versioned appointment response cache (see apps/appointments/response_cache.py)
+APPOINTMENT_CACHE_ALIAS = 'default'
+APPOINTMENT_CACHE_TIMEOUT = 300  # seconds
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -133,12 +207,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',  # JWT for token auth
+        'apps.users.authentication.ClaimsJWTAuthentication',  # JWT with role claims and a verified-token cache
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',  # Default permission: authenticated
         
     ],
+    # Pagination
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 5,
 }
 
 # JWT Configuration
@@ -152,8 +229,18 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.users.tokens.RoleTokenObtainPairSerializer',  # Adds role claims
+    'TOKEN_USER_CLASS': 'apps.users.tokens.ClaimsUser',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.blacklist.BloomCheckedTokenRefreshSerializer',  # Re-derives role claims; Bloom filter blacklist pre-check
 }
 
+JWT_VERIFIED_TOKEN_CACHE_SIZE = 4096  # Verified tokens remembered per process
+JWT_BLACKLIST_MAX_SYNC_AGE = 5  # seconds a worker's blacklist Bloom filter may go without loading new rows
+
+# Serve the appointment list/detail/count and profile reads from native async views
+# (apps/*/async_views.py). Only worthwhile under an ASGI server; writes stay on the DRF views.
+ASYNC_API_VIEWS = os.environ.get('HEALTHSYNC_ASYNC_VIEWS', '').lower() in ('1', 'true')
+
 SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
     'SECURITY_DEFINITIONS': {
@@ -168,8 +255,39 @@ SWAGGER_SETTINGS = {
     },
 }
 
+# Schema written by `manage.py generate_openapi_schema` and served by /swagger/ and /redoc/
+# (see apps/api_schema.py); without it each worker generates the schema once.
+OPENAPI_SCHEMA_DIR = os.environ.get('HEALTHSYNC_OPENAPI_SCHEMA_DIR', BASE_DIR / 'openapi')
+OPENAPI_SCHEMA_MAX_AGE = 3600  # seconds clients may cache the schema
 
 AUTH_USER_MODEL = 'users.User'
+
+# Appointment scheduling: local time window in which free slots are offered
+from datetime import time
+APPOINTMENT_WORKING_HOURS = (time(9, 0), time(17, 0))
+# `archive_appointments` moves completed appointments older than this out of the hot table
+APPOINTMENT_ARCHIVE_AFTER_DAYS = 2 * 365
+# `complete_past_appointments` completes pending appointments this long after they end
+APPOINTMENT_AUTO_COMPLETE_AFTER_MINUTES = 60
+
+# Appointment reminders (apps/appointments/reminders.py): minutes before the appointment
+# each reminder is sent, one notification backend per channel, messages per second per
+# channel, dispatcher worker threads, and retries (the delay doubles after each failure)
+REMINDER_LEAD_MINUTES = (24 * 60, 2 * 60)
+REMINDER_BACKENDS = {
+    'email': 'apps.appointments.notifications.EmailBackend',
+    'sms': os.environ.get('HEALTHSYNC_SMS_BACKEND', 'apps.appointments.notifications.ConsoleSMSBackend'),
+}
+REMINDER_SMS_FILE_PATH = os.environ.get('HEALTHSYNC_SMS_FILE_PATH', BASE_DIR / 'sms.log')  # FileSMSBackend
+REMINDER_RATE_LIMITS = {'email': 20, 'sms': 5}
+REMINDER_WORKERS = 8
+REMINDER_MAX_ATTEMPTS = 5
+REMINDER_RETRY_SECONDS = 60
+
+# Reminder emails; the console backend prints them, the filebased one writes them to EMAIL_FILE_PATH
+EMAIL_BACKEND = os.environ.get('HEALTHSYNC_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = os.environ.get('HEALTHSYNC_EMAIL_FILE_PATH', BASE_DIR / 'sent_emails')
+DEFAULT_FROM_EMAIL = os.environ.get('HEALTHSYNC_FROM_EMAIL', 'reminders@healthsync.local')
 CORS_ALLOW_ALL_ORIGINS = True
 
 DEBUG_TOOLBAR_CONFIG = {
@@ -182,9 +300,11 @@ if 'test' in sys.argv:
     if 'debug_toolbar' in INSTALLED_APPS:
         INSTALLED_APPS.remove('debug_toolbar')
     MIDDLEWARE = [mw for mw in MIDDLEWARE if 'debug_toolbar' not in mw]
-
-# Pagination
-REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 5
-}
\ No newline at end of file
+    # A replica mirroring the test database; router tests enable it with override_settings
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    # Keep test runs away from the dev server's shared cache (tests clear it) and from each other
+    import atexit
+    import shutil
+    import tempfile
+    CACHES['shared'] = {**CACHES['shared'], 'LOCATION': tempfile.mkdtemp(prefix='healthsync-shared-cache-')}
+    atexit.register(shutil.rmtree, CACHES['shared']['LOCATION'], ignore_errors=True)
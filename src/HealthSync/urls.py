@@ -2,10 +2,10 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth.models import Group
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
 from django.conf import settings
+from apps.api_schema import docs_view, schema_view
+from apps.metrics import metrics_view
+from apps.users.views import TokenBlacklistMetricsView
 
 """
 URL configuration for the HealthSync project.
@@ -14,29 +14,20 @@ admin routes, authentication routes, user profile routes, appointment routes,
 and API documentation routes.
 """
 
-# Swagger Schema View
-schema_view = get_schema_view(
-    openapi.Info(
-        title="HealthSync API",
-        default_version='v1',
-        description="API documentation for HealthSync",
-        contact=openapi.Contact(email="usjidn@gmail.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
-
 # Define URL patterns
 urlpatterns = [
     path('admin/', admin.site.urls),  # Admin Panel
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),  # Obtain JWT Token
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),  # Refresh JWT Token
     path('auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),  # Verify JWT Token
+    path('auth/token/metrics/', TokenBlacklistMetricsView.as_view(), name='token_metrics'),  # Blacklist metrics (admin)
     path('profile/', include('apps.users.urls')),  # User-related URLs
     path('appointments/', include('apps.appointments.urls')),  # Appointment-related URLs
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),  # Swagger UI
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),  # ReDoc UI (optional)
+    path('metrics', metrics_view, name='metrics'),  # Prometheus metrics (METRICS_TOKEN or admin JWT)
+    path('swagger.json', schema_view, {'fmt': 'json'}, name='schema-json'),  # Pre-built OpenAPI schema
+    path('swagger.yaml', schema_view, {'fmt': 'yaml'}, name='schema-yaml'),
+    path('swagger/', docs_view('swagger'), name='schema-swagger-ui'),  # Swagger UI
+    path('redoc/', docs_view('redoc'), name='schema-redoc'),  # ReDoc UI (optional)
 ]
 
 # Admin Customization
@@ -0,0 +1,151 @@
+"""
+Pre-built OpenAPI schema for the Swagger and ReDoc pages.
+
+drf_yasg builds the schema by introspecting every view and serializer, which
+is far too slow to repeat on each request. The schema is instead generated
+once: at deploy time with `manage.py generate_openapi_schema`, which writes
+`openapi.json` and `openapi.yaml` to `OPENAPI_SCHEMA_DIR`, or otherwise on the
+first request of each worker. The encoded bytes are then kept in memory and
+served with an ETag. With DEBUG on the schema is regenerated on every request,
+so changes to the API show up without restarting.
+
+The Swagger UI and ReDoc pages are rendered straight from drf_yasg's templates
+with the title and version from SCHEMA_INFO, never from a generated schema;
+the browser then fetches the schema from the same URL with `?format=openapi`.
+
+drf_yasg's renderers, generator and codecs are only imported when the docs are
+actually served, so workers that never serve them do not load them.
+"""
+import os
+import threading
+from types import SimpleNamespace
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_safe
+from .conditional import make_etag, not_modified_response, set_validators
+
+SCHEMA_INFO = {
+    'title': "HealthSync API",
+    'default_version': 'v1',
+    'description': "API documentation for HealthSync",
+    'contact_email': "usjidn@gmail.com",
+    'license_name': "BSD License",
+}
+
+# Format -> (file name in OPENAPI_SCHEMA_DIR, content type)
+SCHEMA_FORMATS = {
+    'json': ('openapi.json', 'application/json'),
+    'yaml': ('openapi.yaml', 'application/yaml; charset=utf-8'),
+}
+
+# Values of drf_yasg's `?format=` parameter -> SCHEMA_FORMATS key
+FORMAT_ALIASES = {'openapi': 'json', 'json': 'json', 'yaml': 'yaml'}
+
+# Docs page -> drf_yasg renderer class
+UI_RENDERERS = {'swagger': 'SwaggerUIRenderer', 'redoc': 'ReDocRenderer'}
+
+_documents = {}
+_lock = threading.Lock()
+
+
+def schema_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title=SCHEMA_INFO['title'],
+        default_version=SCHEMA_INFO['default_version'],
+        description=SCHEMA_INFO['description'],
+        contact=openapi.Contact(email=SCHEMA_INFO['contact_email']),
+        license=openapi.License(name=SCHEMA_INFO['license_name']),
+    )
+
+
+def generate_schema(fmt):
+    """
+    Generates the public schema and returns it encoded as `fmt` ('json' or 'yaml').
+
+    The schema carries no host, so the UIs call the API on the host that served them.
+    """
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(schema_info(), SCHEMA_INFO['default_version']).get_schema(public=True)
+    codec = OpenAPICodecJson if fmt == 'json' else OpenAPICodecYaml
+    return codec(validators=[]).encode(schema)
+
+
+def schema_document(fmt):
+    """
+    Returns (encoded schema, ETag) for `fmt`, from OPENAPI_SCHEMA_DIR if the file
+    exists, else generated once per process.
+    """
+    if settings.DEBUG:
+        content = generate_schema(fmt)
+        return content, make_etag(content)
+    document = _documents.get(fmt)
+    if document is None:
+        with _lock:
+            document = _documents.get(fmt)
+            if document is None:
+                path = os.path.join(settings.OPENAPI_SCHEMA_DIR, SCHEMA_FORMATS[fmt][0])
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        content = f.read()
+                else:
+                    content = generate_schema(fmt)
+                document = _documents[fmt] = (content, make_etag(content))
+    return document
+
+
+def clear_schema_cache():
+    with _lock:
+        _documents.clear()
+
+
+@require_safe
+def schema_view(request, fmt):
+    """
+    Serves the cached schema document.
+    """
+    content, etag = schema_document(fmt)
+    response = not_modified_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=SCHEMA_FORMATS[fmt][1])
+        set_validators(response, etag=etag)
+    response.headers['Cache-Control'] = f'public, max-age={settings.OPENAPI_SCHEMA_MAX_AGE}'
+    return response
+
+
+def ui_page(request, renderer):
+    """
+    Renders the 'swagger' or 'redoc' page without generating the schema.
+
+    drf_yasg's renderers only read the title and version from the schema they
+    are given, so they get those from SCHEMA_INFO instead.
+    """
+    from drf_yasg import renderers
+
+    ui_renderer = getattr(renderers, UI_RENDERERS[renderer])()
+    info = SimpleNamespace(title=SCHEMA_INFO['title'], version=SCHEMA_INFO['default_version'])
+    context = {'request': request}
+    ui_renderer.set_context(context, SimpleNamespace(info=info))
+    return HttpResponse(
+        render_to_string(ui_renderer.template, context, request),
+        content_type=f'{ui_renderer.media_type}; charset={ui_renderer.charset}',
+    )
+
+
+def docs_view(renderer):
+    """
+    Returns the view for a docs page (`renderer` is 'swagger' or 'redoc').
+    """
+    @require_safe
+    def view(request):
+        fmt = FORMAT_ALIASES.get(request.GET.get('format'))
+        if fmt is not None:
+            return schema_view(request, fmt)
+        return ui_page(request, renderer)
+
+    view.__name__ = f'{renderer}_docs_view'
+    return view
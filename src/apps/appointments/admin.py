@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Appointment
+from .models import Appointment, ArchivedAppointment
+from ..paginators import EstimatedCountPaginator
 
 # Register Appointment Model in Admin
 @admin.register(Appointment)
@@ -17,6 +18,9 @@ class AppointmentAdmin(admin.ModelAdmin):
         search_fields: Fields to search by in the admin interface.
         readonly_fields: Fields that are read-only in the admin form (cannot be edited).
         fieldsets: Layout of the fields in the admin form, organized into sections.
+        list_select_related: Related rows joined into the changelist query.
+        autocomplete_fields: Foreign keys edited through search widgets instead of dropdowns.
+        paginator: Paginator that estimates the total for very large tables.
     """
     
     list_display = ('patient', 'doctor', 'scheduled_at', 'is_completed', 'created_at', 'updated_at')
@@ -71,3 +75,43 @@ class AppointmentAdmin(admin.ModelAdmin):
         'Appointment Details': Includes patient, doctor, scheduled_at, and is_completed fields.
         'Timestamps': Includes created_at and updated_at fields.
     """
+
+    list_select_related = ('patient__user', 'doctor__user')
+    """
+    Joins the patient and doctor users into the changelist query, since their
+    `__str__` methods (and Appointment's own) dereference `user` for every row.
+    """
+
+    autocomplete_fields = ('patient', 'doctor')
+    """
+    Renders patient and doctor as search-as-you-type widgets rather than
+    select boxes listing every Doctor and Patient.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    """
+    Avoids exact `COUNT(*)` queries over the full appointment table on each changelist load.
+    """
+
+
+@admin.register(ArchivedAppointment)
+class ArchivedAppointmentAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for appointments moved out by `archive_appointments`.
+
+    Archived rows are history: they can be browsed and searched, but not added
+    or edited. Deleting one (or its patient) also removes it from the rollup.
+    """
+    list_display = ('id', 'patient', 'doctor', 'scheduled_at', 'archived_at')
+    list_filter = ('scheduled_at',)
+    search_fields = ('patient__user__username', 'doctor__user__username')
+    list_select_related = ('patient__user', 'doctor__user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
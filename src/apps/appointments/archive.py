@@ -0,0 +1,74 @@
+"""
+Archival of completed historical appointments.
+
+Completed appointments scheduled before a cutoff are moved, in batches, from
+Appointment to ArchivedAppointment, so the tables and indexes every list, count
+and admin query scans only hold recent and upcoming appointments. Each batch
+copies and deletes its rows in one short transaction, so a run can be stopped
+at any point and resumed by running it again.
+
+Archived rows keep their id and stay counted in the DailyAppointmentCount
+rollup; the appointment detail endpoint and hourly counts read the archive
+when the hot table has no match.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ..sqlite import serialized_writes
+from .models import Appointment, AppointmentReminder, ArchivedAppointment
+from . import response_cache
+
+
+def cutoff(days=None):
+    """
+    Returns the start of the hot window: `days` (default
+    `APPOINTMENT_ARCHIVE_AFTER_DAYS`) days ago.
+    """
+    if days is None:
+        days = settings.APPOINTMENT_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable(cutoff):
+    """
+    Returns the completed appointments scheduled before `cutoff`.
+    """
+    return Appointment.objects.filter(is_completed=True, scheduled_at__lt=cutoff)
+
+
+def archive_batch(cutoff, batch_size=1000):
+    """
+    Moves up to `batch_size` archivable appointments to the archive.
+
+    Rows are taken oldest first, in (scheduled_at, id) order, so the batch is a
+    range scan on `appt_sched_id_idx` that needs no sort.
+
+    Returns:
+        int: The number of appointments archived.
+    """
+    with serialized_writes(), transaction.atomic():
+        rows = list(
+            archivable(cutoff).select_for_update()
+            .order_by('scheduled_at', 'id')
+            .values_list(*ArchivedAppointment.COPIED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedAppointment.objects.bulk_create([
+            ArchivedAppointment(**dict(zip(ArchivedAppointment.COPIED_FIELDS, values)))
+            for values in rows
+        ])
+        ids = [values[0] for values in rows]
+        # Reminders of past appointments are only delivery history.
+        AppointmentReminder.objects.filter(appointment_id__in=ids).delete()
+        # `_raw_delete` (a private QuerySet API) issues a bare DELETE: no delete
+        # signals, so the moved rows stay counted in the rollup, and no collector,
+        # so related rows are not cascaded. It assumes the only relation pointing
+        # at Appointment is AppointmentReminder.appointment, cleared just above;
+        # AppointmentArchiveTests.test_raw_delete_covers_every_relation fails when
+        # another one is added.
+        Appointment.objects.filter(id__in=ids)._raw_delete(Appointment.objects.db)
+        response_cache.bump_versions({values[2] for values in rows})
+    return len(rows)
+
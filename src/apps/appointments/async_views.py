@@ -0,0 +1,162 @@
+"""
+Native async versions of the appointment read endpoints.
+
+Selected with the `ASYNC_API_VIEWS` setting (see `urls.py`). They return the
+same payloads, validators and cache entries as the DRF views in `views.py`;
+writes and keyset pagination are delegated to those views.
+"""
+import logging
+from math import ceil
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import _positive_int
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from ..async_api import AsyncAPIView
+from ..conditional import make_etag, not_modified_response, set_validators
+from ..fieldsets import parse_fields
+from .models import Appointment, ArchivedAppointment
+from .pagination import AppointmentPageNumberPagination
+from .response_cache import acached_response
+from .rows import AppointmentRows
+from .serializers import AppointmentSerializer
+from .timeseries import CountQuery
+from .views import AppointmentCountView, AppointmentDetailView, AppointmentListView
+
+
+def visible_appointments(user, model=Appointment):
+    """
+    Returns the appointments a user may read: all for admins, their own for doctors.
+    Pass `model=ArchivedAppointment` for archived ones.
+    """
+    if user.is_staff:
+        return model.objects.all()
+    elif hasattr(user, 'doctor'):
+        return model.objects.filter(doctor=user.doctor)
+    return model.objects.none()
+
+
+class AsyncAppointmentListView(AsyncAPIView):
+    """
+    Async page-number listing of appointments, equivalent to `AppointmentListView`.
+    """
+    permission_classes = AppointmentListView.permission_classes
+    sync_view_class = AppointmentListView
+    pagination_class = AppointmentPageNumberPagination
+
+    async def get(self, request):
+        params = request.GET
+        if params.get('pagination') == 'cursor' or 'cursor' in params:
+            return await self.delegate(request)
+        return await self.list(request)
+
+    def get_page_size(self, request):
+        paginator = self.pagination_class
+        try:
+            return _positive_int(
+                request.GET[paginator.page_size_query_param], strict=True, cutoff=paginator.max_page_size
+            )
+        except (KeyError, ValueError):
+            return paginator.page_size
+
+    @acached_response('appointment-list')
+    async def list(self, request):
+        """
+        Lists one page of appointments, answering 304 when the page is unchanged.
+
+        Mirrors `AppointmentListView.list`: the page is resolved from ids and
+        `updated_at` values first, so the ETag (identical to the sync view's) is
+        checked before full rows are loaded.
+        """
+        try:
+            spec = AppointmentRows.from_params(request.GET)
+        except ValueError as e:
+            return self.response_class({"error": str(e)}, status=400)
+
+        paginator = self.pagination_class
+        queryset = visible_appointments(request.user)
+        page_size = self.get_page_size(request)
+        count = await queryset.acount()
+        num_pages = max(1, ceil(count / page_size))
+
+        page_number = request.GET.get(paginator.page_query_param) or 1
+        try:
+            page_number = num_pages if page_number in paginator.last_page_strings else int(page_number)
+        except ValueError:
+            raise NotFound("Invalid page.")
+        if not 1 <= page_number <= num_pages:
+            raise NotFound("Invalid page.")
+
+        offset = (page_number - 1) * page_size
+        page = [row async for row in queryset.values_list('id', 'updated_at')[offset:offset + page_size]]
+
+        url = request.build_absolute_uri()
+        metadata = {
+            'count': count,
+            'next': replace_query_param(url, paginator.page_query_param, page_number + 1)
+            if page_number < num_pages else None,
+            'previous': None if page_number == 1 else (
+                remove_query_param(url, paginator.page_query_param) if page_number == 2
+                else replace_query_param(url, paginator.page_query_param, page_number - 1)
+            ),
+        }
+
+        ids = [row_id for row_id, _ in page]
+        results = None
+        if spec.expand:
+            results = spec.build([values async for values in spec.values(queryset, ids)], ids)
+            page.append(results)
+        etag = make_etag('appointment-list', metadata, spec.key(), page)
+        not_modified = not_modified_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        if results is None:
+            results = spec.build([values async for values in spec.values(queryset, ids)], ids)
+        return set_validators(self.response_class({**metadata, 'results': results}), etag=etag)
+
+
+class AsyncAppointmentDetailView(AsyncAPIView):
+    """
+    Async appointment retrieval, equivalent to `AppointmentDetailView.retrieve`.
+    """
+    permission_classes = AppointmentDetailView.permission_classes
+    sync_view_class = AppointmentDetailView
+
+    @acached_response('appointment-detail')
+    async def get(self, request, id):
+        try:
+            fields = parse_fields(request.GET, AppointmentSerializer.Meta.fields)
+        except ValueError as e:
+            return self.response_class({"error": str(e)}, status=400)
+        instance = await visible_appointments(request.user).filter(id=id).afirst()
+        if instance is None:
+            instance = await visible_appointments(request.user, ArchivedAppointment).filter(id=id).afirst()
+        if instance is None:
+            raise NotFound("No Appointment matches the given query.")
+
+        etag = make_etag('appointment', instance.pk, instance.updated_at, fields)
+        not_modified = not_modified_response(request, etag=etag, last_modified=instance.updated_at)
+        if not_modified is not None:
+            return not_modified
+        response = self.response_class(AppointmentSerializer(instance, fields=fields).data)
+        return set_validators(response, etag=etag, last_modified=instance.updated_at)
+
+
+class AsyncAppointmentCountView(AsyncAPIView):
+    """
+    Async appointment counts, equivalent to `AppointmentCountView`.
+    """
+    permission_classes = AppointmentCountView.permission_classes
+
+    @acached_response('appointment-count')
+    async def get(self, request):
+        try:
+            query = CountQuery.from_params(request.GET)
+        except ValueError as e:
+            return self.response_class({"error": str(e)}, status=400)
+
+        try:
+            rows = [row async for row in query.queryset()]
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            return self.response_class({"error": "An unexpected error occurred. Please try again later."}, status=500)
+        return self.response_class(query.render(rows))
@@ -0,0 +1,189 @@
+"""
+Doctor availability: double-booking checks and free-slot search.
+
+Busy time for a doctor is represented as an IntervalSet of merged, sorted
+[start, end) intervals, so overlap checks and "next free slot" jumps are
+bisections rather than scans over the doctor's appointment list.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from apps.users.models import Doctor
+from .models import Appointment
+
+
+class AppointmentConflict(APIException):
+    """
+    Raised when an appointment would overlap another appointment of the same doctor.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The doctor already has an appointment at this time."
+    default_code = 'conflict'
+
+
+class IntervalSet:
+    """
+    A set of disjoint half-open [start, end) intervals kept in sorted order.
+
+    Overlapping or touching intervals are merged on insertion, which keeps both
+    the start and the end lists sorted so every query is a bisection.
+    """
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            self.add(start, end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return iter(zip(self.starts, self.ends))
+
+    def add(self, start, end):
+        """
+        Inserts [start, end), merging it with any interval it overlaps or touches.
+        """
+        first = bisect_left(self.ends, start)
+        last = bisect_right(self.starts, end)
+        if first < last:
+            start = min(start, self.starts[first])
+            end = max(end, self.ends[last - 1])
+        self.starts[first:last] = [start]
+        self.ends[first:last] = [end]
+
+    def overlapping(self, start, end):
+        """
+        Returns the first stored interval overlapping [start, end), or None.
+        """
+        index = bisect_right(self.ends, start)
+        if index < len(self.starts) and self.starts[index] < end:
+            return self.starts[index], self.ends[index]
+        return None
+
+
+def working_hours():
+    """
+    Returns the (start, end) local times during which slots are offered.
+    """
+    start, end = getattr(settings, 'APPOINTMENT_WORKING_HOURS', (time(9), time(17)))
+    return start, end
+
+
+def lock_doctors(doctor_ids):
+    """
+    Locks the given doctors' rows until the end of the current transaction.
+
+    Every write that books time for a doctor takes this lock first, so the
+    conflict check and the insert/update that follows cannot interleave with
+    another booking for the same doctor. Ids are locked in a fixed order to
+    avoid deadlocks between bulk requests.
+    """
+    list(Doctor.objects.select_for_update().filter(id__in=sorted(set(doctor_ids))).order_by('id').values_list('id'))
+
+
+def busy_intervals(doctor_ids, start, end, exclude_ids=()):
+    """
+    Loads the busy intervals of several doctors overlapping [start, end) in one query.
+
+    The lower bound on `scheduled_at` uses the maximum appointment duration so
+    the lookup stays a bounded range scan on the (doctor, scheduled_at) index.
+
+    Returns:
+        dict: Doctor ids mapped to IntervalSets of their appointments.
+    """
+    rows = Appointment.objects.filter(
+        doctor_id__in=doctor_ids,
+        scheduled_at__gt=start - timedelta(minutes=Appointment.MAX_DURATION_MINUTES),
+        scheduled_at__lt=end,
+        ends_at__gt=start,
+    ).exclude(id__in=exclude_ids).values_list('doctor_id', 'scheduled_at', 'ends_at')
+
+    intervals = defaultdict(list)
+    for doctor_id, scheduled_at, ends_at in rows:
+        intervals[doctor_id].append((scheduled_at, ends_at))
+    return {doctor_id: IntervalSet(intervals[doctor_id]) for doctor_id in doctor_ids}
+
+
+def ensure_available(doctor_id, start, end, exclude_id=None):
+    """
+    Raises AppointmentConflict if the doctor is busy during [start, end).
+
+    Must be called inside a transaction after `lock_doctors` for the result to
+    hold until the caller's write commits.
+    """
+    exclude_ids = [exclude_id] if exclude_id is not None else []
+    conflict = busy_intervals([doctor_id], start, end, exclude_ids)[doctor_id].overlapping(start, end)
+    if conflict:
+        raise AppointmentConflict(
+            f"The doctor already has an appointment from {conflict[0].isoformat()} to {conflict[1].isoformat()}."
+        )
+
+
+def book(appointment_save, doctor_id, start, end, exclude_id=None):
+    """
+    Runs `appointment_save` under the doctor's lock once the slot is confirmed free.
+
+    Returns:
+        The return value of `appointment_save`.
+    """
+    with transaction.atomic():
+        lock_doctors([doctor_id])
+        ensure_available(doctor_id, start, end, exclude_id=exclude_id)
+        return appointment_save()
+
+
+def _align_up(moment, day_start, slot):
+    """
+    Rounds `moment` up to the next slot boundary counted from `day_start`.
+    """
+    offset = moment - day_start
+    steps = -(-offset // slot)
+    return day_start + steps * slot
+
+
+def free_slots(busy, start, end, slot, limit):
+    """
+    Returns up to `limit` free [start, end) slots of length `slot` within [start, end).
+
+    Slots are aligned to the slot length from the start of the working day and
+    never cross working hours. Busy intervals are skipped in one jump each, so
+    the cost is proportional to the slots returned plus the conflicts hit.
+
+    Args:
+        busy: The doctor's IntervalSet of booked time.
+        start: The earliest moment a slot may begin.
+        end: The moment by which a slot must have ended.
+        slot: The slot length as a timedelta.
+        limit: The maximum number of slots to return.
+    """
+    open_time, close_time = working_hours()
+    tz = timezone.get_current_timezone()
+    slots = []
+    day = timezone.localtime(start, tz).date()
+    cursor = start
+
+    while len(slots) < limit:
+        day_start = timezone.make_aware(datetime.combine(day, open_time), tz)
+        day_end = timezone.make_aware(datetime.combine(day, close_time), tz)
+        if day_start >= end:
+            break
+        cursor = _align_up(max(cursor, day_start), day_start, slot)
+
+        while len(slots) < limit and cursor + slot <= min(day_end, end):
+            conflict = busy.overlapping(cursor, cursor + slot)
+            if conflict:
+                cursor = _align_up(conflict[1], day_start, slot)
+                continue
+            slots.append((cursor, cursor + slot))
+            cursor += slot
+
+        day += timedelta(days=1)
+
+    return slots
@@ -0,0 +1,90 @@
+"""
+Shared helpers for the benchmark management commands.
+
+Benchmarks run against a throwaway SQLite database created in a temporary
+directory, with DEBUG and the debug toolbar turned off so that only the
+application's own work is measured. Results are reported as JSON so they can
+be stored and compared between releases.
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+
+
+@contextmanager
+def benchmark_database(use_cache=True):
+    """
+    Creates an empty, migrated database for the duration of a benchmark.
+
+    Args:
+        use_cache: When False, response caching is disabled by switching the
+            default cache to DummyCache. The shared cache is left in place.
+    """
+    overrides = {
+        'DEBUG': False,
+        'ALLOWED_HOSTS': ['testserver'],
+        'MIDDLEWARE': [mw for mw in settings.MIDDLEWARE if 'debug_toolbar' not in mw],
+    }
+    if not use_cache:
+        overrides['CACHES'] = {**settings.CACHES, 'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+    with tempfile.TemporaryDirectory() as directory, override_settings(**overrides):
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting queries and their total time.
+
+    Usage: `with connection.execute_wrapper(counter): ...`. Unlike
+    `CaptureQueriesContext` it keeps no SQL text, so it adds little overhead.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def summarize(latencies, elapsed, errors=0):
+    """
+    Returns request count, throughput and latency percentiles in milliseconds.
+
+    Args:
+        latencies: Per-request durations in seconds.
+        elapsed: Wall-clock duration of the whole run in seconds.
+        errors: Number of requests that did not return the expected status.
+    """
+    if not latencies:
+        return {'requests': 0, 'errors': errors}
+    # Inclusive percentiles stay within the observed range (p99 never exceeds max).
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'p50': round(percentiles[49] * 1000, 2),
+            'p95': round(percentiles[94] * 1000, 2),
+            'p99': round(percentiles[98] * 1000, 2),
+            'max': round(max(latencies) * 1000, 2),
+        },
+    }
@@ -0,0 +1,152 @@
+"""
+Set-based creation and status updates of many appointments in a single request.
+"""
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
+from apps.users.models import Doctor, Patient
+from .models import Appointment
+from .serializers import AppointmentBulkItemSerializer
+from . import availability, response_cache, rollup
+
+BULK_CREATE_MAX_ITEMS = 5000
+BULK_CREATE_BATCH_SIZE = 500
+BULK_STATUS_MAX_IDS = 5000
+
+
+def bulk_create_appointments(items, all_or_nothing=False):
+    """
+    Validates and inserts a list of appointment payloads.
+
+    Item shapes are validated in Python, patient and doctor ids are checked with
+    one query per model, double bookings are detected against one query of the
+    doctors' busy intervals, and the valid items are inserted with `bulk_create`
+    in a single transaction. Because `bulk_create` does not send model signals, the
+    daily rollup is updated here from the inserted rows.
+
+    Args:
+        items: A list of appointment dictionaries.
+        all_or_nothing: When True, nothing is inserted if any item is invalid.
+
+    Returns:
+        tuple: The list of created Appointment instances and a list of
+        `{'index': ..., 'errors': ...}` dictionaries for rejected items.
+    """
+    errors = []
+    candidates = []
+    for index, item in enumerate(items):
+        serializer = AppointmentBulkItemSerializer(data=item)
+        if serializer.is_valid():
+            candidates.append((index, serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+
+    patient_ids = set(Patient.objects.filter(
+        id__in={data['patient'] for _, data in candidates}
+    ).values_list('id', flat=True))
+    doctor_ids = set(Doctor.objects.filter(
+        id__in={data['doctor'] for _, data in candidates}
+    ).values_list('id', flat=True))
+
+    appointments = []
+    for index, data in candidates:
+        item_errors = {}
+        if data['patient'] not in patient_ids:
+            item_errors['patient'] = [f"Invalid pk \"{data['patient']}\" - object does not exist."]
+        if data['doctor'] not in doctor_ids:
+            item_errors['doctor'] = [f"Invalid pk \"{data['doctor']}\" - object does not exist."]
+        if item_errors:
+            errors.append({'index': index, 'errors': item_errors})
+            continue
+        appointment = Appointment(
+            patient_id=data['patient'],
+            doctor_id=data['doctor'],
+            scheduled_at=data['scheduled_at'],
+            duration_minutes=data['duration_minutes'],
+            is_completed=data['is_completed'],
+        )
+        appointment.set_ends_at()
+        appointments.append((index, appointment))
+
+    if not appointments or (all_or_nothing and errors):
+        errors.sort(key=lambda error: error['index'])
+        return [], errors
+
+    with transaction.atomic():
+        # Check every item against the doctors' existing bookings and against the
+        # earlier items of this batch, under the same locks single bookings take.
+        doctor_ids = {appointment.doctor_id for _, appointment in appointments}
+        availability.lock_doctors(doctor_ids)
+        busy = availability.busy_intervals(
+            doctor_ids,
+            min(appointment.scheduled_at for _, appointment in appointments),
+            max(appointment.ends_at for _, appointment in appointments),
+        )
+        accepted = []
+        for index, appointment in appointments:
+            doctor_busy = busy[appointment.doctor_id]
+            if doctor_busy.overlapping(appointment.scheduled_at, appointment.ends_at):
+                errors.append({'index': index, 'errors': {
+                    'scheduled_at': ["The doctor already has an appointment at this time."],
+                }})
+                continue
+            doctor_busy.add(appointment.scheduled_at, appointment.ends_at)
+            accepted.append(appointment)
+
+        errors.sort(key=lambda error: error['index'])
+        if not accepted or (all_or_nothing and errors):
+            return [], errors
+
+        created = Appointment.objects.bulk_create(accepted, batch_size=BULK_CREATE_BATCH_SIZE)
+        rollup.apply_deltas(Counter(
+            rollup.rollup_key(appointment.doctor_id, appointment.scheduled_at, appointment.is_completed)
+            for appointment in created
+        ))
+        response_cache.bump_versions(appointment.doctor_id for appointment in created)
+    return created, errors
+
+
+def bulk_set_completed(queryset, is_completed):
+    """
+    Sets `is_completed` on the appointments of `queryset` with a single UPDATE.
+
+    Only rows whose status actually changes are written, and their `updated_at`
+    is bumped so ETags and Last-Modified dates change. Like single updates, the
+    affected doctors are locked first; the rows are then counted per rollup key
+    with one grouped query, updated, and their counts moved to the new status.
+
+    Args:
+        queryset: The Appointment queryset to update.
+        is_completed: The new completion status.
+
+    Returns:
+        int: The number of appointments updated.
+    """
+    with transaction.atomic():
+        changing = queryset.exclude(is_completed=is_completed)
+        doctor_ids = set(changing.values_list('doctor_id', flat=True).distinct().order_by())
+        if not doctor_ids:
+            return 0
+        availability.lock_doctors(doctor_ids)
+        changing = changing.filter(doctor_id__in=doctor_ids)
+        counts = rollup.compute_counts(changing)
+        updated = changing.update(is_completed=is_completed, updated_at=timezone.now())
+
+        deltas = Counter()
+        for (date, doctor_id, previous), count in counts.items():
+            deltas[(date, doctor_id, previous)] -= count
+            deltas[(date, doctor_id, is_completed)] += count
+        rollup.apply_deltas(deltas)
+        response_cache.bump_versions(doctor_ids)
+    return updated
+
+
+def overdue_appointments(cutoff):
+    """
+    Returns the pending appointments that ended by `cutoff`, oldest first.
+
+    The `scheduled_at` bound keeps the lookup a range scan on the
+    (is_completed, scheduled_at) index.
+    """
+    return Appointment.objects.filter(is_completed=False, scheduled_at__lt=cutoff, ends_at__lte=cutoff) \
+        .order_by('scheduled_at', 'id')
@@ -0,0 +1,100 @@
+"""
+Streaming appointment export as CSV or newline-delimited JSON.
+
+Rows are read with `values_list(...).iterator()`, which uses a server-side
+cursor where the database supports it, and encoded one at a time. Only one
+chunk of rows and one chunk of output are in memory at any moment, however
+large the export is.
+"""
+import csv
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FIELDS = ('id', 'patient_id', 'doctor_id', 'scheduled_at', 'duration_minutes', 'ends_at', 'is_completed')
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+EXPORT_CHUNK_SIZE = 2000
+
+# Encoded lines are grouped into chunks of about this many bytes before they are
+# yielded, so the response is not written to the socket one short line at a time.
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+
+class _LineBuffer:
+    """
+    File-like object for `csv.writer` that hands back each written line.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """
+    Yields a CSV header followed by one line per row.
+    """
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(
+            [value.isoformat() if hasattr(value, 'isoformat') else value for value in row]
+        )
+
+
+def ndjson_lines(rows):
+    """
+    Yields one JSON object per row, each terminated by a newline.
+    """
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+def buffered(lines, size=OUTPUT_BUFFER_SIZE):
+    """
+    Joins encoded lines into UTF-8 chunks of roughly `size` bytes.
+    """
+    parts = []
+    length = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        parts.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(parts)
+            parts = []
+            length = 0
+    if parts:
+        yield b''.join(parts)
+
+
+def gzipped(chunks):
+    """
+    Compresses a stream of byte chunks into a single gzip stream.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_appointments(queryset, export_format, compress=False):
+    """
+    Returns an iterator of response body chunks for an appointment export.
+
+    Args:
+        queryset: The appointments to export; it is ordered by (scheduled_at, id).
+        export_format: One of `EXPORT_FORMATS`.
+        compress: Whether to gzip the output.
+
+    Returns:
+        iterator: Byte chunks suitable for a `StreamingHttpResponse`.
+    """
+    rows = queryset.order_by('scheduled_at', 'id').values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    lines = csv_lines(rows) if export_format == 'csv' else ndjson_lines(rows)
+    chunks = buffered(lines)
+    return gzipped(chunks) if compress else chunks
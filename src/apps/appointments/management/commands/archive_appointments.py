@@ -0,0 +1,74 @@
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from apps.appointments import archive
+from apps.appointments.models import Appointment, ArchivedAppointment
+
+
+class Command(BaseCommand):
+    """
+    Moves completed appointments older than a cutoff to ArchivedAppointment.
+
+    Each batch is its own short transaction, oldest appointments first, so the
+    command can be interrupted and simply run again to resume. Meant to be run
+    periodically (e.g. nightly from cron).
+    """
+    help = "Archive completed appointments scheduled before a cutoff, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=None,
+                            help="Archive appointments scheduled more than this many days ago "
+                                 "(default: APPOINTMENT_ARCHIVE_AFTER_DAYS).")
+        parser.add_argument('--before', default=None, help="Archive appointments scheduled before this date (YYYY-MM-DD).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Appointments moved per transaction.")
+        parser.add_argument('--sleep', type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument('--max-batches', type=int, default=None, help="Stop after this many batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many appointments would move.")
+
+    def handle(self, *args, **options):
+        cutoff = self.cutoff(options)
+        self.stdout.write(
+            f"Before: appointments={Appointment.objects.count()} archived={ArchivedAppointment.objects.count()}"
+        )
+        if options['dry_run']:
+            self.stdout.write(f"Appointments to archive before {cutoff.isoformat()}: {archive.archivable(cutoff).count()}")
+            return
+
+        archived = batches = 0
+        started = time.perf_counter()
+        while options['max_batches'] is None or batches < options['max_batches']:
+            moved = archive.archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            archived += moved
+            batches += 1
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        if archived and connection.vendor == 'sqlite':
+            # Refresh the table statistics the admin changelists estimate their counts from.
+            with connection.cursor() as cursor:
+                for model in (Appointment, ArchivedAppointment):
+                    cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} appointments scheduled before {cutoff.isoformat()} in {batches} batches ({elapsed:.2f}s)."
+        ))
+        self.stdout.write(
+            f"After: appointments={Appointment.objects.count()} archived={ArchivedAppointment.objects.count()}"
+        )
+
+    @staticmethod
+    def cutoff(options):
+        if options['before']:
+            try:
+                day = datetime.strptime(options['before'], '%Y-%m-%d')
+            except ValueError:
+                raise CommandError("--before must be a date in YYYY-MM-DD format.")
+            return timezone.make_aware(day)
+        if options['older_than_days'] is not None and options['older_than_days'] < 0:
+            raise CommandError("--older-than-days must not be negative.")
+        return archive.cutoff(options['older_than_days'])
@@ -0,0 +1,137 @@
+import asyncio
+import importlib
+import json
+import random
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from django.urls import clear_url_caches
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.appointments import response_cache, seeding
+from apps.appointments.benchmarking import benchmark_database, summarize
+from apps.appointments.models import Appointment
+from apps.users.authentication import verified_tokens
+from apps.users.tokens import add_role_claims
+
+URL_MODULES = ('apps.appointments.urls', 'apps.users.urls')
+
+
+class Command(BaseCommand):
+    """
+    Compares the DRF views with the native async views (`ASYNC_API_VIEWS`) in-process.
+
+    A throwaway database is seeded (see `seeding.py`), then many concurrent clients replay the same
+    mix of list, detail, count and profile reads through Django's async request
+    handler, once per mode. Clients pause between requests (`--think-ms`) to model
+    mostly I/O-bound traffic. Throughput and latency percentiles are printed as JSON.
+    """
+    help = "Benchmark the sync and async read endpoints under concurrent clients."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100, help="Number of concurrent clients.")
+        parser.add_argument('--requests', type=int, default=20, help="Requests issued by each client.")
+        parser.add_argument('--think-ms', type=float, default=5.0, help="Pause between a client's requests.")
+        parser.add_argument('--doctors', type=int, default=20, help="Doctors in the seeded database.")
+        parser.add_argument('--appointments', type=int, default=2000, help="Appointments in the seeded database.")
+        parser.add_argument('--no-cache', action='store_true', help="Disable the appointment response cache.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the request mix.")
+
+    def handle(self, *args, **options):
+        with benchmark_database(use_cache=not options['no_cache']):
+            try:
+                plan = self.build_plan(options)
+                results = {
+                    mode: self.run_mode(mode == 'async', plan, options)
+                    for mode in ('sync', 'async')
+                }
+            finally:
+                self.load_urls(settings.ASYNC_API_VIEWS)
+
+        results['config'] = {
+            key: options[key] for key in ('clients', 'requests', 'think_ms', 'doctors', 'appointments', 'no_cache')
+        }
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def build_plan(self, options):
+        """
+        Seeds the database and returns each client's list of (path, params, headers).
+        """
+        data = seeding.seed(
+            doctors=options['doctors'], patients=max(1, options['doctors'] * 10),
+            appointments=options['appointments'], rng=random.Random(options['seed']),
+        )
+        appointments = list(Appointment.objects.values_list('id', 'doctor_id'))
+
+        def auth(user):
+            token = add_role_claims(RefreshToken.for_user(user), user).access_token
+            return {'authorization': f'Bearer {token}'}
+
+        admin_headers = auth(data.admins[0])
+        doctor_headers = {doctor.id: auth(doctor.user) for doctor in data.doctors}
+        pages = max(1, len(appointments) // 5)
+        start = timezone.localdate() - timedelta(days=30)
+
+        rng = random.Random(options['seed'])
+        plan = []
+        for _ in range(options['clients']):
+            requests = []
+            for i in range(options['requests']):
+                appointment_id, doctor_id = rng.choice(appointments)
+                kind = i % 4
+                if kind == 0:
+                    requests.append(('/appointments/appointments/list/', {'page': rng.randint(1, pages)}, admin_headers))
+                elif kind == 1:
+                    requests.append((f'/appointments/appointments/{appointment_id}/', {}, doctor_headers[doctor_id]))
+                elif kind == 2:
+                    requests.append((
+                        '/appointments/appointments/count/',
+                        {'start_date': start.isoformat(), 'end_date': timezone.localdate().isoformat()},
+                        admin_headers,
+                    ))
+                else:
+                    requests.append(('/profile/', {}, doctor_headers[doctor_id]))
+            plan.append(requests)
+        return plan
+
+    def load_urls(self, async_views):
+        """
+        Re-imports the app URL modules so they pick the sync or async views.
+
+        The root URLconf includes the modules themselves, so clearing the resolver
+        cache is enough for it to see the reloaded patterns.
+        """
+        with override_settings(ASYNC_API_VIEWS=async_views):
+            for module in URL_MODULES:
+                importlib.reload(importlib.import_module(module))
+        clear_url_caches()
+
+    def run_mode(self, async_views, plan, options):
+        self.load_urls(async_views)
+        # Both modes share cache keys; start each one cold.
+        response_cache.get_cache().clear()
+        verified_tokens.clear()
+        think = options['think_ms'] / 1000
+        latencies = []
+        errors = 0
+
+        async def client(requests):
+            nonlocal errors
+            http = AsyncClient()
+            for path, params, headers in requests:
+                started = time.perf_counter()
+                response = await http.get(path, params, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+                if think:
+                    await asyncio.sleep(think)
+
+        async def run():
+            await asyncio.gather(*(client(requests) for requests in plan))
+
+        started = time.perf_counter()
+        asyncio.run(run())
+        return summarize(latencies, time.perf_counter() - started, errors)
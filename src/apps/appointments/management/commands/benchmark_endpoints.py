@@ -0,0 +1,201 @@
+import json
+import platform
+import random
+import time
+from datetime import timedelta
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.appointments import seeding
+from apps.appointments.benchmarking import QueryCounter, benchmark_database, summarize
+from apps.appointments.models import Appointment
+from apps.users.tokens import add_role_claims
+
+
+class Command(BaseCommand):
+    """
+    Measures every API endpoint against a freshly seeded throwaway database.
+
+    Each endpoint is called `--iterations` times in sequence through Django's
+    test client, after `--warmup` untimed calls. For every endpoint the report
+    holds throughput, p50/p95/p99 latency and the number and time of SQL
+    queries per request, as JSON on stdout or in `--output`.
+    """
+    help = "Benchmark the HealthSync API endpoints and report latency, throughput and query counts as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100, help="Timed requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per endpoint.")
+        parser.add_argument('--doctors', type=int, default=50, help="Doctors in the seeded database.")
+        parser.add_argument('--patients', type=int, default=1000, help="Patients in the seeded database.")
+        parser.add_argument('--appointments', type=int, default=20000, help="Appointments in the seeded database.")
+        parser.add_argument('--endpoints', default=None, help="Comma-separated endpoint names to run (default: all).")
+        parser.add_argument('--no-cache', action='store_true', help="Disable caching.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the data and request mix.")
+        parser.add_argument('--output', default=None, help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        with benchmark_database(use_cache=not options['no_cache']):
+            rng = random.Random(options['seed'])
+            data = seeding.seed(
+                doctors=options['doctors'], patients=options['patients'],
+                appointments=options['appointments'], rng=rng,
+            )
+            endpoints = self.endpoints(data, rng)
+            selected = options['endpoints'].split(',') if options['endpoints'] else list(endpoints)
+            results = {}
+            for name in selected:
+                self.stderr.write(f"Benchmarking {name}...")
+                results[name] = self.run_endpoint(endpoints[name], options['warmup'], options['iterations'])
+
+        report = {
+            'config': {
+                key: options[key]
+                for key in ('iterations', 'warmup', 'doctors', 'patients', 'appointments', 'no_cache', 'seed')
+            },
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'timestamp': timezone.now().isoformat(),
+            },
+            'endpoints': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def endpoints(self, data, rng):
+        """
+        Returns endpoint name -> request factory for every URL in HealthSync/urls.py.
+
+        A factory returns (method, path, params, headers, expected status); it is
+        called once per request, so requests that consume state (registration,
+        refresh token rotation) get fresh values every time.
+        """
+        def bearer(user):
+            token = add_role_claims(RefreshToken.for_user(user), user).access_token
+            return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+        admin = data.admins[0]
+        admin_auth = bearer(admin)
+        doctor = data.doctors[0]
+        doctor_auth = bearer(doctor.user)
+        patient_auth = bearer(data.patients[0].user)
+        appointment_ids = list(Appointment.objects.values_list('id', flat=True))
+        doctor_appointment_ids = list(doctor.appointment_set.values_list('id', flat=True)) or appointment_ids
+        pages = max(1, len(appointment_ids) // 5)
+        today = timezone.localdate()
+        counter = iter(range(10 ** 9))
+
+        def register():
+            n = next(counter)
+            return ('post', reverse('register'), {
+                'username': f'bench-register-{n}', 'email': f'bench-register-{n}@example.com',
+                'password': 'Bench-password-123', 'password2': 'Bench-password-123',
+                'is_doctor': False, 'is_patient': True,
+            }, {}, 201)
+
+        return {
+            'token_obtain': lambda: (
+                'post', reverse('token_obtain_pair'),
+                {'username': admin.username, 'password': data.password}, {}, 200,
+            ),
+            'token_refresh': lambda: (
+                'post', reverse('token_refresh'), {'refresh': str(RefreshToken.for_user(admin))}, {}, 200,
+            ),
+            'token_verify': lambda: (
+                'post', reverse('token_verify'), {'token': admin_auth['HTTP_AUTHORIZATION'].split()[1]}, {}, 200,
+            ),
+            'register': register,
+            'profile': lambda: ('get', reverse('profile'), {}, doctor_auth, 200),
+            'search': lambda: (
+                'get', reverse('search'), {'q': f'patient {rng.randrange(len(data.patients))}'}, admin_auth, 200,
+            ),
+            'appointment_list': lambda: (
+                'get', reverse('appointment-list'), {'page': rng.randint(1, pages)}, admin_auth, 200,
+            ),
+            'appointment_list_cursor': lambda: (
+                'get', reverse('appointment-list'), {'pagination': 'cursor'}, doctor_auth, 200,
+            ),
+            'appointment_detail': lambda: (
+                'get', reverse('appointment-detail', args=[rng.choice(doctor_appointment_ids)]), {}, doctor_auth, 200,
+            ),
+            'appointment_timeline': lambda: (
+                'get', reverse('appointment-timeline'), {'direction': rng.choice(['upcoming', 'past'])}, patient_auth, 200,
+            ),
+            'appointment_count': lambda: (
+                'get', reverse('appointment-count'),
+                {'start_date': (today - timedelta(days=90)).isoformat(), 'end_date': today.isoformat()},
+                admin_auth, 200,
+            ),
+            'appointment_count_series': lambda: (
+                'get', reverse('appointment-count'),
+                {
+                    'start_date': (today - timedelta(days=365)).isoformat(), 'end_date': today.isoformat(),
+                    'granularity': 'day', 'group_by': 'doctor',
+                },
+                admin_auth, 200,
+            ),
+            'appointment_export': lambda: (
+                'get', reverse('appointment-export'),
+                {'start_date': (today - timedelta(days=7)).isoformat(), 'end_date': today.isoformat()},
+                admin_auth, 200,
+            ),
+            'appointment_availability': lambda: (
+                'get', reverse('appointment-availability'),
+                {'doctors': str(doctor.id), 'start': today.isoformat()}, doctor_auth, 200,
+            ),
+        }
+
+    def run_endpoint(self, factory, warmup, iterations):
+        client = Client()
+        for _ in range(warmup):
+            self.request(client, factory())
+
+        latencies = []
+        query_counts = []
+        query_seconds = []
+        errors = 0
+        elapsed = 0.0
+        for _ in range(iterations):
+            # Build the request outside the timed section.
+            request = factory()
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                status = self.request(client, request)
+                duration = time.perf_counter() - started
+            elapsed += duration
+            latencies.append(duration)
+            query_counts.append(counter.count)
+            query_seconds.append(counter.seconds)
+            if status != request[4]:
+                errors += 1
+
+        result = summarize(latencies, elapsed, errors)
+        result['queries'] = {
+            'mean': round(sum(query_counts) / len(query_counts), 2) if query_counts else 0,
+            'max': max(query_counts, default=0),
+            'mean_ms': round(sum(query_seconds) / len(query_seconds) * 1000, 3) if query_seconds else 0,
+        }
+        return result
+
+    @staticmethod
+    def request(client, request):
+        method, path, params, headers, _ = request
+        if method == 'post':
+            response = client.post(path, params, content_type='application/json', **headers)
+        else:
+            response = client.get(path, params, **headers)
+        if response.streaming:
+            # Consume streamed bodies so their queries and encoding are measured.
+            for _ in response.streaming_content:
+                pass
+        return response.status_code
@@ -0,0 +1,103 @@
+import json
+import random
+import statistics
+import time
+from django.conf import settings
+from django.test import Client, override_settings
+from apps.appointments import seeding
+from apps.appointments.benchmarking import benchmark_database
+from apps.metrics import MetricsRegistry
+from .benchmark_endpoints import Command as EndpointBenchmark
+
+METRICS_MIDDLEWARE = 'apps.metrics.MetricsMiddleware'
+DEFAULT_ENDPOINTS = 'token_verify,profile,appointment_list,appointment_detail,appointment_count'
+
+
+class Command(EndpointBenchmark):
+    """
+    Measures the per-request cost of `MetricsMiddleware`.
+
+    The same endpoints are called with and without the middleware, alternating
+    in `--rounds` blocks so that drift (cache warm-up, CPU frequency) affects
+    both sides equally. The report gives, per endpoint, the mean and median
+    latency of each side and their difference, plus the cost of recording one
+    request in the registry measured in isolation.
+    """
+    help = "Compare endpoint latency with and without the metrics middleware."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--rounds', type=int, default=5, help="Alternating with/without blocks per endpoint.")
+        parser.set_defaults(endpoints=DEFAULT_ENDPOINTS, iterations=200, appointments=5000)
+
+    def handle(self, *args, **options):
+        with benchmark_database(use_cache=not options['no_cache']):
+            rng = random.Random(options['seed'])
+            data = seeding.seed(
+                doctors=options['doctors'], patients=options['patients'],
+                appointments=options['appointments'], rng=rng,
+            )
+            endpoints = self.endpoints(data, rng)
+            with_metrics = [mw for mw in settings.MIDDLEWARE if mw != METRICS_MIDDLEWARE]
+            with_metrics.insert(0, METRICS_MIDDLEWARE)
+            without_metrics = with_metrics[1:]
+
+            results = {}
+            for name in options['endpoints'].split(','):
+                self.stderr.write(f"Benchmarking {name}...")
+                samples = {'with': [], 'without': []}
+                block = max(1, options['iterations'] // options['rounds'])
+                for _ in range(options['rounds']):
+                    for side, middleware in (('without', without_metrics), ('with', with_metrics)):
+                        with override_settings(MIDDLEWARE=middleware):
+                            samples[side] += self.time_requests(Client(), endpoints[name], options['warmup'], block)
+                results[name] = self.compare(samples)
+
+        report = {
+            'config': {key: options[key] for key in ('iterations', 'rounds', 'appointments', 'no_cache', 'seed')},
+            'registry_observe_us': self.observe_cost(),
+            'endpoints': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def time_requests(self, client, factory, warmup, iterations):
+        for _ in range(warmup):
+            self.request(client, factory())
+        latencies = []
+        for _ in range(iterations):
+            request = factory()
+            started = time.perf_counter()
+            self.request(client, request)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    @staticmethod
+    def compare(samples):
+        summary = {
+            side: {
+                'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+                'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            }
+            for side, latencies in samples.items()
+        }
+        base = summary['without']['p50_ms']
+        delta = summary['with']['p50_ms'] - base
+        summary['p50_overhead_us'] = round(delta * 1000, 1)
+        summary['p50_overhead_percent'] = round(delta / base * 100, 2) if base else None
+        return summary
+
+    @staticmethod
+    def observe_cost(iterations=100000):
+        """
+        Returns the mean time, in microseconds, of recording one request.
+        """
+        registry = MetricsRegistry()
+        routes = [f'route/{i}/' for i in range(20)]
+        started = time.perf_counter()
+        for i in range(iterations):
+            registry.observe(routes[i % 20], 'GET', 200, 0.012, size=2048, queries=3, query_seconds=0.001)
+        return round((time.perf_counter() - started) / iterations * 1e6, 3)
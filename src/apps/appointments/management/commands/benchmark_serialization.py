@@ -0,0 +1,84 @@
+import json
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from apps.appointments import seeding
+from apps.appointments.benchmarking import benchmark_database
+from apps.appointments.models import Appointment
+from apps.appointments.rows import AppointmentRows
+from apps.appointments.serializers import AppointmentSerializer
+
+SPARSE_FIELDS = ('id', 'doctor', 'scheduled_at', 'ends_at')
+
+
+class Command(BaseCommand):
+    """
+    Measures the per-row cost of building appointment list pages.
+
+    Each page of ids is loaded and rendered the way the list view used to
+    (`in_bulk()` and `AppointmentSerializer(many=True)`) and through
+    `AppointmentRows` (`values_list()` tuples), for all fields, for a sparse
+    fieldset and with `expand=doctor,patient`. Timings include the query, since
+    loading model instances is part of the cost being removed.
+    """
+    help = "Compare serializer and values()-based serialization of appointment pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', default='100,1000,5000', help="Comma-separated page sizes.")
+        parser.add_argument('--repeats', type=int, default=20, help="Timed runs per page size and path.")
+        parser.add_argument('--appointments', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', default=None, help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+        with benchmark_database():
+            rng = random.Random(options['seed'])
+            seeding.seed(doctors=50, patients=1000, appointments=options['appointments'], rng=rng)
+            all_ids = list(Appointment.objects.order_by('id').values_list('id', flat=True))
+            queryset = Appointment.objects.all()
+            paths = {
+                'serializer': lambda ids: self.serialize(queryset, ids),
+                'rows': lambda ids: AppointmentRows().load(queryset, ids),
+                'serializer_sparse': lambda ids: self.serialize(queryset, ids, fields=SPARSE_FIELDS),
+                'rows_sparse': lambda ids: AppointmentRows(fields=SPARSE_FIELDS).load(queryset, ids),
+                'rows_expand': lambda ids: AppointmentRows(expand=('doctor', 'patient')).load(queryset, ids),
+            }
+
+            results = {}
+            for size in page_sizes:
+                ids = all_ids[:size]
+                self.stderr.write(f"Benchmarking pages of {len(ids)}...")
+                timings = {name: self.per_row_us(load, ids, options['repeats']) for name, load in paths.items()}
+                timings['rows_speedup'] = round(timings['serializer'] / timings['rows'], 2)
+                timings['rows_sparse_speedup'] = round(timings['serializer_sparse'] / timings['rows_sparse'], 2)
+                results[str(len(ids))] = timings
+
+        report = {
+            'config': {key: options[key] for key in ('repeats', 'appointments', 'seed')},
+            'per_row_us': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    @staticmethod
+    def serialize(queryset, ids, fields=None):
+        rows = queryset.in_bulk(ids)
+        return AppointmentSerializer([rows[i] for i in ids if i in rows], many=True, fields=fields).data
+
+    @staticmethod
+    def per_row_us(load, ids, repeats):
+        """
+        Returns the median time, in microseconds per row, of loading and rendering `ids`.
+        """
+        load(ids)
+        samples = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            load(ids)
+            samples.append(time.perf_counter() - started)
+        return round(statistics.median(samples) / len(ids) * 1e6, 2)
@@ -0,0 +1,72 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+from apps.appointments.bulk import bulk_set_completed, overdue_appointments
+from apps.appointments.models import Appointment
+from apps.sqlite import serialized_writes
+
+
+class Command(BaseCommand):
+    """
+    Completes pending appointments that ended more than a grace period ago.
+
+    Appointments are taken oldest first in batches of `--batch-size` ids, and
+    each batch is completed with one UPDATE in its own short transaction (see
+    `bulk.bulk_set_completed`), so a large end-of-day close-out never holds
+    locks for long. With `--flag-only` nothing is changed; the overdue
+    appointments are reported per doctor for manual follow-up instead. Meant to
+    be run periodically (e.g. every hour from cron).
+    """
+    help = "Mark past pending appointments completed, in batches, or report them with --flag-only."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=None,
+                            help="Minutes after an appointment ends before it is completed "
+                                 "(default: APPOINTMENT_AUTO_COMPLETE_AFTER_MINUTES).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Appointments completed per transaction.")
+        parser.add_argument('--sleep', type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument('--max-batches', type=int, default=None, help="Stop after this many batches.")
+        parser.add_argument('--flag-only', action='store_true',
+                            help="Only report overdue appointments per doctor; change nothing.")
+
+    def handle(self, *args, **options):
+        grace = options['grace_minutes']
+        if grace is None:
+            grace = settings.APPOINTMENT_AUTO_COMPLETE_AFTER_MINUTES
+        if grace < 0:
+            raise CommandError("--grace-minutes must not be negative.")
+        for option in ('batch_size', 'max_batches'):
+            if options[option] is not None and options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be a positive integer.")
+        cutoff = timezone.now() - timedelta(minutes=grace)
+        overdue = overdue_appointments(cutoff)
+
+        if options['flag_only']:
+            # One grouped query: one row per doctor, however many appointments are overdue.
+            per_doctor = overdue.order_by().values('doctor_id').annotate(count=Count('id')).order_by('doctor_id')
+            total = 0
+            for row in per_doctor.iterator():
+                self.stdout.write(f"Doctor {row['doctor_id']}: {row['count']} overdue pending appointments")
+                total += row['count']
+            self.stdout.write(f"Overdue pending appointments ended before {cutoff.isoformat()}: {total}")
+            return
+
+        completed = batches = 0
+        started = time.perf_counter()
+        while options['max_batches'] is None or batches < options['max_batches']:
+            ids = list(overdue.values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with serialized_writes():
+                completed += bulk_set_completed(Appointment.objects.filter(id__in=ids), True)
+            batches += 1
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Completed {completed} appointments ended before {cutoff.isoformat()} in {batches} batches ({elapsed:.2f}s)."
+        ))
@@ -0,0 +1,33 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.api_schema import SCHEMA_FORMATS, generate_schema
+
+
+class Command(BaseCommand):
+    """
+    Writes the OpenAPI schema served by /swagger/ and /redoc/.
+
+    Run it at build or deploy time, after the code is in place: workers then
+    read the files instead of introspecting every view. Regenerate whenever the
+    API changes, since a stale file is served as is.
+    """
+    help = "Generate openapi.json and openapi.yaml for the API documentation pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=None,
+                            help="Directory to write to (default: OPENAPI_SCHEMA_DIR).")
+
+    def handle(self, *args, **options):
+        directory = options['output_dir'] or settings.OPENAPI_SCHEMA_DIR
+        os.makedirs(directory, exist_ok=True)
+        for fmt, (filename, _) in SCHEMA_FORMATS.items():
+            started = time.perf_counter()
+            content = generate_schema(fmt)
+            path = os.path.join(directory, filename)
+            # Write then rename, so running workers never read a partial file.
+            with open(f'{path}.tmp', 'wb') as f:
+                f.write(content)
+            os.replace(f'{path}.tmp', path)
+            self.stdout.write(f"Wrote {path} ({len(content)} bytes) in {time.perf_counter() - started:.2f}s.")
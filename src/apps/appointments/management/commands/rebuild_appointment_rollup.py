@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.appointments import rollup
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds or verifies the DailyAppointmentCount rollup from the Appointment table.
+
+    The rollup is maintained incrementally by signal handlers; this command repairs
+    drift left behind by writes that bypass them (raw SQL, fixtures, bulk updates).
+    """
+    help = "Rebuild (default) or verify the daily appointment rollup table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help="Only compare the rollup against Appointment and report mismatches.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of rollup rows inserted per statement when rebuilding.",
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = rollup.find_mismatches()
+            for (date, doctor_id, is_completed), (stored, actual) in sorted(mismatches.items()):
+                status = "completed" if is_completed else "pending"
+                self.stdout.write(f"{date} doctor={doctor_id} {status}: stored={stored} actual={actual}")
+            if mismatches:
+                raise CommandError(f"Rollup is out of sync: {len(mismatches)} mismatching rows.")
+            self.stdout.write(self.style.SUCCESS("Rollup is in sync."))
+            return
+
+        written = rollup.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollup with {written} rows."))
@@ -0,0 +1,50 @@
+import random
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.appointments import seeding
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    """
+    Fills the database with synthetic users, doctors, patients and appointments.
+
+    Meant for reproducing production-scale data locally (see `seeding.py` for the
+    distributions). Every generated user gets the same password.
+    """
+    help = "Bulk-generate synthetic users, doctors, patients and appointments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=50, help="Number of doctors.")
+        parser.add_argument('--patients', type=int, default=1000, help="Number of patients.")
+        parser.add_argument('--appointments', type=int, default=20000, help="Number of appointments.")
+        parser.add_argument('--admins', type=int, default=1, help="Number of staff users.")
+        parser.add_argument('--days-back', type=int, default=180, help="Days of history before today.")
+        parser.add_argument('--days-ahead', type=int, default=30, help="Days of bookings after today.")
+        parser.add_argument('--prefix', default='seed', help="Prefix of the generated usernames.")
+        parser.add_argument('--password', default='seed-password', help="Password of every generated user.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows inserted per statement.")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible data.")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"Users prefixed '{options['prefix']}-' already exist; pass another --prefix.")
+
+        with transaction.atomic():
+            result = seeding.seed(
+                doctors=options['doctors'],
+                patients=options['patients'],
+                appointments=options['appointments'],
+                admins=options['admins'],
+                days_back=options['days_back'],
+                days_ahead=options['days_ahead'],
+                prefix=options['prefix'],
+                password=options['password'],
+                batch_size=options['batch_size'],
+                rng=random.Random(options['seed']),
+                stdout=self.stdout,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(result.doctors)} doctors, {len(result.patients)} patients and "
+            f"{result.appointments} appointments (password '{result.password}')."
+        ))
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.appointments.reminders import Dispatcher, schedule_reminders
+
+
+class Command(BaseCommand):
+    """
+    Queues and sends appointment reminders (see `apps/appointments/reminders.py`).
+
+    By default it scans once, delivers every reminder that is due and exits,
+    which suits cron. With `--loop` it keeps running: the scan repeats every
+    `--scan-interval` seconds, and in between due reminders are handed to the
+    worker pool as the rate limits allow. Slow or failing deliveries never delay
+    the scan.
+    """
+    help = "Queue reminders for upcoming appointments and deliver the due ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--channels', default=None,
+                            help="Comma-separated channels (default: every channel in REMINDER_BACKENDS).")
+        parser.add_argument('--workers', type=int, default=None, help="Delivery threads (default: REMINDER_WORKERS).")
+        parser.add_argument('--loop', action='store_true', help="Keep scanning and dispatching until interrupted.")
+        parser.add_argument('--scan-interval', type=float, default=60.0, help="Seconds between scans with --loop.")
+        parser.add_argument('--tick', type=float, default=0.5,
+                            help="Longest wait between dispatch rounds with --loop, in seconds.")
+        parser.add_argument('--scan-only', action='store_true', help="Only queue reminders; send nothing.")
+
+    def handle(self, *args, **options):
+        channels = tuple(filter(None, (options['channels'] or '').split(','))) or tuple(settings.REMINDER_BACKENDS)
+        unknown = set(channels).difference(settings.REMINDER_BACKENDS)
+        if unknown:
+            raise CommandError(f"Unknown channels: {', '.join(sorted(unknown))}.")
+
+        if options['scan_only']:
+            self.stdout.write(f"Queued {schedule_reminders(channels=channels)} reminders.")
+            return
+
+        dispatcher = Dispatcher(channels=channels, workers=options['workers'])
+        started = time.perf_counter()
+        queued = 0
+        try:
+            if not options['loop']:
+                queued = schedule_reminders(channels=channels)
+                dispatcher.drain()
+            else:
+                next_scan = 0.0
+                while True:
+                    if time.monotonic() >= next_scan:
+                        queued += schedule_reminders(channels=channels)
+                        next_scan = time.monotonic() + options['scan_interval']
+                    dispatcher.dispatch()
+                    if dispatcher.in_flight:
+                        wait(list(dispatcher.in_flight), timeout=options['tick'], return_when=FIRST_COMPLETED)
+                    else:
+                        time.sleep(options['tick'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.close()
+
+        stats = dispatcher.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Queued {queued} reminders; sent {stats['sent']}, retrying {stats['retried'] + stats['rate_limited']}, "
+            f"failed {stats['failed']}, skipped {stats['skipped']} ({time.perf_counter() - started:.2f}s)."
+        ))
@@ -0,0 +1,166 @@
+import json
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.appointments import seeding
+from apps.appointments.benchmarking import benchmark_database, summarize
+from apps.users.tokens import add_role_claims
+
+# Mode -> (database OPTIONS, CONN_MAX_AGE, serialize appointment writes)
+MODES = {
+    'default': ({}, 0, False),
+    'tuned': (settings.SQLITE_TUNED_OPTIONS, None, False),
+    'tuned_serialized': (settings.SQLITE_TUNED_OPTIONS, None, True),
+}
+
+
+class Command(BaseCommand):
+    """
+    Stress-tests concurrent appointment writes on SQLite in each connection mode.
+
+    For every mode a fresh throwaway database is seeded, then `--writers`
+    threads create appointments through the API (each for its own doctor, so
+    no request is a genuine booking conflict) while `--readers` threads list
+    appointments. The report gives write throughput, failed writes by status
+    code and read latency per mode, as JSON.
+
+    Modes:
+        default: Django's SQLite defaults (rollback journal, deferred transactions).
+        tuned: `SQLITE_TUNED_OPTIONS` (WAL, pragmas, busy timeout, BEGIN IMMEDIATE)
+            with persistent connections.
+        tuned_serialized: tuned, with appointment writes queued on the in-process
+            write lock (`SQLITE_SERIALIZE_WRITES`).
+    """
+    help = "Compare concurrent appointment write throughput across SQLite connection modes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16, help="Threads creating appointments.")
+        parser.add_argument('--writes', type=int, default=25, help="Appointments created by each writer.")
+        parser.add_argument('--readers', type=int, default=4, help="Threads listing appointments meanwhile.")
+        parser.add_argument('--appointments', type=int, default=2000, help="Appointments in the seeded database.")
+        parser.add_argument('--modes', default=','.join(MODES), help="Comma-separated modes to run.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the data.")
+
+    def handle(self, *args, **options):
+        results = {}
+        for mode in options['modes'].split(','):
+            self.stderr.write(f"Running {mode}...")
+            results[mode] = self.run_mode(mode, options)
+
+        baseline = results.get('default', {}).get('writes', {}).get('throughput_rps')
+        if baseline:
+            for result in results.values():
+                rate = result['writes'].get('throughput_rps')
+                result['writes']['speedup'] = round(rate / baseline, 2) if rate else None
+        results['config'] = {key: options[key] for key in ('writers', 'writes', 'readers', 'appointments', 'seed')}
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_mode(self, mode, options):
+        db_options, conn_max_age, serialize = MODES[mode]
+        saved = {key: connection.settings_dict[key] for key in ('OPTIONS', 'CONN_MAX_AGE')}
+        connection.close()
+        connection.settings_dict.update(OPTIONS=dict(db_options), CONN_MAX_AGE=conn_max_age)
+        try:
+            with override_settings(SQLITE_SERIALIZE_WRITES=serialize), benchmark_database(use_cache=False):
+                return self.run_load(options)
+        finally:
+            connection.close()
+            connection.settings_dict.update(saved)
+
+    def run_load(self, options):
+        data = seeding.seed(
+            doctors=options['writers'], patients=max(10, options['writers'] * 10),
+            appointments=options['appointments'], rng=random.Random(options['seed']),
+        )
+        token = add_role_claims(RefreshToken.for_user(data.admins[0]), data.admins[0]).access_token
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        # Past the seeded schedule, so only the concurrency can make a write fail.
+        start = timezone.now().replace(second=0, microsecond=0) + timedelta(days=60)
+        patient_ids = [patient.id for patient in data.patients]
+        # Threads open their own connections; they must see the seeded data.
+        connection.close()
+
+        barrier = threading.Barrier(options['writers'] + options['readers'])
+        writers_done = threading.Event()
+        lock = threading.Lock()
+        writes = {'latencies': [], 'statuses': {}}
+        reads = {'latencies': [], 'errors': 0}
+
+        def writer(doctor, rng):
+            client = Client(raise_request_exception=False)
+            latencies = []
+            statuses = {}
+            barrier.wait()
+            for i in range(options['writes']):
+                payload = {
+                    'doctor': doctor.id,
+                    'patient': rng.choice(patient_ids),
+                    'scheduled_at': (start + timedelta(minutes=30 * i)).isoformat(),
+                    'duration_minutes': 30,
+                }
+                started = time.perf_counter()
+                response = client.post(
+                    reverse('appointment-list'), payload, content_type='application/json', **headers,
+                )
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            connections.close_all()
+            with lock:
+                writes['latencies'].extend(latencies)
+                for code, count in statuses.items():
+                    writes['statuses'][code] = writes['statuses'].get(code, 0) + count
+
+        def reader():
+            client = Client(raise_request_exception=False)
+            latencies = []
+            errors = 0
+            barrier.wait()
+            while not writers_done.is_set():
+                started = time.perf_counter()
+                response = client.get(reverse('appointment-list'), **headers)
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+            connections.close_all()
+            with lock:
+                reads['latencies'].extend(latencies)
+                reads['errors'] += errors
+
+        writer_threads = [
+            threading.Thread(target=writer, args=(doctor, random.Random(options['seed'] + index)))
+            for index, doctor in enumerate(data.doctors)
+        ]
+        reader_threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        # Failed writes are expected in the default mode; keep their tracebacks out of the report.
+        logging.disable(logging.ERROR)
+        try:
+            for thread in writer_threads + reader_threads:
+                thread.start()
+            started = time.perf_counter()
+            for thread in writer_threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            writers_done.set()
+            for thread in reader_threads:
+                thread.join()
+        finally:
+            logging.disable(logging.NOTSET)
+
+        failed = sum(count for code, count in writes['statuses'].items() if code != 201)
+        created = len(writes['latencies']) - failed
+        result = summarize(writes['latencies'], elapsed, failed)
+        # Throughput counts successful writes only.
+        result['throughput_rps'] = round(created / elapsed, 1) if elapsed else None
+        result['statuses'] = {str(code): count for code, count in sorted(writes['statuses'].items())}
+        return {
+            'writes': result,
+            'reads': summarize(reads['latencies'], elapsed, reads['errors']),
+        }
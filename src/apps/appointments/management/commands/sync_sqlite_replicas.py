@@ -0,0 +1,51 @@
+import sqlite3
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    """
+    Copies the primary SQLite database into every SQLite replica.
+
+    Stands in for database replication when trying the replica router locally
+    (see `apps/db_router.py`): point `HEALTHSYNC_DB_REPLICAS` at a few files and
+    run this once, or with `--interval` to refresh them continuously, which
+    also simulates replication lag. Uses SQLite's online backup API, so the
+    primary can keep serving requests while it is copied.
+    """
+    help = "Copy the primary SQLite database into the SQLite read replicas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Keep copying every N seconds until interrupted.")
+
+    def handle(self, *args, **options):
+        primary = connections['default'].settings_dict
+        replicas = [connections[alias].settings_dict for alias in settings.REPLICA_DATABASES]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("The primary database is not SQLite.")
+        if not replicas:
+            raise CommandError("No replicas are configured; set HEALTHSYNC_DB_REPLICAS.")
+        if any(replica['ENGINE'] != 'django.db.backends.sqlite3' for replica in replicas):
+            raise CommandError("Every replica must be SQLite.")
+
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(primary['NAME'])
+            try:
+                for replica in replicas:
+                    target = sqlite3.connect(replica['NAME'])
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+            self.stdout.write(
+                f"Copied {primary['NAME']} to {len(replicas)} replicas in {time.perf_counter() - started:.2f}s."
+            )
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
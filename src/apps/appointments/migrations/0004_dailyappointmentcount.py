@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-17 06:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def populate_rollup(apps, schema_editor):
+    Appointment = apps.get_model('appointments', 'Appointment')
+    DailyAppointmentCount = apps.get_model('appointments', 'DailyAppointmentCount')
+    rows = Appointment.objects.annotate(date=TruncDate('scheduled_at')) \
+        .values('date', 'doctor_id', 'is_completed') \
+        .annotate(count=Count('id')) \
+        .order_by()
+    DailyAppointmentCount.objects.bulk_create(
+        [DailyAppointmentCount(**row) for row in rows.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_appointment_indexes'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAppointmentCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('is_completed', models.BooleanField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_counts', to='users.doctor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'doctor', 'is_completed'), name='unique_daily_appointment_count')],
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
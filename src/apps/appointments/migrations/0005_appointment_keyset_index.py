@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_dailyappointmentcount'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['scheduled_at', 'id'], name='appt_sched_id_idx'),
+        ),
+    ]
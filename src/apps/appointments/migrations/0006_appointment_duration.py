@@ -0,0 +1,42 @@
+import django.core.validators
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def populate_ends_at(apps, schema_editor):
+    Appointment = apps.get_model('appointments', 'Appointment')
+    batch = []
+    for appointment in Appointment.objects.only('id', 'scheduled_at', 'duration_minutes').iterator(chunk_size=1000):
+        appointment.ends_at = appointment.scheduled_at + timedelta(minutes=appointment.duration_minutes)
+        batch.append(appointment)
+        if len(batch) >= 1000:
+            Appointment.objects.bulk_update(batch, ['ends_at'])
+            batch = []
+    if batch:
+        Appointment.objects.bulk_update(batch, ['ends_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_appointment_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=30, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(480)]),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_ends_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='appointment',
+            name='ends_at',
+            field=models.DateTimeField(editable=False),
+        ),
+    ]
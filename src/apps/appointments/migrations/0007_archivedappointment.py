@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-17 07:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_appointment_duration'),
+        ('users', '0003_searchtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('scheduled_at', models.DateTimeField()),
+                ('duration_minutes', models.PositiveIntegerField()),
+                ('ends_at', models.DateTimeField()),
+                ('is_completed', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='users.doctor')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='users.patient')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['doctor', 'scheduled_at'], name='archived_doctor_sched_idx'), models.Index(fields=['patient', 'scheduled_at'], name='archived_patient_sched_idx'), models.Index(fields=['scheduled_at'], name='archived_sched_idx')],
+            },
+        ),
+    ]
@@ -1,13 +1,50 @@
+from datetime import timedelta
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from apps.users.models import Doctor, Patient
 from ..base_model import TimeStampedModel
 
 class Appointment(TimeStampedModel):
+    DEFAULT_DURATION_MINUTES = 30
+    MAX_DURATION_MINUTES = 8 * 60
+
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE)
     scheduled_at = models.DateTimeField()
+    duration_minutes = models.PositiveIntegerField(
+        default=DEFAULT_DURATION_MINUTES,
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_DURATION_MINUTES)]
+    )
+    # Denormalized scheduled_at + duration, so overlap checks are plain column comparisons.
+    ends_at = models.DateTimeField(editable=False)
     is_completed = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Range scans on scheduled_at are always combined with one of these
+            # leading columns, so each composite index serves both the equality
+            # and the range part of the lookup.
+            models.Index(fields=['doctor', 'scheduled_at'], name='appt_doctor_sched_idx'),
+            models.Index(fields=['is_completed', 'scheduled_at'], name='appt_completed_sched_idx'),
+            models.Index(fields=['patient', 'scheduled_at'], name='appt_patient_sched_idx'),
+            # Keyset pagination over all appointments walks (scheduled_at, id).
+            models.Index(fields=['scheduled_at', 'id'], name='appt_sched_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.set_ends_at()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'ends_at' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'ends_at']
+        super().save(*args, **kwargs)
+
+    def set_ends_at(self):
+        """
+        Recomputes `ends_at` from `scheduled_at` and `duration_minutes`. Called by
+        `save()`; code that bypasses `save()` (such as `bulk_create`) must call it.
+        """
+        self.ends_at = self.scheduled_at + timedelta(minutes=self.duration_minutes)
+
     def __str__(self):
         doctor_name = self.doctor.user.last_name or "Unknown Doctor"
         patient_name = self.patient.user.get_full_name() or "Unknown Patient"
@@ -19,3 +56,120 @@ class Appointment(TimeStampedModel):
         patient_name = self.patient.user.get_full_name() or "Unknown Patient"
         scheduled_time = self.scheduled_at.strftime('%b %d, %Y %H:%M')
         return f"Appointment with Dr. {doctor_name} for {patient_name} on {scheduled_time}. Status: {status}."
+
+
+class ArchivedAppointment(models.Model):
+    """
+    A completed appointment moved out of Appointment by `archive_appointments`.
+
+    Rows keep their original id and timestamps, so `/appointments/<id>/` still
+    finds them, and they stay counted in DailyAppointmentCount. Keeping old
+    history here leaves the Appointment table and its indexes small.
+
+    Attributes:
+        archived_at: When the row was moved to the archive.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='archived_appointments')
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='archived_appointments')
+    scheduled_at = models.DateTimeField()
+    duration_minutes = models.PositiveIntegerField()
+    ends_at = models.DateTimeField()
+    is_completed = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    # Appointment columns copied to the archive.
+    COPIED_FIELDS = (
+        'id', 'patient_id', 'doctor_id', 'scheduled_at', 'duration_minutes', 'ends_at', 'is_completed',
+        'created_at', 'updated_at',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['doctor', 'scheduled_at'], name='archived_doctor_sched_idx'),
+            models.Index(fields=['patient', 'scheduled_at'], name='archived_patient_sched_idx'),
+            # Hourly counts over old ranges.
+            models.Index(fields=['scheduled_at'], name='archived_sched_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived appointment {self.id} on {self.scheduled_at}"
+
+
+class AppointmentReminder(models.Model):
+    """
+    A reminder for an appointment on one channel, queued by the reminder scan
+    and delivered by the dispatcher (see `reminders.py`).
+
+    The unique (appointment, channel, lead_minutes) constraint makes queuing
+    idempotent, so each reminder is sent at most once however often the scan runs.
+
+    Attributes:
+        channel: The notification backend name, e.g. 'email' or 'sms'.
+        lead_minutes: How long before the appointment the reminder is for.
+        status: Pending, sending (leased by a dispatcher), sent, failed or skipped.
+        attempts: Failed delivery attempts so far.
+        next_attempt_at: When a pending reminder is due, or when a dispatcher's
+            lease on a sending one expires.
+        sent_at: When the reminder was delivered.
+        last_error: The last delivery error, or why it was skipped.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+    STATUS_CHOICES = [(status, status.capitalize()) for status in (PENDING, SENDING, SENT, FAILED, SKIPPED)]
+
+    appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, related_name='reminders')
+    channel = models.CharField(max_length=20)
+    lead_minutes = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['appointment', 'channel', 'lead_minutes'], name='unique_appointment_reminder'),
+        ]
+        indexes = [
+            # Dispatchers claim due reminders by status and due time.
+            models.Index(fields=['status', 'next_attempt_at'], name='reminder_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} reminder {self.lead_minutes} minutes before appointment {self.appointment_id}: {self.status}"
+
+
+class DailyAppointmentCount(models.Model):
+    """
+    Pre-aggregated number of appointments per day, doctor and completion status.
+
+    Rows are maintained incrementally by the signal handlers in `signals.py` so that
+    reporting endpoints can sum a handful of rows per day instead of scanning
+    Appointment. The `rebuild_appointment_rollup` command recomputes or verifies it.
+
+    Attributes:
+        date: The local calendar date of the appointments.
+        doctor: The doctor the appointments are scheduled with.
+        is_completed: The completion status shared by the counted appointments.
+        count: The number of matching appointments.
+    """
+    date = models.DateField()
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='daily_counts')
+    is_completed = models.BooleanField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'doctor', 'is_completed'], name='unique_daily_appointment_count'),
+        ]
+
+    def __str__(self):
+        status = "completed" if self.is_completed else "pending"
+        return f"{self.count} {status} appointments for doctor {self.doctor_id} on {self.date}"
@@ -0,0 +1,99 @@
+"""
+Notification backends used by the reminder dispatcher.
+
+A backend delivers one `Message` on one channel. Backends are configured per
+channel in `REMINDER_BACKENDS` as dotted paths, like Django's EMAIL_BACKEND.
+`send` runs on the dispatcher's worker threads and must not touch the
+database. It raises `RateLimited` when the provider asks to slow down, and
+any other exception for a failed delivery; the dispatcher reschedules both
+instead of sleeping.
+
+Email goes through Django's mail framework, so the console and file-based
+email backends serve as local stand-ins (`HEALTHSYNC_EMAIL_BACKEND`). SMS has
+console and file stand-ins; a real gateway subclasses `NotificationBackend`.
+"""
+import sys
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils.module_loading import import_string
+
+
+@dataclass(frozen=True)
+class Message:
+    recipient: str
+    subject: str
+    body: str
+
+
+class RateLimited(Exception):
+    """
+    Raised by a backend when the provider rejects a message for sending too fast.
+
+    Attributes:
+        retry_after: Seconds to wait before sending on this channel again.
+    """
+
+    def __init__(self, retry_after=1.0):
+        super().__init__(f"Rate limited; retry after {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class NotificationBackend:
+    """
+    Base class for notification backends.
+    """
+
+    def recipient(self, user):
+        """
+        Returns the address to notify `user` at, from a dict of the user's
+        `email`, `phone_number` and `first_name`, or None if there is none.
+        """
+        raise NotImplementedError
+
+    def send(self, message):
+        raise NotImplementedError
+
+
+class EmailBackend(NotificationBackend):
+    """
+    Sends reminders with Django's `send_mail` through `EMAIL_BACKEND`.
+    """
+
+    def recipient(self, user):
+        return user['email'] or None
+
+    def send(self, message):
+        send_mail(message.subject, message.body, None, [message.recipient])
+
+
+class ConsoleSMSBackend(NotificationBackend):
+    """
+    Writes text messages to stdout instead of sending them.
+    """
+    _lock = threading.Lock()
+
+    def recipient(self, user):
+        return user['phone_number'] or None
+
+    def send(self, message):
+        with self._lock:
+            sys.stdout.write(f"SMS to {message.recipient}: {message.body}\n")
+            sys.stdout.flush()
+
+
+class FileSMSBackend(ConsoleSMSBackend):
+    """
+    Appends text messages to `REMINDER_SMS_FILE_PATH`, one per line.
+    """
+
+    def send(self, message):
+        with self._lock, open(settings.REMINDER_SMS_FILE_PATH, 'a') as f:
+            f.write(f"{message.recipient}\t{message.body}\n")
+
+
+@lru_cache(maxsize=None)
+def get_backend(channel):
+    return import_string(settings.REMINDER_BACKENDS[channel])()
@@ -0,0 +1,152 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class AppointmentPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination for appointments, kept for backwards compatibility.
+
+    Identical to the project-wide default except that clients may pick a page
+    size with `?page_size=` up to `max_page_size`.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class AppointmentCursorPagination(BasePagination):
+    """
+    Keyset pagination for appointments ordered by (scheduled_at, id).
+
+    Each page is fetched with a `(scheduled_at, id) > (last_scheduled_at, last_id)`
+    predicate instead of an OFFSET, and no COUNT query is issued, so every page
+    costs the same regardless of how deep the client has paged. Because the
+    cursor carries the exact key of the boundary row, rows inserted concurrently
+    never shift or duplicate entries between pages.
+
+    Attributes:
+        page_size: The default number of appointments per page.
+        page_size_query_param: Query parameter clients use to choose a page size.
+        max_page_size: Upper bound for client-chosen page sizes.
+        cursor_query_param: Query parameter holding the opaque cursor.
+        descending: Order pages newest first, by (-scheduled_at, -id).
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    descending = False
+
+    def __init__(self, descending=None):
+        if descending is not None:
+            self.descending = descending
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request)
+
+        # Previous pages of an ascending list walk towards smaller keys, and vice versa.
+        towards_smaller = self.reverse != self.descending
+        if position is not None:
+            scheduled_at, pk = position
+            if towards_smaller:
+                boundary = Q(scheduled_at__lt=scheduled_at) | Q(scheduled_at=scheduled_at, id__lt=pk)
+            else:
+                boundary = Q(scheduled_at__gt=scheduled_at) | Q(scheduled_at=scheduled_at, id__gt=pk)
+            queryset = queryset.filter(boundary)
+
+        ordering = ('-scheduled_at', '-id') if towards_smaller else ('scheduled_at', 'id')
+        # Fetch one extra row to learn whether another page exists in this direction.
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        if self.reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        """
+        Returns the ((scheduled_at, id), reverse) pair encoded in the request's cursor.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            scheduled_at = parse_datetime(tokens['s'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if scheduled_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (scheduled_at, pk), reverse
+
+    def encode_cursor(self, appointment, reverse):
+        tokens = {'s': appointment.scheduled_at.isoformat(), 'i': appointment.pk}
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -30,8 +30,16 @@ class IsAdminUserOrAppointmentDoctor(permissions.BasePermission):
             return True
 
         # Allow doctors to access their own appointments
-        if hasattr(request.user, 'doctor') and obj.doctor == request.user.doctor:
+        if hasattr(request.user, 'doctor') and obj.doctor_id == request.user.doctor.id:
             return request.method in permissions.SAFE_METHODS
 
         # Deny access otherwise
         return False
+
+class IsAdminUserOrPatient(permissions.BasePermission):
+    """
+    Allows admin users and patients; used by patient-scoped read endpoints.
+    """
+
+    def has_permission(self, request, view):
+        return bool(request.user and (request.user.is_staff or hasattr(request.user, 'patient')))
@@ -0,0 +1,334 @@
+"""
+Appointment reminders.
+
+Reminders flow through the AppointmentReminder table in two independent steps:
+
+- `schedule_reminders` queues one pending reminder per upcoming appointment,
+  channel and lead time (`REMINDER_LEAD_MINUTES`). A lead time covers the
+  appointments starting between the next shorter lead time and itself, so an
+  appointment booked at short notice only gets the nearest reminder. The scan
+  walks each window in (scheduled_at, id) keyset batches, an index range scan,
+  and skips queued appointments with a NOT EXISTS probe of the reminders'
+  unique index, so its memory is bounded by the batch size however many
+  appointments are upcoming.
+- `Dispatcher` claims due reminders under a lease, renders them and hands them
+  to a bounded pool of worker threads that call the notification backends (see
+  `notifications.py`). Workers never touch the database: outcomes are recorded
+  in batches by the dispatching thread. Per-channel rate limits are token
+  buckets checked before claiming, and failed or rate-limited deliveries are
+  rescheduled through `next_attempt_at`, so neither ever sleeps in the loop.
+"""
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from ..sqlite import serialized_writes
+from .models import Appointment, AppointmentReminder
+from .notifications import Message, RateLimited, get_backend
+
+SCAN_BATCH_SIZE = 1000
+CLAIM_BATCH_SIZE = 500
+LEASE_SECONDS = 300
+
+# values() fields loaded to render claimed reminders
+MESSAGE_FIELDS = (
+    'id', 'lead_minutes', 'attempts',
+    'appointment__scheduled_at', 'appointment__is_completed',
+    'appointment__doctor__user__username', 'appointment__doctor__user__first_name',
+    'appointment__doctor__user__last_name',
+    'appointment__patient__user__username', 'appointment__patient__user__first_name',
+    'appointment__patient__user__email', 'appointment__patient__user__phone_number',
+)
+
+
+def lead_windows(now):
+    """
+    Yields (lead_minutes, start, end): appointments scheduled in (start, end]
+    are due a reminder with that lead time.
+    """
+    shorter = 0
+    for lead in sorted(settings.REMINDER_LEAD_MINUTES):
+        yield lead, now + timedelta(minutes=shorter), now + timedelta(minutes=lead)
+        shorter = lead
+
+
+def schedule_reminders(now=None, channels=None, batch_size=SCAN_BATCH_SIZE):
+    """
+    Queues the reminders that are due and not queued yet.
+
+    Args:
+        now: The current time (defaults to now).
+        channels: Channel names (defaults to every channel in `REMINDER_BACKENDS`).
+        batch_size: Appointments read and reminders inserted per query.
+
+    Returns:
+        int: The number of reminders queued.
+    """
+    now = now or timezone.now()
+    channels = channels or tuple(settings.REMINDER_BACKENDS)
+    queued = 0
+    for lead, start, end in lead_windows(now):
+        for channel in channels:
+            already_queued = AppointmentReminder.objects.filter(
+                appointment=OuterRef('pk'), channel=channel, lead_minutes=lead
+            )
+            upcoming = Appointment.objects.filter(is_completed=False, scheduled_at__gt=start, scheduled_at__lte=end) \
+                .exclude(Exists(already_queued)) \
+                .order_by('scheduled_at', 'id')
+            last = None
+            while True:
+                page = upcoming
+                if last is not None:
+                    # The plain lower bound lets the index seek past the previous batches.
+                    page = page.filter(scheduled_at__gte=last[1]) \
+                        .filter(Q(scheduled_at__gt=last[1]) | Q(scheduled_at=last[1], id__gt=last[0]))
+                rows = list(page.values_list('id', 'scheduled_at')[:batch_size])
+                if not rows:
+                    break
+                with serialized_writes():
+                    # A reminder queued concurrently is skipped by the unique constraint.
+                    AppointmentReminder.objects.bulk_create([
+                        AppointmentReminder(
+                            appointment_id=appointment_id, channel=channel, lead_minutes=lead, next_attempt_at=now
+                        )
+                        for appointment_id, _ in rows
+                    ], ignore_conflicts=True)
+                queued += len(rows)
+                last = rows[-1]
+    return queued
+
+
+def render(row, recipient):
+    """
+    Returns the reminder message for a row of MESSAGE_FIELDS values.
+    """
+    when = timezone.localtime(row['appointment__scheduled_at']).strftime('%b %d, %Y %H:%M')
+    doctor = row['appointment__doctor__user__last_name'] or row['appointment__doctor__user__username']
+    patient = row['appointment__patient__user__first_name'] or row['appointment__patient__user__username']
+    return Message(
+        recipient=recipient,
+        subject="Appointment reminder",
+        body=f"Hi {patient}, this is a reminder of your appointment with Dr. {doctor} on {when}.",
+    )
+
+
+class TokenBucket:
+    """
+    Allows `rate` messages per second on average, in bursts of up to `rate`.
+    A `rate` of None means unlimited.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = float(rate or 0)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def available(self):
+        now = time.monotonic()
+        if now < self.paused_until:
+            return 0
+        if self.rate is None:
+            return float('inf')
+        self.tokens = min(float(self.rate), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return int(self.tokens)
+
+    def take(self, count):
+        self.tokens -= count
+
+    def pause(self, seconds):
+        """
+        Stops handing out tokens for `seconds`, e.g. after the provider rate-limited us.
+        """
+        self.tokens = 0.0
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def wait_time(self):
+        """
+        Returns the seconds until at least one token is available.
+        """
+        paused = self.paused_until - time.monotonic()
+        if self.rate is None:
+            return max(paused, 0.0)
+        return max(paused, (1 - self.tokens) / self.rate, 0.0)
+
+
+class Dispatcher:
+    """
+    Delivers due reminders from a bounded pool of worker threads.
+
+    `dispatch()` never waits on a delivery: it records the deliveries that have
+    finished, then claims as many due reminders per channel as the pool and the
+    channel's rate limit allow and submits them. Call it periodically, or use
+    `drain()` to deliver everything currently due. Reminders stay leased (status
+    sending) while in flight; a dispatcher that dies leaves them to be claimed
+    again once the lease expires.
+
+    Attributes:
+        stats: Counts of reminders sent, retried, failed and skipped.
+    """
+
+    def __init__(self, channels=None, workers=None, batch_size=CLAIM_BATCH_SIZE):
+        self.channels = tuple(channels or settings.REMINDER_BACKENDS)
+        self.batch_size = batch_size
+        workers = workers or settings.REMINDER_WORKERS
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reminders')
+        # Enough queued work to keep every worker busy between two dispatch() calls.
+        self.max_in_flight = workers * 4
+        self.in_flight = {}
+        self.buckets = {channel: TokenBucket(settings.REMINDER_RATE_LIMITS.get(channel)) for channel in self.channels}
+        self.stats = Counter()
+
+    def dispatch(self):
+        """
+        Records finished deliveries and submits newly due reminders.
+
+        Returns:
+            int: The number of reminders submitted.
+        """
+        self.collect()
+        submitted = 0
+        for channel in self.channels:
+            bucket = self.buckets[channel]
+            limit = min(self.max_in_flight - len(self.in_flight), bucket.available(), self.batch_size)
+            if limit <= 0:
+                continue
+            count = self.submit(channel, self.claim(channel, int(limit)))
+            bucket.take(count)
+            submitted += count
+        return submitted
+
+    def drain(self):
+        """
+        Dispatches until no reminder is due or in flight. Reminders rescheduled
+        for a later retry are left for the next run.
+        """
+        while True:
+            submitted = self.dispatch()
+            if self.in_flight:
+                wait(list(self.in_flight), timeout=1, return_when=FIRST_COMPLETED)
+            elif not submitted:
+                if not self.due().exists():
+                    return
+                # Due reminders are all held back by rate limits.
+                time.sleep(min(bucket.wait_time() for bucket in self.buckets.values()) or 0.01)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.collect()
+
+    def due(self, channel=None):
+        now = timezone.now()
+        due = AppointmentReminder.objects.filter(
+            status__in=[AppointmentReminder.PENDING, AppointmentReminder.SENDING], next_attempt_at__lte=now
+        )
+        return due.filter(channel=channel) if channel else due.filter(channel__in=self.channels)
+
+    def claim(self, channel, limit):
+        """
+        Leases up to `limit` due reminders of a channel and returns their ids.
+        """
+        with serialized_writes(), transaction.atomic():
+            ids = list(
+                self.due(channel).select_for_update(skip_locked=True)
+                .order_by('next_attempt_at').values_list('id', flat=True)[:limit]
+            )
+            if ids:
+                AppointmentReminder.objects.filter(id__in=ids).update(
+                    status=AppointmentReminder.SENDING,
+                    next_attempt_at=timezone.now() + timedelta(seconds=LEASE_SECONDS),
+                )
+        return ids
+
+    def submit(self, channel, ids):
+        """
+        Renders the claimed reminders and submits them to the pool. Reminders
+        that no longer apply are settled here without being sent.
+
+        Returns:
+            int: The number of reminders submitted.
+        """
+        if not ids:
+            return 0
+        backend = get_backend(channel)
+        now = timezone.now()
+        skipped, moved, submitted = [], [], 0
+        for row in AppointmentReminder.objects.filter(id__in=ids).values(*MESSAGE_FIELDS):
+            scheduled_at = row['appointment__scheduled_at']
+            if row['appointment__is_completed'] or scheduled_at <= now:
+                skipped.append(self.settled(row['id'], "Appointment completed or already started."))
+                continue
+            if scheduled_at > now + timedelta(minutes=row['lead_minutes']):
+                # Rescheduled later: queue it again once it is due.
+                moved.append(row['id'])
+                continue
+            recipient = backend.recipient({
+                'email': row['appointment__patient__user__email'],
+                'phone_number': row['appointment__patient__user__phone_number'],
+                'first_name': row['appointment__patient__user__first_name'],
+            })
+            if not recipient:
+                skipped.append(self.settled(row['id'], f"No {channel} address."))
+                continue
+            future = self.pool.submit(backend.send, render(row, recipient))
+            self.in_flight[future] = (row['id'], row['attempts'], channel)
+            submitted += 1
+
+        with serialized_writes(), transaction.atomic():
+            if moved:
+                AppointmentReminder.objects.filter(id__in=moved).delete()
+            if skipped:
+                AppointmentReminder.objects.bulk_update(skipped, ['status', 'last_error'], batch_size=CLAIM_BATCH_SIZE)
+        self.stats['skipped'] += len(skipped)
+        return submitted
+
+    @staticmethod
+    def settled(reminder_id, reason):
+        return AppointmentReminder(id=reminder_id, status=AppointmentReminder.SKIPPED, last_error=reason)
+
+    def collect(self):
+        """
+        Records the outcome of every finished delivery.
+        """
+        done = [future for future in self.in_flight if future.done()]
+        if not done:
+            return
+        now = timezone.now()
+        sent, retries = [], []
+        for future in done:
+            reminder_id, attempts, channel = self.in_flight.pop(future)
+            error = future.exception()
+            if error is None:
+                sent.append(reminder_id)
+            elif isinstance(error, RateLimited):
+                # Not the message's fault: try again once the provider allows it.
+                self.buckets[channel].pause(error.retry_after)
+                retries.append(AppointmentReminder(
+                    id=reminder_id, status=AppointmentReminder.PENDING, attempts=attempts,
+                    next_attempt_at=now + timedelta(seconds=error.retry_after), last_error=str(error)[:255],
+                ))
+                self.stats['rate_limited'] += 1
+            else:
+                attempts += 1
+                failed = attempts >= settings.REMINDER_MAX_ATTEMPTS
+                retries.append(AppointmentReminder(
+                    id=reminder_id, status=AppointmentReminder.FAILED if failed else AppointmentReminder.PENDING,
+                    attempts=attempts, last_error=f"{type(error).__name__}: {error}"[:255],
+                    next_attempt_at=now + timedelta(seconds=settings.REMINDER_RETRY_SECONDS * 2 ** (attempts - 1)),
+                ))
+                self.stats['failed' if failed else 'retried'] += 1
+        with serialized_writes(), transaction.atomic():
+            if sent:
+                AppointmentReminder.objects.filter(id__in=sent).update(
+                    status=AppointmentReminder.SENT, sent_at=now, last_error=''
+                )
+            if retries:
+                AppointmentReminder.objects.bulk_update(
+                    retries, ['status', 'attempts', 'next_attempt_at', 'last_error'], batch_size=CLAIM_BATCH_SIZE
+                )
+        self.stats['sent'] += len(sent)
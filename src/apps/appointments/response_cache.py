@@ -0,0 +1,241 @@
+"""
+Versioned response cache for appointment read endpoints.
+
+Cached responses are keyed by view, role, doctor, host and normalized query
+parameters, plus a version counter: the global version for admin reads and the
+doctor's own version for doctor reads. Writes never delete cache entries; they
+bump the affected counters, which makes every older key unreachable until it
+expires. Saves changing the doctor or patient names embedded by `?expand=` bump
+them as well (see signals.py). Any Django cache backend works (locmem,
+file-based, memcached, redis).
+"""
+import hashlib
+from functools import wraps
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+from ..conditional import not_modified_response, set_validators
+from ..db_router import is_pinned, reads_from_replica
+
+KEY_PREFIX = 'appointments'
+GLOBAL_SCOPE = 'global'
+CACHED_VIEWS = ('appointment-list', 'appointment-detail', 'appointment-count')
+
+
+def get_cache():
+    return caches[getattr(settings, 'APPOINTMENT_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'APPOINTMENT_CACHE_TIMEOUT', 300)
+
+
+def version_key(scope):
+    return f'{KEY_PREFIX}:version:{scope}'
+
+
+def get_version(scope):
+    """
+    Returns the current version counter for a scope ('global' or 'doctor:<id>').
+    """
+    return get_cache().get(version_key(scope), 0)
+
+
+def _bump(scopes):
+    cache = get_cache()
+    for scope in scopes:
+        key = version_key(scope)
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The key was evicted between add() and incr(); any new value invalidates.
+            cache.set(key, 1, timeout=None)
+
+
+def bump_versions(doctor_ids):
+    """
+    Invalidates cached reads for the given doctors and for admins.
+
+    The counters are bumped immediately and again once the surrounding
+    transaction commits, so a read that cached pre-commit data in between is
+    invalidated as well.
+    """
+    scopes = [GLOBAL_SCOPE] + [f'doctor:{doctor_id}' for doctor_id in set(doctor_ids) if doctor_id is not None]
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def record(view_name, outcome):
+    """
+    Increments the hit or miss counter for a view.
+    """
+    cache = get_cache()
+    key = f'{KEY_PREFIX}:stats:{view_name}:{outcome}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats(view_names):
+    """
+    Returns hit/miss counters and the hit ratio for each view.
+    """
+    cache = get_cache()
+    stats = {}
+    for view_name in view_names:
+        hits = cache.get(f'{KEY_PREFIX}:stats:{view_name}:hit', 0)
+        misses = cache.get(f'{KEY_PREFIX}:stats:{view_name}:miss', 0)
+        total = hits + misses
+        stats[view_name] = {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else None}
+    return stats
+
+
+def parse_last_modified(header):
+    """
+    Converts a Last-Modified header back into an aware datetime, or None.
+    """
+    timestamp = parse_http_date_safe(header) if header else None
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc) if timestamp is not None else None
+
+
+def _scope(user):
+    """
+    Returns the (role, version scope) a user's reads are cached under, or None.
+    """
+    if user.is_staff:
+        return 'admin', GLOBAL_SCOPE
+    elif hasattr(user, 'doctor'):
+        return 'doctor', f'doctor:{user.doctor.id}'
+    return None
+
+
+def _fingerprint(request, view_kwargs):
+    params = sorted((key, tuple(values)) for key, values in request.GET.lists())
+    return hashlib.md5(
+        repr((request.get_host(), sorted(view_kwargs.items()), params)).encode('utf-8'),
+        usedforsecurity=False,
+    ).hexdigest()
+
+
+def response_key(request, view_name, view_kwargs):
+    """
+    Returns the cache key for a read, or None if the requester's reads are not cached.
+    """
+    scope = _scope(request.user)
+    if scope is None:
+        return None
+    role, scope = scope
+    return f'{KEY_PREFIX}:response:{view_name}:{role}:{scope}:{get_version(scope)}:{_fingerprint(request, view_kwargs)}'
+
+
+def cached_response(view_name):
+    """
+    Decorator serving a view's GET handler from the versioned appointment cache.
+
+    Only successful responses carrying `data` and read from the primary are
+    stored: a lagging replica could hand back data older than the version the
+    response would be stored under. Clients pinned to the primary after a write
+    skip the lookup, so they never get an entry cached before their write became
+    visible. The stored ETag and Last-Modified values are replayed on hits, so
+    conditional requests are still answered with 304 without touching the
+    database.
+
+    Args:
+        view_name: The name responses and statistics are recorded under.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = response_key(request, view_name, kwargs)
+            if key is None:
+                return handler(view, request, *args, **kwargs)
+
+            cache = get_cache()
+            entry = None if is_pinned() else cache.get(key)
+            if entry is not None:
+                record(view_name, 'hit')
+                not_modified = not_modified_response(request, etag=entry['etag'], last_modified=entry['last_modified'])
+                if not_modified is not None:
+                    return not_modified
+                response = Response(entry['data'], status=entry['status'])
+                return set_validators(response, etag=entry['etag'], last_modified=entry['last_modified'])
+
+            record(view_name, 'miss')
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200 and hasattr(response, 'data') and not reads_from_replica():
+                cache.set(key, {
+                    'data': response.data,
+                    'status': response.status_code,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': parse_last_modified(response.headers.get('Last-Modified')),
+                }, get_timeout())
+            return response
+        return wrapper
+    return decorator
+
+
+async def _arecord(view_name, outcome):
+    cache = get_cache()
+    key = f'{KEY_PREFIX}:stats:{view_name}:{outcome}'
+    await cache.aadd(key, 0, timeout=None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, timeout=None)
+
+
+async def aresponse_key(request, view_name, view_kwargs):
+    """
+    Async counterpart of `response_key`.
+    """
+    scope = _scope(request.user)
+    if scope is None:
+        return None
+    role, scope = scope
+    version = await get_cache().aget(version_key(scope), 0)
+    return f'{KEY_PREFIX}:response:{view_name}:{role}:{scope}:{version}:{_fingerprint(request, view_kwargs)}'
+
+
+def acached_response(view_name):
+    """
+    Async counterpart of `cached_response` for the native async views.
+
+    Keys and entries are shared with `cached_response`, so sync and async views
+    serve each other's cached responses. `response_class` builds responses from
+    cached data; handlers must return responses carrying a `data` attribute.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(view, request, *args, **kwargs):
+            key = await aresponse_key(request, view_name, kwargs)
+            if key is None:
+                return await handler(view, request, *args, **kwargs)
+
+            cache = get_cache()
+            entry = None if is_pinned() else await cache.aget(key)
+            if entry is not None:
+                await _arecord(view_name, 'hit')
+                not_modified = not_modified_response(request, etag=entry['etag'], last_modified=entry['last_modified'])
+                if not_modified is not None:
+                    return not_modified
+                response = view.response_class(entry['data'], status=entry['status'])
+                return set_validators(response, etag=entry['etag'], last_modified=entry['last_modified'])
+
+            await _arecord(view_name, 'miss')
+            response = await handler(view, request, *args, **kwargs)
+            if response.status_code == 200 and hasattr(response, 'data') and not reads_from_replica():
+                await cache.aset(key, {
+                    'data': response.data,
+                    'status': response.status_code,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': parse_last_modified(response.headers.get('Last-Modified')),
+                }, get_timeout())
+            return response
+        return wrapper
+    return decorator
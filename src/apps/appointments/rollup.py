@@ -0,0 +1,119 @@
+"""
+Helpers for maintaining the DailyAppointmentCount rollup table.
+
+Every change to the rollup is expressed as a Counter mapping a
+(date, doctor_id, is_completed) key to a signed delta, so single-row signal
+handlers and set-based operations share the same write path.
+"""
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Appointment, ArchivedAppointment, DailyAppointmentCount
+
+
+def rollup_key(doctor_id, scheduled_at, is_completed):
+    """
+    Returns the rollup key an appointment with the given values is counted under.
+    """
+    if timezone.is_naive(scheduled_at):
+        scheduled_at = timezone.make_aware(scheduled_at)
+    return (timezone.localdate(scheduled_at), doctor_id, is_completed)
+
+
+def apply_deltas(deltas):
+    """
+    Applies signed count deltas to the rollup table.
+
+    Existing rows are adjusted with a single `UPDATE ... SET count = count + n`
+    so concurrent writers never lose increments; missing rows are inserted for
+    positive deltas, and an insert that loses a race with another writer falls
+    back to the update. Negative deltas only ever update: a missing row has
+    nothing to decrement, e.g. when the doctor's rows were just deleted along
+    with the doctor, and inserting one would reference the deleted doctor.
+
+    Args:
+        deltas: A mapping of rollup keys to signed integer deltas.
+    """
+    with transaction.atomic():
+        for (date, doctor_id, is_completed), delta in deltas.items():
+            if not delta:
+                continue
+            rows = DailyAppointmentCount.objects.filter(date=date, doctor_id=doctor_id, is_completed=is_completed)
+            if rows.update(count=F('count') + delta) or delta < 0:
+                continue
+            try:
+                with transaction.atomic():
+                    DailyAppointmentCount.objects.create(
+                        date=date, doctor_id=doctor_id, is_completed=is_completed, count=delta
+                    )
+            except IntegrityError:
+                rows.update(count=F('count') + delta)
+
+
+def compute_counts(queryset=None):
+    """
+    Aggregates appointments into rollup keys straight from the appointment tables.
+
+    Args:
+        queryset: Optional Appointment or ArchivedAppointment queryset to aggregate;
+            defaults to all appointments, archived ones included.
+
+    Returns:
+        Counter: Appointment counts keyed by rollup key.
+    """
+    if queryset is None:
+        return compute_counts(Appointment.objects.all()) + compute_counts(ArchivedAppointment.objects.all())
+    rows = queryset.annotate(date=TruncDate('scheduled_at')) \
+        .values('date', 'doctor_id', 'is_completed') \
+        .annotate(count=Count('id')) \
+        .order_by()
+    return Counter({(row['date'], row['doctor_id'], row['is_completed']): row['count'] for row in rows})
+
+
+def stored_counts():
+    """
+    Returns the non-zero counts currently stored in the rollup table, keyed by rollup key.
+    """
+    rows = DailyAppointmentCount.objects.filter(count__gt=0).values_list('date', 'doctor_id', 'is_completed', 'count')
+    return Counter({(date, doctor_id, is_completed): count for date, doctor_id, is_completed, count in rows})
+
+
+def find_mismatches():
+    """
+    Compares the rollup table against a fresh aggregation of the appointment tables.
+
+    Returns:
+        dict: Mismatching rollup keys mapped to (stored, actual) count pairs.
+    """
+    actual = compute_counts()
+    stored = stored_counts()
+    return {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in set(actual) | set(stored)
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+
+def rebuild(batch_size=1000):
+    """
+    Replaces the contents of the rollup table with a fresh aggregation of the appointment tables.
+
+    Args:
+        batch_size: The number of rollup rows inserted per statement.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    counts = compute_counts()
+    with transaction.atomic():
+        DailyAppointmentCount.objects.all().delete()
+        DailyAppointmentCount.objects.bulk_create(
+            [
+                DailyAppointmentCount(date=date, doctor_id=doctor_id, is_completed=is_completed, count=count)
+                for (date, doctor_id, is_completed), count in counts.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(counts)
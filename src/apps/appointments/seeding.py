@@ -0,0 +1,213 @@
+"""
+Synthetic data generation for load testing and benchmarks.
+
+Rows are inserted with `bulk_create` in batches, and every generated user
+shares one password hash computed up front, so seeding a large database costs
+one hashing round instead of one per user. Appointments follow a few simple
+but realistic distributions:
+
+- a small share of doctors and patients account for most appointments
+  (weights proportional to 1 / rank),
+- appointments start on a 15-minute grid, on weekdays, inside the working
+  hours of `APPOINTMENT_WORKING_HOURS`, and never overlap for a doctor,
+- durations are mostly 15-30 minutes, and past appointments are mostly
+  completed while future ones are pending.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import accumulate
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from apps.users import search
+from apps.users.models import Doctor, Patient, SearchToken, User
+from . import availability, response_cache, rollup
+from .models import Appointment
+
+SPECIALIZATIONS = (
+    ('General Practice', 30), ('Pediatrics', 12), ('Cardiology', 8), ('Dermatology', 8),
+    ('Orthopedics', 7), ('Gynecology', 7), ('Psychiatry', 6), ('Neurology', 5),
+    ('Ophthalmology', 5), ('Oncology', 4), ('Endocrinology', 4), ('Urology', 4),
+)
+DURATIONS = ((15, 35), (30, 45), (45, 12), (60, 8))
+SLOT_MINUTES = 15
+COMPLETED_PAST_RATIO = 0.9
+
+
+@dataclass
+class SeedResult:
+    """
+    Rows created by `seed`.
+
+    Attributes:
+        admins: The created staff users.
+        doctors: The created Doctor profiles.
+        patients: The created Patient profiles.
+        appointments: The number of created appointments.
+        password: The plain-text password shared by every created user.
+    """
+    admins: list
+    doctors: list
+    patients: list
+    appointments: int
+    password: str
+
+
+def rank_weights(count):
+    """
+    Returns Zipf-like weights (1 / rank) for `count` items.
+    """
+    return [1 / rank for rank in range(1, count + 1)]
+
+
+def schedule_grid(start, end):
+    """
+    Returns every slot start between two dates, on weekdays within working hours.
+
+    Args:
+        start: The first day (date).
+        end: The last day (date), inclusive.
+
+    Returns:
+        list: Aware datetimes on the `SLOT_MINUTES` grid.
+    """
+    opening, closing = availability.working_hours()
+    tz = timezone.get_current_timezone()
+    slots = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            moment = datetime.combine(day, opening, tzinfo=tz)
+            day_end = datetime.combine(day, closing, tzinfo=tz)
+            while moment < day_end:
+                slots.append(moment)
+                moment += timedelta(minutes=SLOT_MINUTES)
+        day += timedelta(days=1)
+    return slots
+
+
+def create_users(prefix, role, count, password_hash, batch_size, **fields):
+    return User.objects.bulk_create(
+        [
+            User(
+                username=f'{prefix}-{role}-{i}', email=f'{prefix}-{role}-{i}@example.com',
+                first_name=role.capitalize(), last_name=str(i), password=password_hash, **fields
+            )
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+
+
+def seed(doctors=50, patients=1000, appointments=20000, admins=1, days_back=180, days_ahead=30,
+         prefix='seed', password='seed-password', batch_size=1000, rng=None, stdout=None):
+    """
+    Generates users, doctors, patients and appointments.
+
+    Bulk writes bypass the model signals, so the new profiles are added to the
+    search index in bulk, and the daily rollup is rebuilt and the response
+    cache invalidated once at the end instead of row by row.
+
+    Args:
+        doctors: Number of doctors to create.
+        patients: Number of patients to create.
+        appointments: Number of appointments to create. Capped by the number of
+            free slots in the date range.
+        admins: Number of staff users to create.
+        days_back: How many days before today the schedule starts.
+        days_ahead: How many days after today the schedule ends.
+        prefix: Prefix of every generated username.
+        password: Password shared by every generated user.
+        batch_size: Rows inserted per statement.
+        rng: A `random.Random` instance, for reproducible data.
+        stdout: Optional stream progress messages are written to.
+
+    Returns:
+        SeedResult: The created rows.
+    """
+    rng = rng or random.Random()
+    log = stdout.write if stdout is not None else (lambda message: None)
+    password_hash = make_password(password)
+
+    admin_users = create_users(prefix, 'admin', admins, password_hash, batch_size, is_staff=True, is_superuser=True)
+    doctor_users = create_users(prefix, 'doctor', doctors, password_hash, batch_size, is_doctor=True)
+    patient_users = create_users(prefix, 'patient', patients, password_hash, batch_size, is_patient=True)
+    log(f"Created {len(admin_users) + len(doctor_users) + len(patient_users)} users")
+
+    names, weights = zip(*SPECIALIZATIONS)
+    doctor_rows = Doctor.objects.bulk_create(
+        [Doctor(user=user, specialization=rng.choices(names, weights)[0]) for user in doctor_users],
+        batch_size=batch_size,
+    )
+    today = timezone.localdate()
+    patient_rows = Patient.objects.bulk_create(
+        [
+            Patient(
+                user=user,
+                date_of_birth=today - timedelta(days=rng.randint(365, 90 * 365)),
+                gender=rng.choice('MF'),
+            )
+            for user in patient_users
+        ],
+        batch_size=batch_size,
+    )
+    search.index_profiles(SearchToken.DOCTOR, doctor_rows, batch_size)
+    search.index_profiles(SearchToken.PATIENT, patient_rows, batch_size)
+    log(f"Created {len(doctor_rows)} doctors and {len(patient_rows)} patients")
+
+    created = 0
+    if doctor_rows and patient_rows and appointments:
+        created = seed_appointments(
+            doctor_rows, patient_rows, appointments, today - timedelta(days=days_back),
+            today + timedelta(days=days_ahead), batch_size, rng,
+        )
+        rollup.rebuild()
+        response_cache.bump_versions([doctor.id for doctor in doctor_rows])
+    log(f"Created {created} appointments")
+
+    return SeedResult(admin_users, doctor_rows, patient_rows, created, password)
+
+
+def seed_appointments(doctors, patients, count, start, end, batch_size, rng):
+    """
+    Bulk-inserts non-overlapping appointments and returns how many were created.
+    """
+    grid = schedule_grid(start, end)
+    if not grid:
+        return 0
+
+    # Split the total between doctors by popularity, then give each doctor a
+    # random sorted subset of the grid so their appointments never overlap.
+    per_doctor = [0] * len(doctors)
+    for index in rng.choices(range(len(doctors)), rank_weights(len(doctors)), k=count):
+        per_doctor[index] += 1
+
+    patient_weights = list(accumulate(rank_weights(len(patients))))
+    durations, duration_weights = zip(*DURATIONS)
+    now = timezone.now()
+    batch = []
+    created = 0
+    for doctor, booked in zip(doctors, per_doctor):
+        starts = sorted(rng.sample(grid, min(booked, len(grid))))
+        for position, scheduled_at in enumerate(starts):
+            duration = rng.choices(durations, duration_weights)[0]
+            if position + 1 < len(starts):
+                gap = (starts[position + 1] - scheduled_at).total_seconds() // 60
+                duration = int(min(duration, gap))
+            appointment = Appointment(
+                doctor=doctor,
+                patient=rng.choices(patients, cum_weights=patient_weights)[0],
+                scheduled_at=scheduled_at,
+                duration_minutes=duration,
+                is_completed=scheduled_at < now and rng.random() < COMPLETED_PAST_RATIO,
+            )
+            appointment.set_ends_at()
+            batch.append(appointment)
+            if len(batch) >= batch_size:
+                Appointment.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+    if batch:
+        Appointment.objects.bulk_create(batch)
+        created += len(batch)
+    return created
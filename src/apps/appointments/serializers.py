@@ -1,14 +1,20 @@
 # serializers.py
+from datetime import datetime, time, timedelta
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import serializers
+from apps.users.models import Doctor
+from ..fieldsets import SparseFieldsetMixin
 from .models import Appointment
+from . import availability
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Appointment model.
     
     This serializer is used for creating, retrieving, updating, and validating
     appointment data. It ensures that only admin users (staff members) can 
-    create or modify appointments.
+    create or modify appointments. Pass `fields` to render only some fields.
     
     Attributes:
         Meta: Defines the model and fields to be serialized.
@@ -16,10 +22,13 @@ class AppointmentSerializer(serializers.ModelSerializer):
     Methods:
         validate: Validates the request to ensure only admin users can create 
                   or modify appointments.
+        create: Saves a new appointment once its time slot is confirmed free.
+        update: Saves changes once the (possibly moved) time slot is confirmed free.
     """
     class Meta:
         model = Appointment
-        fields = ['id', 'patient', 'doctor', 'scheduled_at', 'is_completed']
+        fields = ['id', 'patient', 'doctor', 'scheduled_at', 'duration_minutes', 'ends_at', 'is_completed']
+        read_only_fields = ['ends_at']
 
     def validate(self, data):
         """
@@ -38,3 +47,122 @@ class AppointmentSerializer(serializers.ModelSerializer):
         if not request.user.is_staff:
             raise serializers.ValidationError("Only admin users can create or modify appointments.")
         return data
+
+    def create(self, validated_data):
+        """
+        Creates the appointment under the doctor's booking lock, raising
+        AppointmentConflict if it would overlap another of the doctor's appointments.
+        """
+        start = validated_data['scheduled_at']
+        duration = validated_data.get('duration_minutes', Appointment.DEFAULT_DURATION_MINUTES)
+        return availability.book(
+            lambda: super(AppointmentSerializer, self).create(validated_data),
+            validated_data['doctor'].id, start, start + timedelta(minutes=duration),
+        )
+
+    def update(self, instance, validated_data):
+        """
+        Updates the appointment, re-checking for conflicts under the doctor's
+        booking lock when the doctor or the time slot changes.
+        """
+        doctor = validated_data.get('doctor', instance.doctor)
+        start = validated_data.get('scheduled_at', instance.scheduled_at)
+        duration = validated_data.get('duration_minutes', instance.duration_minutes)
+        if (doctor.id, start, duration) == (instance.doctor_id, instance.scheduled_at, instance.duration_minutes):
+            return super().update(instance, validated_data)
+        return availability.book(
+            lambda: super(AppointmentSerializer, self).update(instance, validated_data),
+            doctor.id, start, start + timedelta(minutes=duration), exclude_id=instance.id,
+        )
+
+
+class AppointmentBulkItemSerializer(serializers.Serializer):
+    """
+    Serializer for one item of a bulk appointment payload.
+
+    Only the shape of each item is validated here. Patient and doctor ids are
+    plain integers so that their existence can be checked for the whole batch
+    with one query per model instead of one query per item.
+    """
+    patient = serializers.IntegerField(min_value=1)
+    doctor = serializers.IntegerField(min_value=1)
+    scheduled_at = serializers.DateTimeField()
+    duration_minutes = serializers.IntegerField(
+        min_value=1, max_value=Appointment.MAX_DURATION_MINUTES, default=Appointment.DEFAULT_DURATION_MINUTES
+    )
+    is_completed = serializers.BooleanField(default=False)
+
+
+class AppointmentBulkStatusSerializer(serializers.Serializer):
+    """
+    Serializer for a bulk status update: the new status and the appointments it
+    applies to.
+
+    Appointments are selected by `ids` or by any combination of `doctor`, a day
+    range (`start_date`/`end_date`, inclusive, local days) and `scheduled_before`.
+    At least one selector is required, so an empty body never updates every
+    appointment.
+    """
+    SELECTORS = ('ids', 'doctor', 'start_date', 'end_date', 'scheduled_before')
+
+    is_completed = serializers.BooleanField()
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    doctor = serializers.IntegerField(min_value=1, required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    scheduled_before = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if not any(name in data for name in self.SELECTORS):
+            raise serializers.ValidationError(
+                f"Select the appointments with at least one of: {', '.join(self.SELECTORS)}."
+            )
+        return data
+
+    def filters(self):
+        """
+        Returns the Q object selecting the appointments to update.
+        """
+        data = self.validated_data
+        filters = Q()
+        if 'ids' in data:
+            filters &= Q(id__in=data['ids'])
+        if 'doctor' in data:
+            filters &= Q(doctor_id=data['doctor'])
+        if 'start_date' in data:
+            filters &= Q(scheduled_at__gte=timezone.make_aware(datetime.combine(data['start_date'], time.min)))
+        if 'end_date' in data:
+            end = datetime.combine(data['end_date'] + timedelta(days=1), time.min)
+            filters &= Q(scheduled_at__lt=timezone.make_aware(end))
+        if 'scheduled_before' in data:
+            filters &= Q(scheduled_at__lt=data['scheduled_before'])
+        return filters
+
+
+class TimelineDoctorSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the doctor shown with each appointment of a patient's timeline.
+    """
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Doctor
+        fields = ['id', 'name', 'specialization']
+
+    def get_name(self, doctor):
+        return doctor.user.get_full_name() or doctor.user.username
+
+
+class AppointmentTimelineSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for a patient's timeline entries.
+
+    Expects `doctor__user` to be loaded with `select_related`, so a page is
+    serialized without further queries.
+    """
+    doctor = TimelineDoctorSerializer(read_only=True)
+
+    class Meta:
+        model = Appointment
+        fields = ['id', 'scheduled_at', 'ends_at', 'duration_minutes', 'is_completed', 'doctor']
+        read_only_fields = fields
@@ -0,0 +1,94 @@
+from collections import Counter
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from apps.users.models import Doctor, User
+from .models import Appointment, ArchivedAppointment
+from . import response_cache, rollup
+
+# Fields embedded in appointment rows by `?expand=` (see rows.EXPANSIONS)
+EXPANDED_USER_FIELDS = ('username', 'first_name', 'last_name')
+EXPANDED_DOCTOR_FIELDS = ('specialization',)
+
+
+@receiver(pre_save, sender=Appointment)
+def remember_rollup_key(sender, instance, raw=False, **kwargs):
+    """
+    Records the rollup key the stored row is currently counted under, so that
+    updates moving `scheduled_at`, `doctor` or `is_completed` can be re-counted.
+    """
+    instance._rollup_previous_key = None
+    if raw or instance.pk is None:
+        return
+    previous = Appointment.objects.filter(pk=instance.pk) \
+        .values_list('doctor_id', 'scheduled_at', 'is_completed') \
+        .first()
+    if previous:
+        instance._rollup_previous_key = rollup.rollup_key(*previous)
+
+
+@receiver(post_save, sender=Appointment)
+def count_saved_appointment(sender, instance, raw=False, **kwargs):
+    """
+    Moves the appointment's count from its previous rollup key to its current one
+    and invalidates cached reads for the affected doctors.
+    """
+    if raw:
+        return
+    deltas = Counter()
+    previous_key = getattr(instance, '_rollup_previous_key', None)
+    if previous_key:
+        deltas[previous_key] -= 1
+    deltas[rollup.rollup_key(instance.doctor_id, instance.scheduled_at, instance.is_completed)] += 1
+    rollup.apply_deltas(deltas)
+    response_cache.bump_versions([instance.doctor_id, previous_key[1] if previous_key else None])
+
+
+@receiver(post_delete, sender=Appointment)
+@receiver(post_delete, sender=ArchivedAppointment)
+def uncount_deleted_appointment(sender, instance, **kwargs):
+    """
+    Removes a deleted appointment, live or archived (e.g. with its patient), from
+    the rollup and invalidates cached reads.
+    """
+    rollup.apply_deltas(Counter({
+        rollup.rollup_key(instance.doctor_id, instance.scheduled_at, instance.is_completed): -1,
+    }))
+    response_cache.bump_versions([instance.doctor_id])
+
+
+def _expanded_fields_changed(sender, instance, fields, update_fields):
+    if instance.pk is None:
+        return False
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return False
+    previous = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    return previous is not None and previous != tuple(getattr(instance, field) for field in fields)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Doctor)
+def detect_expanded_name_changes(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Flags saves that change a name or specialization embedded by `?expand=`.
+    """
+    fields = EXPANDED_USER_FIELDS if sender is User else EXPANDED_DOCTOR_FIELDS
+    instance._expanded_fields_changed = not raw and _expanded_fields_changed(sender, instance, fields, update_fields)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Doctor)
+def invalidate_expanded_names(sender, instance, **kwargs):
+    """
+    Invalidates cached reads that may embed the changed names: those of the
+    doctor themself, or of every doctor the patient has appointments with.
+    """
+    if not getattr(instance, '_expanded_fields_changed', False):
+        return
+    if sender is Doctor:
+        doctor_ids = [instance.pk]
+    else:
+        doctor_ids = list(Doctor.objects.filter(user_id=instance.pk).values_list('id', flat=True)) + list(
+            Appointment.objects.filter(patient__user_id=instance.pk)
+            .order_by().values_list('doctor_id', flat=True).distinct()
+        )
+    response_cache.bump_versions(doctor_ids)
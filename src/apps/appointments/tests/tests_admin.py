@@ -0,0 +1,108 @@
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..models import Appointment
+from apps.paginators import EstimatedCountPaginator
+from apps.users.models import User, Doctor, Patient
+
+
+class AppointmentAdminQueryTests(TestCase):
+    """
+    Test suite checking that the appointment changelist runs in a bounded number of queries.
+    """
+
+    def setUp(self):
+        """
+        Log in as a superuser and prepare helpers for creating doctors and patients.
+        """
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.client.force_login(self.admin_user)
+        self.url = reverse('admin:appointments_appointment_changelist')
+
+    def create_appointments(self, count):
+        """
+        Create `count` appointments, each with its own doctor and patient.
+        """
+        for i in range(count):
+            suffix = Appointment.objects.count()
+            doctor = Doctor.objects.create(
+                user=User.objects.create_user(username=f'doctor{suffix}', password='x', is_doctor=True),
+                specialization='Cardiology'
+            )
+            patient = Patient.objects.create(
+                user=User.objects.create_user(username=f'patient{suffix}', password='x', is_patient=True),
+                date_of_birth='1990-01-01',
+                gender='F'
+            )
+            Appointment.objects.create(doctor=doctor, patient=patient, scheduled_at=timezone.now() + timedelta(hours=i))
+
+    def count_changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        """
+        Ensure rendering more appointments does not add per-row queries.
+        """
+        self.create_appointments(2)
+        few = self.count_changelist_queries()
+        self.create_appointments(10)
+        many = self.count_changelist_queries()
+        self.assertEqual(few, many)
+
+    def test_add_form_uses_autocomplete_widgets(self):
+        """
+        Ensure the add form does not render every doctor and patient as select options.
+        """
+        self.create_appointments(3)
+        response = self.client.get(reverse('admin:appointments_appointment_add'))
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'doctor0 - Cardiology')
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """
+    Test suite for the estimated-count paginator used by the admin changelists.
+    """
+
+    def setUp(self):
+        for i in range(3):
+            User.objects.create_user(username=f'user{i}', password='x')
+
+    def test_small_tables_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by('id'), 2)
+        self.assertEqual(paginator.count, 3)
+
+    def test_large_unfiltered_tables_use_estimate(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE "{User._meta.db_table}"')
+        paginator = EstimatedCountPaginator(User.objects.order_by('id'), 2)
+        paginator.exact_count_threshold = 0
+        with CaptureQueriesContext(connection) as queries:
+            estimate = paginator.count
+        self.assertEqual(estimate, 3)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+    def test_deleted_rows_do_not_inflate_the_count(self):
+        """
+        Ensure rows removed by archiving are not counted when no statistics are available.
+        """
+        for i in range(3, 10):
+            User.objects.create_user(username=f'user{i}', password='x')
+        User.objects.filter(username__in=[f'user{i}' for i in range(1, 9)]).delete()
+        paginator = EstimatedCountPaginator(User.objects.order_by('id'), 2)
+        paginator.exact_count_threshold = 0
+        self.assertEqual(paginator.count, 2)
+        self.assertEqual(paginator.num_pages, 1)
+
+    def test_filtered_querysets_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(User.objects.filter(username='user1').order_by('id'), 2)
+        paginator.exact_count_threshold = 0
+        self.assertEqual(paginator.count, 1)
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..models import Appointment, AppointmentReminder, ArchivedAppointment
+from .. import archive, rollup
+from apps.users.models import User, Doctor, Patient
+
+OLD = datetime(2020, 3, 2, 10, tzinfo=dt_timezone.utc)
+CUTOFF = datetime(2021, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class AppointmentArchiveTests(APITestCase):
+    """
+    Test suite for moving old completed appointments to ArchivedAppointment.
+    """
+
+    def setUp(self):
+        """
+        Create old completed, old pending and recent completed appointments, and
+        authenticate as an admin.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor_user = User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True)
+        self.doctor = Doctor.objects.create(user=self.doctor_user, specialization='Cardiology')
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='other', password='otherpassword', is_doctor=True),
+            specialization='Neurology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.old = [
+            Appointment.objects.create(
+                doctor=self.doctor if i % 2 else self.other_doctor, patient=self.patient,
+                scheduled_at=OLD + timedelta(days=i), is_completed=True
+            )
+            for i in range(5)
+        ]
+        self.old_pending = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=OLD, duration_minutes=15
+        )
+        self.recent = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=CUTOFF + timedelta(days=1), is_completed=True
+        )
+        self.client = APIClient()
+        self.authenticate(self.admin_user)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(user).access_token))
+
+    def archive(self, *args):
+        call_command('archive_appointments', '--before', '2021-01-01', *args, stdout=StringIO())
+
+    def test_moves_only_old_completed_appointments(self):
+        counts = rollup.stored_counts()
+        self.archive()
+        self.assertCountEqual(
+            ArchivedAppointment.objects.values_list('id', flat=True), [a.id for a in self.old]
+        )
+        self.assertCountEqual(
+            Appointment.objects.values_list('id', flat=True), [self.old_pending.id, self.recent.id]
+        )
+        archived = ArchivedAppointment.objects.get(id=self.old[0].id)
+        self.assertEqual(
+            (archived.scheduled_at, archived.ends_at, archived.created_at, archived.updated_at),
+            (self.old[0].scheduled_at, self.old[0].ends_at, self.old[0].created_at, self.old[0].updated_at)
+        )
+        # Archived appointments stay counted.
+        self.assertEqual(rollup.stored_counts(), counts)
+        self.assertEqual(rollup.find_mismatches(), {})
+
+    def test_reminders_of_archived_appointments_are_dropped(self):
+        AppointmentReminder.objects.create(
+            appointment=self.old[0], channel='email', lead_minutes=120, next_attempt_at=OLD,
+            status=AppointmentReminder.SENT
+        )
+        AppointmentReminder.objects.create(
+            appointment=self.recent, channel='email', lead_minutes=120, next_attempt_at=OLD
+        )
+        self.archive()
+        self.assertEqual(list(AppointmentReminder.objects.values_list('appointment_id', flat=True)), [self.recent.id])
+
+    def test_batches_resume_where_they_stopped(self):
+        self.archive('--batch-size', '2', '--max-batches', '1')
+        self.assertCountEqual(
+            ArchivedAppointment.objects.values_list('id', flat=True), [a.id for a in self.old[:2]]
+        )
+        self.archive('--batch-size', '2')
+        self.assertEqual(ArchivedAppointment.objects.count(), 5)
+        self.assertEqual(archive.archive_batch(CUTOFF), 0)
+
+    def test_dry_run_moves_nothing(self):
+        out = StringIO()
+        call_command('archive_appointments', '--before', '2021-01-01', '--dry-run', stdout=out)
+        self.assertIn(': 5', out.getvalue())
+        self.assertFalse(ArchivedAppointment.objects.exists())
+
+    def test_detail_falls_through_to_archive(self):
+        appointment = self.old[1]
+        expected = self.client.get(reverse('appointment-detail', args=[appointment.id])).data
+        self.archive()
+        response = self.client.get(reverse('appointment-detail', args=[appointment.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, expected)
+
+        self.authenticate(self.doctor_user)
+        self.assertEqual(self.client.get(reverse('appointment-detail', args=[appointment.id])).status_code, 200)
+        response = self.client.get(reverse('appointment-detail', args=[self.old[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_archived_appointments_cannot_be_changed_through_the_api(self):
+        self.archive()
+        response = self.client.patch(
+            reverse('appointment-detail', args=[self.old[0].id]), {'is_completed': False}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_only_shows_hot_appointments(self):
+        self.archive()
+        response = self.client.get(reverse('appointment-list'), {'page_size': 100})
+        self.assertCountEqual([row['id'] for row in response.data['results']], [self.old_pending.id, self.recent.id])
+
+    def test_counts_over_old_ranges_include_archive(self):
+        params = {'start_date': '2020-03-01', 'end_date': '2020-03-10'}
+        expected = {
+            granularity: self.client.get(reverse('appointment-count'), {**params, 'granularity': granularity}).data
+            for granularity in ('hour', 'day')
+        }
+        self.archive()
+        for granularity in ('hour', 'day'):
+            response = self.client.get(reverse('appointment-count'), {**params, 'granularity': granularity})
+            self.assertEqual(response.data, expected[granularity])
+            self.assertEqual(response.data['total']['total'], 6)
+
+    def test_deleting_a_patient_uncounts_archived_appointments(self):
+        self.archive()
+        self.patient.delete()
+        self.assertFalse(ArchivedAppointment.objects.exists())
+        self.assertEqual(rollup.stored_counts(), {})
+
+    def test_raw_delete_covers_every_relation(self):
+        """
+        Ensure archive_batch clears every relation to Appointment before its raw delete.
+
+        Adding a model that points at Appointment needs archive_batch to handle
+        its rows before this list is extended.
+        """
+        relations = {
+            (relation.related_model._meta.label, relation.field.name)
+            for relation in Appointment._meta.get_fields(include_hidden=True)
+            if relation.auto_created and not relation.concrete
+        }
+        self.assertEqual(relations, {('appointments.AppointmentReminder', 'appointment')})
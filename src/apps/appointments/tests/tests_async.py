@@ -0,0 +1,175 @@
+import json
+from datetime import datetime, timezone as dt_timezone
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from .. import archive
+from ..async_views import AsyncAppointmentCountView, AsyncAppointmentDetailView, AsyncAppointmentListView
+from ..models import Appointment
+from apps.users.async_views import AsyncProfileView
+from apps.users.models import User, Doctor, Patient
+from apps.users.tokens import add_role_claims
+
+
+class AsyncViewTests(APITestCase):
+    """
+    Test suite checking that the native async views answer like the DRF views.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, two doctors with appointments and a patient.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor_user = User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True)
+        self.doctor = Doctor.objects.create(user=self.doctor_user, specialization='Cardiology')
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='other', password='otherpassword', is_doctor=True),
+            specialization='Neurology'
+        )
+        self.patient_user = User.objects.create_user(username='patient', password='patientpassword', is_patient=True)
+        self.patient = Patient.objects.create(user=self.patient_user, date_of_birth='1990-01-01', gender='M')
+        self.appointments = [
+            Appointment.objects.create(
+                doctor=self.doctor if i % 2 else self.other_doctor, patient=self.patient,
+                scheduled_at=datetime(2030, 1, 1 + i, 10, tzinfo=dt_timezone.utc)
+            )
+            for i in range(4)
+        ]
+        self.factory = AsyncRequestFactory()
+
+    def token(self, user, claims=True):
+        refresh = RefreshToken.for_user(user)
+        if claims:
+            add_role_claims(refresh, user)
+        return str(refresh.access_token)
+
+    def call_async(self, view_class, path, user=None, method='get', data=None, **kwargs):
+        headers = {'authorization': 'Bearer ' + self.token(user)} if user else {}
+        if method == 'get':
+            request = self.factory.get(path, data, headers=headers)
+        else:
+            request = self.factory.post(path, json.dumps(data), content_type='application/json', headers=headers)
+        response = async_to_sync(view_class.as_view())(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def call_sync(self, path, user, data=None):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token(user))
+        return client.get(path, data)
+
+    def test_list_matches_sync_view(self):
+        url = reverse('appointment-list')
+        params = {'page': 2, 'page_size': 1}
+        expected = self.call_sync(url, self.admin_user, params)
+        response = self.call_async(AsyncAppointmentListView, url, self.admin_user, data=params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        self.assertEqual(response.headers['ETag'], expected.headers['ETag'])
+
+    def test_list_fields_and_expand_match_sync_view(self):
+        url = reverse('appointment-list')
+        params = {'fields': 'id,doctor,scheduled_at', 'expand': 'doctor'}
+        expected = self.call_sync(url, self.admin_user, params)
+        response = self.call_async(AsyncAppointmentListView, url, self.admin_user, data=params)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        self.assertEqual(response.headers['ETag'], expected.headers['ETag'])
+        response = self.call_async(AsyncAppointmentListView, url, self.admin_user, data={'fields': 'notes'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_only_shows_doctors_their_appointments(self):
+        response = self.call_async(AsyncAppointmentListView, reverse('appointment-list'), self.doctor_user)
+        ids = [row['id'] for row in json.loads(response.content)['results']]
+        self.assertCountEqual(ids, [a.id for a in self.appointments if a.doctor_id == self.doctor.id])
+
+    def test_list_invalid_page(self):
+        response = self.call_async(AsyncAppointmentListView, reverse('appointment-list'), self.admin_user, data={'page': 9})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_cursor_pagination_is_delegated(self):
+        url = reverse('appointment-list')
+        response = self.call_async(AsyncAppointmentListView, url, self.admin_user, data={'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', json.loads(response.content))
+
+    def test_list_post_is_delegated(self):
+        payload = {
+            'patient': self.patient.id, 'doctor': self.doctor.id,
+            'scheduled_at': '2031-01-01T10:00:00Z', 'is_completed': False,
+        }
+        url = reverse('appointment-list')
+        response = self.call_async(AsyncAppointmentListView, url, self.admin_user, method='post', data=payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.call_async(AsyncAppointmentListView, url, self.admin_user, method='post', data=payload)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_detail_and_conditional_get(self):
+        appointment = self.appointments[1]
+        url = reverse('appointment-detail', args=[appointment.id])
+        response = self.call_async(AsyncAppointmentDetailView, url, self.doctor_user, id=appointment.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['id'], appointment.id)
+
+        headers = {'authorization': 'Bearer ' + self.token(self.doctor_user), 'if-none-match': response.headers['ETag']}
+        request = self.factory.get(url, headers=headers)
+        response = async_to_sync(AsyncAppointmentDetailView.as_view())(request, id=appointment.id)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_hides_other_doctors_appointments(self):
+        appointment = self.appointments[0]
+        url = reverse('appointment-detail', args=[appointment.id])
+        response = self.call_async(AsyncAppointmentDetailView, url, self.doctor_user, id=appointment.id)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_archived_detail_matches_sync_view(self):
+        appointment = self.appointments[1]
+        Appointment.objects.filter(id=appointment.id).update(is_completed=True)
+        archive.archive_batch(cutoff=datetime(2031, 1, 1, tzinfo=dt_timezone.utc))
+        url = reverse('appointment-detail', args=[appointment.id])
+        expected = self.call_sync(url, self.doctor_user)
+        response = self.call_async(AsyncAppointmentDetailView, url, self.doctor_user, id=appointment.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        self.assertEqual(response.headers['ETag'], expected.headers['ETag'])
+
+    def test_count_matches_sync_view(self):
+        url = reverse('appointment-count')
+        params = {'start_date': '2030-01-01', 'end_date': '2030-01-31'}
+        expected = self.call_sync(url, self.admin_user, params)
+        response = self.call_async(AsyncAppointmentCountView, url, self.admin_user, data=params)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+        params.update(granularity='week', group_by='doctor,status')
+        expected = self.call_sync(url, self.admin_user, params)
+        response = self.call_async(AsyncAppointmentCountView, url, self.admin_user, data=params)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+        response = self.call_async(AsyncAppointmentCountView, url, self.admin_user)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_permissions_and_authentication(self):
+        url = reverse('appointment-count')
+        response = self.call_async(AsyncAppointmentCountView, url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('WWW-Authenticate', response.headers)
+        response = self.call_async(AsyncAppointmentCountView, url, self.patient_user)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_profile_with_and_without_role_claims(self):
+        url = reverse('profile')
+        response = self.call_async(AsyncProfileView, url, self.doctor_user)
+        self.assertEqual(json.loads(response.content)['username'], 'doctor')
+
+        request = self.factory.get(url, headers={'authorization': 'Bearer ' + self.token(self.doctor_user, claims=False)})
+        response = async_to_sync(AsyncProfileView.as_view())(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['username'], 'doctor')
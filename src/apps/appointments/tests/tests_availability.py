@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..availability import IntervalSet, free_slots
+from ..models import Appointment
+from apps.users.models import User, Doctor, Patient
+
+
+def at(hour, minute=0, day=1):
+    return datetime(2030, 1, day, hour, minute, tzinfo=dt_timezone.utc)
+
+
+class IntervalSetTests(TestCase):
+    """
+    Test suite for the merged interval structure behind availability checks.
+    """
+
+    def test_overlapping_and_touching_intervals_are_merged(self):
+        intervals = IntervalSet([(at(9), at(10)), (at(9, 30), at(11)), (at(11), at(12)), (at(14), at(15))])
+        self.assertEqual(list(intervals), [(at(9), at(12)), (at(14), at(15))])
+
+    def test_overlapping_is_half_open(self):
+        intervals = IntervalSet([(at(9), at(10))])
+        self.assertIsNone(intervals.overlapping(at(10), at(11)))
+        self.assertIsNone(intervals.overlapping(at(8), at(9)))
+        self.assertEqual(intervals.overlapping(at(9, 59), at(11)), (at(9), at(10)))
+
+    @override_settings(APPOINTMENT_WORKING_HOURS=(at(9).time(), at(12).time()))
+    def test_free_slots_skip_busy_time_and_closed_hours(self):
+        busy = IntervalSet([(at(9, 30), at(10, 15))])
+        slots = free_slots(busy, at(8), at(12, day=2), timedelta(minutes=30), limit=6)
+        self.assertEqual([start for start, _ in slots], [
+            at(9), at(10, 30), at(11), at(11, 30), at(9, day=2), at(9, 30, day=2),
+        ])
+
+
+@override_settings(APPOINTMENT_WORKING_HOURS=(at(9).time(), at(17).time()))
+class AppointmentAvailabilityTests(APITestCase):
+    """
+    Test suite for double-booking prevention and the free-slot endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, two doctors and a patient, and book the first doctor from 10:00 to 11:00.
+        """
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True),
+            specialization='Cardiology'
+        )
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='other', password='otherpassword', is_doctor=True),
+            specialization='Neurology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='F'
+        )
+        self.booked = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=at(10), duration_minutes=60
+        )
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.admin_user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def create(self, doctor, scheduled_at, duration_minutes=30):
+        return self.client.post(reverse('appointment-list'), {
+            'doctor': doctor.id,
+            'patient': self.patient.id,
+            'scheduled_at': scheduled_at.isoformat(),
+            'duration_minutes': duration_minutes,
+        }, format='json')
+
+    def test_overlapping_create_is_rejected(self):
+        response = self.create(self.doctor, at(10, 30))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_adjacent_and_other_doctor_creates_are_allowed(self):
+        self.assertEqual(self.create(self.doctor, at(11)).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.create(self.doctor, at(9, 30)).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.create(self.other_doctor, at(10, 30)).status_code, status.HTTP_201_CREATED)
+
+    def test_update_moving_into_booked_time_is_rejected(self):
+        appointment = Appointment.objects.create(doctor=self.doctor, patient=self.patient, scheduled_at=at(14))
+        response = self.client.patch(
+            reverse('appointment-detail', args=[appointment.id]), {'scheduled_at': at(10, 45).isoformat()}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.patch(
+            reverse('appointment-detail', args=[self.booked.id]), {'duration_minutes': 90}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_create_rejects_conflicts_within_batch_and_with_existing(self):
+        items = [
+            {'doctor': self.doctor.id, 'patient': self.patient.id, 'scheduled_at': at(10, 30).isoformat()},
+            {'doctor': self.doctor.id, 'patient': self.patient.id, 'scheduled_at': at(12).isoformat()},
+            {'doctor': self.doctor.id, 'patient': self.patient.id, 'scheduled_at': at(12, 15).isoformat()},
+        ]
+        response = self.client.post(reverse('appointment-list'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 1)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 2])
+
+    def test_free_slots_for_several_doctors(self):
+        response = self.client.get(reverse('appointment-availability'), {
+            'doctors': f'{self.doctor.id},{self.other_doctor.id}',
+            'start': at(9).isoformat(),
+            'slot_minutes': 60,
+            'limit': 3,
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slots = {row['doctor']: [slot['start'] for slot in row['slots']] for row in response.data['results']}
+        self.assertEqual(slots[self.doctor.id], [at(9), at(11), at(12)])
+        self.assertEqual(slots[self.other_doctor.id], [at(9), at(10), at(11)])
+
+    def test_free_slots_validates_parameters(self):
+        response = self.client.get(reverse('appointment-availability'), {'doctors': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('appointment-availability'), {'doctors': self.doctor.id, 'end': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
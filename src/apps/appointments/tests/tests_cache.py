@@ -0,0 +1,139 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..models import Appointment
+from apps.users.models import User, Doctor, Patient
+
+
+class AppointmentResponseCacheTests(APITestCase):
+    """
+    Test suite for the versioned appointment response cache.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, two doctors with one appointment each, and a patient.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor_user = User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True)
+        self.doctor = Doctor.objects.create(user=self.doctor_user, specialization='Cardiology')
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='other', password='otherpassword', is_doctor=True),
+            specialization='Neurology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=timezone.now()
+        )
+        self.other_appointment = Appointment.objects.create(
+            doctor=self.other_doctor, patient=self.patient, scheduled_at=timezone.now()
+        )
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def stats(self):
+        self.authenticate(self.admin_user)
+        return self.client.get(reverse('appointment-cache-stats')).data
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.authenticate(self.admin_user)
+        url = reverse('appointment-detail', args=[self.appointment.id])
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertFalse(any('appointments_appointment' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(self.stats()['appointment-detail'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_cached_hit_answers_conditional_request(self):
+        self.authenticate(self.admin_user)
+        url = reverse('appointment-detail', args=[self.appointment.id])
+        etag = self.client.get(url).headers['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_save_invalidates_admin_and_own_doctor_reads(self):
+        url = reverse('appointment-list')
+        self.authenticate(self.doctor_user)
+        self.client.get(url)
+        self.authenticate(self.admin_user)
+        self.client.get(url)
+
+        self.appointment.is_completed = True
+        self.appointment.save()
+
+        response = self.client.get(url)
+        self.assertTrue(any(row['is_completed'] for row in response.data['results']))
+        self.authenticate(self.doctor_user)
+        response = self.client.get(url)
+        self.assertTrue(response.data['results'][0]['is_completed'])
+        self.assertEqual(self.stats()['appointment-list']['hits'], 0)
+
+    def test_other_doctors_changes_keep_doctor_cache(self):
+        self.authenticate(self.doctor_user)
+        self.client.get(reverse('appointment-list'))
+        self.other_appointment.scheduled_at += timedelta(hours=1)
+        self.other_appointment.save()
+        self.client.get(reverse('appointment-list'))
+        self.assertEqual(self.stats()['appointment-list']['hits'], 1)
+
+    def test_name_changes_invalidate_expanded_reads(self):
+        url = reverse('appointment-list')
+        params = {'expand': 'doctor,patient'}
+        self.authenticate(self.doctor_user)
+        self.client.get(url, params)
+        self.authenticate(self.admin_user)
+        self.client.get(url, params)
+
+        self.doctor.specialization = 'Oncology'
+        self.doctor.save()
+        self.patient.user.first_name = 'Pat'
+        self.patient.user.save()
+
+        rows = {row['id']: row for row in self.client.get(url, params).data['results']}
+        self.assertEqual(rows[self.appointment.id]['doctor']['specialization'], 'Oncology')
+        self.assertEqual(rows[self.other_appointment.id]['patient']['name'], 'Pat')
+        self.authenticate(self.doctor_user)
+        self.assertEqual(self.client.get(url, params).data['results'][0]['patient']['name'], 'Pat')
+        self.assertEqual(self.stats()['appointment-list']['hits'], 0)
+
+    def test_unrelated_user_saves_keep_cache(self):
+        self.authenticate(self.doctor_user)
+        self.client.get(reverse('appointment-list'))
+        self.other_doctor.user.email = 'other@example.com'
+        self.other_doctor.user.save()
+        self.doctor_user.last_login = timezone.now()
+        self.doctor_user.save(update_fields=['last_login'])
+        self.client.get(reverse('appointment-list'))
+        self.assertEqual(self.stats()['appointment-list']['hits'], 1)
+
+    def test_delete_invalidates_count(self):
+        self.authenticate(self.admin_user)
+        today = timezone.localdate().isoformat()
+        params = {'start_date': today, 'end_date': today}
+        self.assertEqual(self.client.get(reverse('appointment-count'), params).data[0]['appointment_count'], 2)
+        self.other_appointment.delete()
+        self.assertEqual(self.client.get(reverse('appointment-count'), params).data[0]['appointment_count'], 1)
+
+    def test_query_params_are_normalized(self):
+        self.authenticate(self.admin_user)
+        self.client.get(reverse('appointment-list') + '?page=1&page_size=2')
+        self.client.get(reverse('appointment-list') + '?page_size=2&page=1')
+        self.assertEqual(self.stats()['appointment-list']['hits'], 1)
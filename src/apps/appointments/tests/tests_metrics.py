@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..models import Appointment
+from apps.metrics import Histogram, registry
+from apps.users.models import User, Doctor, Patient
+
+
+class MetricsTests(APITestCase):
+    """
+    Test suite for the metrics middleware and the Prometheus endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create an admin and one appointment, and start from an empty registry.
+        """
+        cache.clear()
+        registry.reset()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True),
+            specialization='Cardiology'
+        )
+        patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.appointment = Appointment.objects.create(doctor=doctor, patient=patient, scheduled_at=timezone.now())
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.admin_user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def test_requests_are_recorded_per_route(self):
+        self.client.get(reverse('appointment-detail', args=[self.appointment.id]))
+        self.client.get(reverse('appointment-detail', args=[self.appointment.id + 100]))
+        body = self.client.get(reverse('metrics')).content.decode()
+
+        route = 'route="appointments/appointments/<int:id>/"'
+        self.assertIn(f'healthsync_http_requests_total{{{route},method="GET",status="200"}} 1', body)
+        self.assertIn(f'healthsync_http_requests_total{{{route},method="GET",status="404"}} 1', body)
+        self.assertIn(f'healthsync_http_request_duration_seconds_count{{{route},method="GET"}} 2', body)
+        self.assertIn(f'healthsync_db_queries_per_request_bucket{{{route},method="GET",le="+Inf"}} 2', body)
+        self.assertIn('# TYPE healthsync_http_response_size_bytes histogram', body)
+
+    def test_queries_are_counted(self):
+        self.client.get(reverse('appointment-detail', args=[self.appointment.id]))
+        key = ('appointments/appointments/<int:id>/', 'GET')
+        self.assertGreaterEqual(registry.queries[key].sum, 1)
+        self.assertGreater(registry.query_seconds[key], 0)
+
+    def test_metrics_require_admin_or_token(self):
+        client = APIClient()
+        self.assertEqual(client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        doctor = User.objects.get(username='doctor')
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(doctor).access_token))
+        self.assertEqual(client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with override_settings(METRICS_TOKEN='scrape-secret'):
+            client.credentials(HTTP_AUTHORIZATION='Bearer scrape-secret')
+            response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.cumulative()), [('0.1', 2), ('1.0', 3), ('+Inf', 4)])
+        self.assertEqual(histogram.count, 4)
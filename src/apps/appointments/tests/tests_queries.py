@@ -0,0 +1,106 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from django.db.models import Exists, OuterRef
+from ..models import Appointment, AppointmentReminder, ArchivedAppointment
+from .. import archive
+from apps.users.models import User, Doctor, Patient
+
+
+class AppointmentQueryPlanTests(TestCase):
+    """
+    Test suite checking that appointment range queries are served by the composite indexes.
+    """
+
+    def setUp(self):
+        """
+        Create a doctor, a patient and a handful of appointments to plan queries against.
+        """
+        doctor_user = User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True)
+        patient_user = User.objects.create_user(username='patient', password='patientpassword', is_patient=True)
+        self.doctor = Doctor.objects.create(user=doctor_user, specialization='Cardiology')
+        self.patient = Patient.objects.create(user=patient_user, date_of_birth='1990-01-01', gender='F')
+
+        now = timezone.now()
+        appointments = [
+            Appointment(doctor=self.doctor, patient=self.patient, scheduled_at=now - timedelta(days=i))
+            for i in range(10)
+        ]
+        for appointment in appointments:
+            appointment.set_ends_at()
+        Appointment.objects.bulk_create(appointments)
+        self.range_start = now - timedelta(days=5)
+        self.range_end = now
+
+    def assertUsesIndex(self, queryset, index_name):
+        """
+        Assert that the database query plan for the queryset mentions the given index.
+        """
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_doctor_range_uses_doctor_index(self):
+        """
+        Ensure per-doctor range filters use the (doctor, scheduled_at) index.
+        """
+        queryset = Appointment.objects.filter(
+            doctor=self.doctor, scheduled_at__gte=self.range_start, scheduled_at__lt=self.range_end
+        )
+        self.assertUsesIndex(queryset, 'appt_doctor_sched_idx')
+
+    def test_status_range_uses_completed_index(self):
+        """
+        Ensure status range filters use the (is_completed, scheduled_at) index.
+        Uses the same is_completed__in form as AppointmentCountView.
+        """
+        queryset = Appointment.objects.filter(
+            is_completed__in=[True], scheduled_at__gte=self.range_start, scheduled_at__lt=self.range_end
+        )
+        self.assertUsesIndex(queryset, 'appt_completed_sched_idx')
+
+    def test_patient_range_uses_patient_index(self):
+        """
+        Ensure per-patient range filters use the (patient, scheduled_at) index.
+        """
+        queryset = Appointment.objects.filter(
+            patient=self.patient, scheduled_at__gte=self.range_start, scheduled_at__lt=self.range_end
+        )
+        self.assertUsesIndex(queryset, 'appt_patient_sched_idx')
+
+    def test_patient_timeline_uses_patient_index(self):
+        """
+        Ensure the timeline's keyset page query is served by the (patient, scheduled_at) index.
+        """
+        now = timezone.now()
+        queryset = Appointment.objects.filter(patient=self.patient, scheduled_at__lt=now, ends_at__lte=now) \
+            .select_related('doctor__user').order_by('-scheduled_at', '-id')
+        self.assertUsesIndex(queryset, 'appt_patient_sched_idx')
+
+    def test_archive_batch_uses_keyset_index(self):
+        """
+        Ensure archival batches walk the (scheduled_at, id) index, oldest first.
+        """
+        queryset = archive.archivable(self.range_end).order_by('scheduled_at', 'id')
+        self.assertUsesIndex(queryset, 'appt_sched_id_idx')
+
+    def test_archived_hourly_counts_use_archive_index(self):
+        """
+        Ensure hourly counts over old ranges find archived rows through an index.
+        """
+        queryset = ArchivedAppointment.objects.filter(scheduled_at__gte=self.range_start, scheduled_at__lt=self.range_end)
+        self.assertUsesIndex(queryset, 'archived_sched_idx')
+
+    def test_reminder_scan_uses_indexes(self):
+        """
+        Ensure a reminder scan batch walks an index on scheduled_at and probes the
+        reminder constraint's index instead of scanning reminders.
+        """
+        now = timezone.now()
+        queued = AppointmentReminder.objects.filter(appointment=OuterRef('pk'), channel='email', lead_minutes=120)
+        queryset = Appointment.objects.filter(
+            is_completed=False, scheduled_at__gt=now, scheduled_at__lte=now + timedelta(hours=2)
+        ).exclude(Exists(queued)).order_by('scheduled_at', 'id')
+        plan = queryset.explain()
+        self.assertRegex(plan, 'appt_completed_sched_idx|appt_sched_id_idx')
+        self.assertIn('INDEX', plan.split('SUBQUERY', 1)[1])
+        self.assertIn('appointment_id=? AND channel=? AND lead_minutes=?', plan)
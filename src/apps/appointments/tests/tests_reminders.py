@@ -0,0 +1,188 @@
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ..models import Appointment, AppointmentReminder
+from ..notifications import EmailBackend, RateLimited, get_backend
+from ..reminders import Dispatcher, schedule_reminders
+from apps.users.models import User, Doctor, Patient
+
+BACKENDS = 'apps.appointments.tests.tests_reminders'
+
+
+class RecordingBackend(EmailBackend):
+    """
+    Records messages; `fail_with` makes every send raise it, `gate` makes sends wait for it.
+    """
+    sent = []
+    fail_with = None
+    gate = None
+
+    def send(self, message):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail_with is not None:
+            raise self.fail_with
+        self.sent.append(message)
+
+
+@override_settings(
+    REMINDER_LEAD_MINUTES=(24 * 60, 2 * 60),
+    REMINDER_BACKENDS={'email': 'apps.appointments.notifications.EmailBackend'},
+    REMINDER_RATE_LIMITS={},
+    REMINDER_WORKERS=2,
+    REMINDER_MAX_ATTEMPTS=2,
+    REMINDER_RETRY_SECONDS=60,
+)
+class AppointmentReminderTests(TestCase):
+    """
+    Test suite for queuing and delivering appointment reminders.
+    """
+
+    def setUp(self):
+        """
+        Create a doctor, a patient and appointments inside, outside and across
+        the reminder windows.
+        """
+        get_backend.cache_clear()
+        self.addCleanup(get_backend.cache_clear)
+        RecordingBackend.sent, RecordingBackend.fail_with, RecordingBackend.gate = [], None, None
+
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(
+                username='doctor', password='doctorpassword', is_doctor=True, last_name='House'
+            ),
+            specialization='Cardiology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(
+                username='patient', password='patientpassword', is_patient=True, first_name='Pat',
+                email='pat@example.com', phone_number='+15550100'
+            ),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        now = timezone.now()
+        self.soon = self.create_appointment(now + timedelta(hours=1))
+        self.later = [self.create_appointment(now + timedelta(hours=5 + i)) for i in range(3)]
+        self.create_appointment(now + timedelta(hours=30))
+        self.create_appointment(now + timedelta(hours=3), is_completed=True)
+        self.create_appointment(now - timedelta(hours=3))
+
+    def create_appointment(self, scheduled_at, **kwargs):
+        return Appointment.objects.create(doctor=self.doctor, patient=self.patient, scheduled_at=scheduled_at, **kwargs)
+
+    def queued(self):
+        return set(AppointmentReminder.objects.values_list('appointment_id', 'lead_minutes'))
+
+    def drain(self, **kwargs):
+        dispatcher = Dispatcher(**kwargs)
+        dispatcher.drain()
+        dispatcher.close()
+        return dispatcher
+
+    def test_scan_queues_the_nearest_reminder_once(self):
+        self.assertEqual(schedule_reminders(batch_size=2), 4)
+        self.assertEqual(self.queued(), {(self.soon.id, 120)} | {(a.id, 1440) for a in self.later})
+        self.assertEqual(schedule_reminders(), 0)
+
+        # Three and a half hours on, the first of them is due its two-hour reminder.
+        self.assertEqual(schedule_reminders(now=timezone.now() + timedelta(hours=3.5)), 1)
+        self.assertIn((self.later[0].id, 120), self.queued())
+
+    def test_email_reminders_are_sent_once(self):
+        schedule_reminders()
+        dispatcher = self.drain()
+        self.assertEqual(dispatcher.stats['sent'], 4)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(mail.outbox[0].to, ['pat@example.com'])
+        self.assertIn("Hi Pat, this is a reminder of your appointment with Dr. House", mail.outbox[0].body)
+        self.assertFalse(AppointmentReminder.objects.exclude(status=AppointmentReminder.SENT).exists())
+
+        schedule_reminders()
+        self.drain()
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_sms_file_stand_in(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sms.log')
+            backends = {'sms': 'apps.appointments.notifications.FileSMSBackend'}
+            with override_settings(REMINDER_BACKENDS=backends, REMINDER_SMS_FILE_PATH=path):
+                get_backend.cache_clear()
+                schedule_reminders()
+                self.drain()
+                with open(path) as f:
+                    lines = f.read().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('+15550100\tHi Pat'))
+
+    def test_reminders_no_longer_deliverable_are_settled(self):
+        schedule_reminders()
+        User.objects.filter(id=self.patient.user_id).update(email='')
+        Appointment.objects.filter(id=self.soon.id).update(is_completed=True)
+        moved = self.later[0]
+        moved.scheduled_at += timedelta(days=3)
+        moved.save()
+        dispatcher = self.drain()
+        self.assertEqual(dispatcher.stats['skipped'], 3)
+        self.assertEqual(
+            dict(AppointmentReminder.objects.values_list('appointment_id', 'last_error')),
+            {
+                self.soon.id: "Appointment completed or already started.",
+                self.later[1].id: "No email address.",
+                self.later[2].id: "No email address.",
+            }
+        )
+
+    @override_settings(REMINDER_BACKENDS={'email': f'{BACKENDS}.RecordingBackend'})
+    def test_failures_are_retried_later_then_given_up(self):
+        RecordingBackend.fail_with = ConnectionError("SMTP down")
+        schedule_reminders()
+        dispatcher = self.drain()
+        self.assertEqual(dispatcher.stats['retried'], 4)
+        reminder = AppointmentReminder.objects.get(appointment=self.soon)
+        self.assertEqual((reminder.status, reminder.attempts), (AppointmentReminder.PENDING, 1))
+        self.assertEqual(reminder.last_error, "ConnectionError: SMTP down")
+        self.assertGreater(reminder.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        AppointmentReminder.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(self.drain().stats['failed'], 4)
+        self.assertEqual(AppointmentReminder.objects.get(id=reminder.id).status, AppointmentReminder.FAILED)
+
+    @override_settings(REMINDER_BACKENDS={'email': f'{BACKENDS}.RecordingBackend'})
+    def test_provider_rate_limits_reschedule_without_an_attempt(self):
+        RecordingBackend.fail_with = RateLimited(retry_after=30)
+        schedule_reminders()
+        dispatcher = self.drain()
+        self.assertEqual(dispatcher.stats['rate_limited'], 4)
+        self.assertGreater(dispatcher.buckets['email'].wait_time(), 20)
+        reminder = AppointmentReminder.objects.get(appointment=self.soon)
+        self.assertEqual((reminder.status, reminder.attempts), (AppointmentReminder.PENDING, 0))
+
+    @override_settings(REMINDER_BACKENDS={'email': f'{BACKENDS}.RecordingBackend'}, REMINDER_RATE_LIMITS={'email': 2})
+    def test_dispatch_respects_rate_limit_and_never_waits_on_delivery(self):
+        RecordingBackend.gate = threading.Event()
+        schedule_reminders()
+        dispatcher = Dispatcher()
+        self.addCleanup(dispatcher.close)
+        self.addCleanup(RecordingBackend.gate.set)
+        # Deliveries are blocked, yet dispatch returns having submitted the two allowed by the rate limit.
+        self.assertEqual(dispatcher.dispatch(), 2)
+        self.assertEqual(dispatcher.dispatch(), 0)
+        self.assertEqual(len(dispatcher.in_flight), 2)
+        self.assertEqual(AppointmentReminder.objects.filter(status=AppointmentReminder.SENDING).count(), 2)
+
+        RecordingBackend.gate.set()
+        dispatcher.drain()
+        self.assertEqual(len(RecordingBackend.sent), 4)
+
+    def test_command_sends_due_reminders(self):
+        out = StringIO()
+        call_command('send_reminders', stdout=out)
+        self.assertIn("Queued 4 reminders; sent 4", out.getvalue())
+        self.assertEqual(len(mail.outbox), 4)
@@ -0,0 +1,138 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..models import Appointment
+from .. import response_cache
+from apps.db_router import PrimaryReplicaRouter, ReplicaPool, replica_pool
+from apps.shared_cache import get_shared_cache
+from apps.users.models import User, Doctor, Patient
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(APITransactionTestCase):
+    """
+    Test suite for routing eligible reads to a replica and pinning writers to the primary.
+
+    The replica is a second connection to the test database, so writes must be
+    committed for it to see them; hence a transaction test case.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        """
+        Create an admin, a doctor, a patient and one appointment, authenticate
+        as the admin and start with a fresh replica pool and cache.
+        """
+        replica_pool.reset()
+        self.addCleanup(replica_pool.reset)
+        cache.clear()
+        get_shared_cache().clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True),
+            specialization='Cardiology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=timezone.now()
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(self.admin_user).access_token))
+
+    def queries(self, method, url, data=None):
+        """
+        Performs a request and returns (response, primary queries, replica queries).
+        """
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, data, format='json')
+        # The probe query is not an application read.
+        replica_reads = [q for q in replica.captured_queries if 'django_migrations' not in q['sql']]
+        return response, len(primary.captured_queries), len(replica_reads)
+
+    def test_eligible_reads_use_the_replica(self):
+        response, primary, replica = self.queries('get', reverse('appointment-detail', args=[self.appointment.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_other_routes_read_from_the_primary(self):
+        response, primary, replica = self.queries('get', reverse('appointment-availability'), {
+            'doctors': str(self.doctor.id)
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_writer_is_pinned_to_the_primary(self):
+        response, _, replica = self.queries('post', reverse('appointment-list'), {
+            'doctor': self.doctor.id, 'patient': self.patient.id,
+            'scheduled_at': (timezone.now() + timezone.timedelta(days=3)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replica, 0)
+
+        _, primary, replica = self.queries('get', reverse('appointment-list'))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        # Other clients still read from the replica.
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(self.doctor.user).access_token))
+        _, primary, replica = self.queries('get', reverse('appointment-list'))
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_replica_reads_are_not_cached(self):
+        url = reverse('appointment-detail', args=[self.appointment.id])
+        for _ in range(2):
+            _, primary, replica = self.queries('get', url)
+            self.assertEqual(primary, 0)
+            self.assertGreater(replica, 0)
+        self.assertEqual(response_cache.get_stats(['appointment-detail'])['appointment-detail']['hits'], 0)
+
+    def test_pinned_clients_skip_cached_responses(self):
+        url = reverse('appointment-list')
+        self.queries('post', url, {
+            'doctor': self.doctor.id, 'patient': self.patient.id,
+            'scheduled_at': (timezone.now() + timezone.timedelta(days=3)).isoformat(),
+        })
+        # What another client would have cached from a replica that had not caught up yet.
+        request = APIRequestFactory().get(url)
+        request.user = self.admin_user
+        stale = {'data': {'stale': True}, 'status': 200, 'etag': None, 'last_modified': None}
+        cache.set(response_cache.response_key(request, 'appointment-list', {}), stale)
+
+        response, primary, replica = self.queries('get', url)
+        self.assertEqual(response.data['count'], 2)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_unhealthy_replica_falls_back_to_the_primary(self):
+        url = reverse('appointment-detail', args=[self.appointment.id])
+        with mock.patch.object(ReplicaPool, 'probe', return_value=False) as probe:
+            _, primary, replica = self.queries('get', url)
+            self.queries('get', url)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        # A failed replica is not probed again until the retry delay has passed.
+        self.assertEqual(probe.call_count, 1)
+
+    def test_router_defaults(self):
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(Appointment), 'default')
+        self.assertEqual(router.db_for_write(Appointment), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'appointments'))
+        self.assertTrue(router.allow_migrate('default', 'appointments'))
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from ..models import Appointment, ArchivedAppointment, DailyAppointmentCount
+from .. import archive, rollup
+from apps.users.models import User, Doctor, Patient
+
+
+class DailyAppointmentCountTests(TestCase):
+    """
+    Test suite for keeping the daily appointment rollup in sync with Appointment.
+    """
+
+    def setUp(self):
+        """
+        Create two doctors and a patient to schedule appointments with.
+        """
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True),
+            specialization='Cardiology'
+        )
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='other', password='otherpassword', is_doctor=True),
+            specialization='Neurology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.now = timezone.now()
+
+    def count_for(self, doctor, when, is_completed):
+        """
+        Returns the stored rollup count for a doctor, day and status.
+        """
+        row = DailyAppointmentCount.objects.filter(
+            doctor=doctor, date=timezone.localdate(when), is_completed=is_completed
+        ).first()
+        return row.count if row else 0
+
+    def create_appointment(self, **kwargs):
+        values = {'doctor': self.doctor, 'patient': self.patient, 'scheduled_at': self.now}
+        values.update(kwargs)
+        return Appointment.objects.create(**values)
+
+    def test_create_increments_rollup(self):
+        self.create_appointment()
+        self.create_appointment()
+        self.assertEqual(self.count_for(self.doctor, self.now, False), 2)
+
+    def test_update_moving_scheduled_at_moves_count(self):
+        appointment = self.create_appointment()
+        later = self.now + timedelta(days=3)
+        appointment.scheduled_at = later
+        appointment.save()
+        self.assertEqual(self.count_for(self.doctor, self.now, False), 0)
+        self.assertEqual(self.count_for(self.doctor, later, False), 1)
+
+    def test_update_flipping_status_and_doctor_moves_count(self):
+        appointment = self.create_appointment()
+        appointment.is_completed = True
+        appointment.doctor = self.other_doctor
+        appointment.save()
+        self.assertEqual(self.count_for(self.doctor, self.now, False), 0)
+        self.assertEqual(self.count_for(self.other_doctor, self.now, True), 1)
+
+    def test_unchanged_save_keeps_count(self):
+        appointment = self.create_appointment()
+        appointment.save()
+        self.assertEqual(self.count_for(self.doctor, self.now, False), 1)
+
+    def test_deleting_a_doctor_with_appointments(self):
+        self.create_appointment()
+        self.create_appointment(is_completed=True)
+        archived = self.create_appointment(scheduled_at=self.now - timedelta(days=400), is_completed=True)
+        archive.archive_batch(archive.cutoff(365))
+        self.assertTrue(ArchivedAppointment.objects.filter(id=archived.id).exists())
+
+        self.doctor.user.delete()
+        connection.check_constraints()
+        self.assertFalse(DailyAppointmentCount.objects.filter(doctor_id=self.doctor.id).exists())
+        self.assertEqual(rollup.find_mismatches(), {})
+
+    def test_delete_decrements_rollup(self):
+        appointment = self.create_appointment()
+        self.create_appointment()
+        appointment.delete()
+        self.assertEqual(self.count_for(self.doctor, self.now, False), 1)
+
+    def test_verify_command_detects_and_rebuild_repairs_drift(self):
+        self.create_appointment()
+        self.create_appointment(is_completed=True)
+        # Queryset updates bypass the signal handlers and leave the rollup stale.
+        Appointment.objects.update(is_completed=True)
+        self.assertTrue(rollup.find_mismatches())
+        with self.assertRaises(CommandError):
+            call_command('rebuild_appointment_rollup', '--verify', stdout=StringIO())
+
+        call_command('rebuild_appointment_rollup', stdout=StringIO())
+        self.assertEqual(rollup.find_mismatches(), {})
+        self.assertEqual(self.count_for(self.doctor, self.now, True), 2)
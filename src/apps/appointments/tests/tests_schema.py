@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from apps import api_schema
+
+
+class OpenAPISchemaTests(SimpleTestCase):
+    """
+    Test suite for serving the pre-built OpenAPI schema.
+    """
+
+    def setUp(self):
+        """
+        Point OPENAPI_SCHEMA_DIR at an empty directory and start with an empty schema cache.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(OPENAPI_SCHEMA_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        api_schema.clear_schema_cache()
+        self.addCleanup(api_schema.clear_schema_cache)
+
+    def test_schema_lists_the_api(self):
+        response = self.client.get(reverse('schema-swagger-ui'), {'format': 'openapi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        schema = json.loads(response.content)
+        self.assertIn('/appointments/appointments/list/', schema['paths'])
+        self.assertIn('/profile/', schema['paths'])
+        self.assertIn('ETag', response)
+
+    def test_schema_is_generated_once(self):
+        """
+        Ensure later requests are served from memory, including the yaml and json URLs.
+        """
+        with mock.patch.object(api_schema, 'generate_schema', wraps=api_schema.generate_schema) as generate:
+            first = self.client.get(reverse('schema-redoc'), {'format': 'openapi'})
+            second = self.client.get(reverse('schema-json'))
+            self.client.get(reverse('schema-yaml'))
+            self.client.get(reverse('schema-yaml'))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual([call.args for call in generate.call_args_list], [('json',), ('yaml',)])
+
+    @override_settings(DEBUG=True)
+    def test_debug_regenerates_every_request(self):
+        with mock.patch.object(api_schema, 'generate_schema', wraps=api_schema.generate_schema) as generate:
+            self.client.get(reverse('schema-json'))
+            self.client.get(reverse('schema-json'))
+        self.assertEqual(generate.call_count, 2)
+
+    def test_unchanged_schema_returns_304(self):
+        etag = self.client.get(reverse('schema-json'))['ETag']
+        response = self.client.get(reverse('schema-json'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_prebuilt_file_is_served(self):
+        with open(os.path.join(self.directory, 'openapi.json'), 'wb') as f:
+            f.write(b'{"swagger": "2.0", "paths": {}}')
+        with mock.patch.object(api_schema, 'generate_schema') as generate:
+            response = self.client.get(reverse('schema-swagger-ui'), {'format': 'openapi'})
+        self.assertEqual(response.content, b'{"swagger": "2.0", "paths": {}}')
+        generate.assert_not_called()
+
+    def test_generate_command_writes_the_served_schema(self):
+        call_command('generate_openapi_schema', stdout=StringIO())
+        self.assertEqual(sorted(os.listdir(self.directory)), ['openapi.json', 'openapi.yaml'])
+        with open(os.path.join(self.directory, 'openapi.json'), 'rb') as f:
+            self.assertEqual(f.read(), api_schema.generate_schema('json'))
+
+    def test_ui_pages_render(self):
+        for name in ('schema-swagger-ui', 'schema-redoc'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+
+    def test_ui_pages_do_not_generate_the_schema(self):
+        from drf_yasg.generators import OpenAPISchemaGenerator
+
+        with mock.patch.object(OpenAPISchemaGenerator, 'get_schema') as get_schema:
+            for _ in range(3):
+                for name in ('schema-swagger-ui', 'schema-redoc'):
+                    response = self.client.get(reverse(name))
+                    self.assertEqual(response.status_code, 200)
+                    self.assertContains(response, '<title>HealthSync API</title>')
+        get_schema.assert_not_called()
@@ -0,0 +1,41 @@
+import random
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from .. import rollup
+from ..models import Appointment
+from ..seeding import seed
+from apps.users.models import User
+
+
+class SeedingTests(TestCase):
+    """
+    Test suite for the synthetic data generator.
+    """
+
+    def test_seed_creates_consistent_data(self):
+        result = seed(doctors=5, patients=20, appointments=300, admins=1, rng=random.Random(1))
+        self.assertEqual(len(result.doctors), 5)
+        self.assertEqual(len(result.patients), 20)
+        self.assertEqual(Appointment.objects.count(), result.appointments)
+        self.assertEqual(result.appointments, 300)
+        self.assertEqual(rollup.find_mismatches(), {})
+
+        # All users share one password hash that still authenticates
+        self.assertEqual(User.objects.values('password').distinct().count(), 1)
+        self.assertTrue(User.objects.get(username='seed-doctor-0').check_password(result.password))
+
+    def test_seeded_appointments_never_overlap(self):
+        seed(doctors=3, patients=10, appointments=500, rng=random.Random(2))
+        previous = {}
+        for doctor_id, start, end in Appointment.objects.order_by('doctor_id', 'scheduled_at') \
+                .values_list('doctor_id', 'scheduled_at', 'ends_at'):
+            if doctor_id in previous:
+                self.assertLessEqual(previous[doctor_id], start)
+            previous[doctor_id] = end
+
+    def test_command_refuses_existing_prefix(self):
+        call_command('seed_data', doctors=1, patients=1, appointments=5, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('seed_data', doctors=1, patients=1, appointments=5, stdout=StringIO())
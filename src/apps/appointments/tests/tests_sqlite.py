@@ -0,0 +1,184 @@
+import os
+import tempfile
+import threading
+from django.core.cache import cache
+from django.conf import settings
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..models import Appointment
+from apps.sqlite import WriteQueueTimeout, _write_lock, serialized_writes
+from apps.users.models import User, Doctor, Patient
+
+
+def lock_is_free():
+    """
+    Returns True if another thread can take the write lock right now.
+    """
+    result = []
+
+    def probe():
+        acquired = _write_lock.acquire(blocking=False)
+        if acquired:
+            _write_lock.release()
+        result.append(acquired)
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+class SQLiteTuningTests(SimpleTestCase):
+    """
+    Test suite for the tuned SQLite connection options and the write serializer.
+    """
+
+    def test_tuned_options_apply_pragmas(self):
+        """
+        Ensure a connection opened with SQLITE_TUNED_OPTIONS uses WAL, the busy
+        timeout and the configured pragmas.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper({
+                **settings.DATABASES['default'],
+                'NAME': os.path.join(directory, 'tuned.sqlite3'),
+                'OPTIONS': settings.SQLITE_TUNED_OPTIONS,
+            }, alias='tuned')
+            try:
+                with wrapper.cursor() as cursor:
+                    values = {}
+                    for pragma in ('journal_mode', 'busy_timeout', 'synchronous', 'cache_size', 'temp_store'):
+                        cursor.execute(f'PRAGMA {pragma}')
+                        values[pragma] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+        self.assertEqual(values, {
+            'journal_mode': 'wal',
+            'busy_timeout': 20000,
+            'synchronous': 1,  # NORMAL
+            'cache_size': -64000,
+            'temp_store': 2,  # MEMORY
+        })
+        self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+
+    @override_settings(SQLITE_SERIALIZE_WRITES=False)
+    def test_serialized_writes_is_a_no_op_when_disabled(self):
+        with serialized_writes():
+            self.assertTrue(lock_is_free())
+
+    @override_settings(SQLITE_SERIALIZE_WRITES=True)
+    def test_serialized_writes_holds_the_lock(self):
+        with serialized_writes():
+            self.assertFalse(lock_is_free())
+            with serialized_writes():
+                # Re-entrant within a thread.
+                self.assertFalse(lock_is_free())
+        self.assertTrue(lock_is_free())
+
+    @override_settings(SQLITE_SERIALIZE_WRITES=True)
+    def test_writes_queue_behind_the_holder(self):
+        """
+        Ensure a second writer waits for the first instead of running alongside it.
+        """
+        order = []
+        entered = threading.Event()
+
+        def second():
+            entered.set()
+            with serialized_writes():
+                order.append('second')
+
+        with serialized_writes():
+            thread = threading.Thread(target=second)
+            thread.start()
+            entered.wait()
+            thread.join(timeout=0.1)
+            order.append('first')
+        thread.join()
+        self.assertEqual(order, ['first', 'second'])
+
+    @override_settings(SQLITE_SERIALIZE_WRITES=True, SQLITE_WRITE_LOCK_TIMEOUT=0.01)
+    def test_timeout_raises(self):
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with serialized_writes():
+                held.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait()
+        try:
+            with self.assertRaises(WriteQueueTimeout):
+                with serialized_writes():
+                    pass
+        finally:
+            release.set()
+            thread.join()
+
+
+@override_settings(SQLITE_SERIALIZE_WRITES=True, SQLITE_WRITE_LOCK_TIMEOUT=0.01)
+class SerializedAppointmentWriteTests(APITestCase):
+    """
+    Test suite for appointment writes going through the write serializer.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, a doctor and a patient, and authenticate as the admin.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True),
+            specialization='Cardiology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(self.admin_user).access_token))
+        self.payload = {
+            'doctor': self.doctor.id,
+            'patient': self.patient.id,
+            'scheduled_at': timezone.now().isoformat(),
+        }
+
+    def test_create_succeeds_when_the_lock_is_free(self):
+        response = self.client.post(reverse('appointment-list'), self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(lock_is_free())
+
+    def test_create_returns_503_when_the_queue_times_out(self):
+        """
+        Ensure a write that cannot get the lock in time is rejected with 503 and not saved.
+        """
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with serialized_writes():
+                held.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait()
+        try:
+            response = self.client.post(reverse('appointment-list'), self.payload, format='json')
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(Appointment.objects.exists())
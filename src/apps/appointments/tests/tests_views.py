@@ -1,10 +1,21 @@
+import gzip
+import json
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework_simplejwt.tokens import RefreshToken
-from ..models import Appointment
+from ..models import Appointment, DailyAppointmentCount
+from ..pagination import AppointmentCursorPagination
+from ..serializers import AppointmentSerializer
+from .. import rollup
 from apps.users.models import User, Doctor, Patient
 
 
@@ -18,6 +29,7 @@ class AppointmentTests(APITestCase):
         Set up initial test data, including creating users (admin, doctor, patient),
         their profiles (Doctor, Patient), and sample appointments.
         """
+        cache.clear()
         # Create admin user
         self.admin_user = User.objects.create_superuser(
             username='admin', password='adminpassword', email='admin@test.com'
@@ -85,7 +97,7 @@ class AppointmentTests(APITestCase):
         self.authenticate(self.admin_user)
         response = self.client.get(reverse('appointment-list'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_doctor_can_list_their_appointments(self):
         """
@@ -94,7 +106,7 @@ class AppointmentTests(APITestCase):
         self.authenticate(self.doctor_user)
         response = self.client.get(reverse('appointment-list'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_admin_can_create_appointment(self):
         """
@@ -162,4 +174,741 @@ class AppointmentTests(APITestCase):
             'start_date': start_date, 'end_date': end_date, 'status': 'completed'
         })
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
\ No newline at end of file
+        self.assertEqual(len(response.data), 1)
+
+class AppointmentCursorPaginationTests(APITestCase):
+    """
+    Test suite for keyset (cursor) pagination of the appointment list.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, a doctor, a patient and a dozen appointments, two of
+        which share a scheduled_at value to exercise the id tie-breaker.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True),
+            specialization='Cardiology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.start = timezone.now()
+        for i in range(12):
+            Appointment.objects.create(
+                doctor=self.doctor, patient=self.patient, scheduled_at=self.start + timedelta(hours=min(i, 10))
+            )
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.admin_user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def collect_pages(self, url, params=None):
+        ids, response = [], self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return ids, response
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_pages_cover_all_rows_in_order(self):
+        """
+        Ensure walking the cursor returns every appointment once, ordered by (scheduled_at, id).
+        """
+        ids, _ = self.collect_pages(reverse('appointment-list'), {'pagination': 'cursor'})
+        expected = list(Appointment.objects.order_by('scheduled_at', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_cursor_page_skips_count_query(self):
+        """
+        Ensure cursor pages are fetched without a COUNT(*) query.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('appointment-list'), {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+    def test_cursor_is_stable_under_inserts(self):
+        """
+        Ensure rows inserted before the cursor position do not shift later pages.
+        """
+        first = self.client.get(reverse('appointment-list'), {'pagination': 'cursor'})
+        Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=self.start - timedelta(days=1)
+        )
+        ids, _ = self.collect_pages(first.data['next'])
+        seen = [item['id'] for item in first.data['results']] + ids
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 12)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(reverse('appointment-list'), {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+        self.assertEqual(previous.data['results'], first.data['results'])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(AppointmentCursorPagination, 'max_page_size', 4):
+            response = self.client.get(reverse('appointment-list'), {'pagination': 'cursor', 'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 4)
+        response = self.client.get(reverse('appointment-list'), {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(response.data['count'], 12)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse('appointment-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AppointmentBulkCreateTests(APITestCase):
+    """
+    Test suite for creating appointments from a list payload.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, a doctor and a patient, and authenticate as the admin.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor_user = User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True)
+        self.doctor = Doctor.objects.create(user=self.doctor_user, specialization='Cardiology')
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.client = APIClient()
+        self.authenticate(self.admin_user)
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def payload(self, count, first_slot=0, **overrides):
+        """
+        Build `count` back-to-back 15 minute appointments on the same day.
+        """
+        day_start = datetime(2030, 1, 1, tzinfo=dt_timezone.utc)
+        items = []
+        for i in range(first_slot, first_slot + count):
+            item = {
+                'doctor': self.doctor.id,
+                'patient': self.patient.id,
+                'scheduled_at': (day_start + timedelta(minutes=15 * i)).isoformat(),
+                'duration_minutes': 15,
+            }
+            item.update(overrides)
+            items.append(item)
+        return items
+
+    def test_admin_can_bulk_create_with_bounded_queries(self):
+        """
+        Ensure a list payload is inserted with a constant number of queries
+        (items falling on the same day share one rollup row).
+        """
+        # Warm up so both measured requests find the day's rollup row in place.
+        self.client.post(reverse('appointment-list'), self.payload(1), format='json')
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(reverse('appointment-list'), self.payload(2, first_slot=1), format='json')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(reverse('appointment-list'), self.payload(40, first_slot=3), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 40)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Appointment.objects.count(), 43)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_invalid_items_are_reported_without_aborting_batch(self):
+        items = self.payload(3)
+        items[1]['doctor'] = 999999
+        items[2]['scheduled_at'] = 'not-a-date'
+        response = self.client.post(reverse('appointment-list'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 1)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('doctor', response.data['errors'][0]['errors'])
+
+    def test_atomic_mode_inserts_nothing_on_error(self):
+        items = self.payload(3)
+        items[0]['patient'] = 999999
+        response = self.client.post(reverse('appointment-list') + '?atomic=true', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Appointment.objects.count(), 0)
+
+    def test_bulk_create_updates_rollup(self):
+        self.client.post(reverse('appointment-list'), self.payload(3), format='json')
+        self.assertEqual(DailyAppointmentCount.objects.get(date='2030-01-01').count, 3)
+
+    def test_doctor_cannot_bulk_create(self):
+        self.authenticate(self.doctor_user)
+        response = self.client.post(reverse('appointment-list'), self.payload(2), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Appointment.objects.count(), 0)
+
+
+class AppointmentConditionalGetTests(APITestCase):
+    """
+    Test suite for ETag / Last-Modified handling on appointment reads.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, a doctor, a patient and two appointments, and authenticate as the admin.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True),
+            specialization='Cardiology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=timezone.now()
+        )
+        self.other = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=timezone.now() + timedelta(days=1)
+        )
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.admin_user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def test_detail_returns_304_for_matching_etag(self):
+        url = reverse('appointment-detail', args=[self.appointment.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response.headers)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_etag_changes_after_update(self):
+        url = reverse('appointment-detail', args=[self.appointment.id])
+        etag = self.client.get(url).headers['ETag']
+        self.appointment.is_completed = True
+        self.appointment.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_completed'])
+
+    def test_detail_honours_if_modified_since(self):
+        url = reverse('appointment-detail', args=[self.appointment.id])
+        last_modified = self.client.get(url).headers['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_returns_304_without_loading_full_rows(self):
+        url = reverse('appointment-list')
+        etag = self.client.get(url).headers['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(any('"is_completed"' in query['sql'] for query in queries.captured_queries))
+
+    def test_list_etag_changes_after_delete(self):
+        url = reverse('appointment-list')
+        etag = self.client.get(url).headers['ETag']
+        self.other.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class AppointmentExportTests(APITestCase):
+    """
+    Test suite for the streaming CSV / NDJSON appointment export.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, two doctors with one appointment each, and authenticate as the admin.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor_user = User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True)
+        self.doctor = Doctor.objects.create(user=self.doctor_user, specialization='Cardiology')
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='other', password='otherpassword', is_doctor=True),
+            specialization='Neurology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        self.first = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient,
+            scheduled_at=datetime(2030, 1, 1, 10, tzinfo=dt_timezone.utc), is_completed=True
+        )
+        self.second = Appointment.objects.create(
+            doctor=self.other_doctor, patient=self.patient,
+            scheduled_at=datetime(2030, 1, 2, 10, tzinfo=dt_timezone.utc)
+        )
+        self.client = APIClient()
+        self.authenticate(self.admin_user)
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def export(self, **params):
+        response = self.client.get(reverse('appointment-export'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv_export_streams_all_rows_in_order(self):
+        lines = self.export().decode('utf-8').splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'patient_id', 'doctor_id'])
+        self.assertEqual([int(line.split(',')[0]) for line in lines[1:]], [self.first.id, self.second.id])
+
+    def test_ndjson_export_applies_filters(self):
+        body = self.export(output='ndjson', start_date='2030-01-01', end_date='2030-01-01', status='completed')
+        rows = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.first.id])
+        self.assertTrue(rows[0]['is_completed'])
+
+    def test_gzip_export(self):
+        body = gzip.decompress(self.export(output='ndjson', gzip='true', doctor=self.other_doctor.id))
+        self.assertEqual([json.loads(line)['id'] for line in body.decode('utf-8').splitlines()], [self.second.id])
+
+    def test_doctors_only_export_their_own_appointments(self):
+        self.authenticate(self.doctor_user)
+        rows = self.export(output='ndjson').decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in rows], [self.first.id])
+
+    def test_invalid_parameters_are_rejected(self):
+        url = reverse('appointment-export')
+        self.assertEqual(self.client.get(url, {'output': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'start_date': '01-01-2030'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'status': 'done'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AppointmentCountSeriesTests(APITestCase):
+    """
+    Test suite for the granularity and group_by modes of the appointment count view.
+    """
+
+    def setUp(self):
+        """
+        Create two doctors and appointments spread over two weeks of January 2030.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.cardiologist = Doctor.objects.create(
+            user=User.objects.create_user(username='cardio', password='doctorpassword', is_doctor=True),
+            specialization='Cardiology'
+        )
+        self.neurologist = Doctor.objects.create(
+            user=User.objects.create_user(username='neuro', password='doctorpassword', is_doctor=True),
+            specialization='Neurology'
+        )
+        patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        # 2030-01-07 is a Monday.
+        for doctor, day, hour, completed in (
+            (self.cardiologist, 7, 9, True),
+            (self.cardiologist, 7, 10, False),
+            (self.neurologist, 9, 9, True),
+            (self.cardiologist, 15, 14, False),
+        ):
+            Appointment.objects.create(
+                doctor=doctor, patient=patient, is_completed=completed,
+                scheduled_at=datetime(2030, 1, day, hour, tzinfo=dt_timezone.utc),
+            )
+        self.client.force_authenticate(self.admin_user)
+
+    def get(self, **params):
+        return self.client.get(reverse('appointment-count'), {'start_date': '2030-01-07', 'end_date': '2030-01-20', **params})
+
+    def test_daily_series_are_zero_filled(self):
+        response = self.get(granularity='day')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['buckets']), 14)
+        self.assertEqual(response.data['total']['counts'][:3], [2, 0, 1])
+        self.assertEqual(response.data['total']['total'], 4)
+        self.assertEqual(response.data['series'], [])
+
+    def test_weekly_series_grouped_by_doctor_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(granularity='week', group_by='doctor')
+        self.assertEqual(response.data['buckets'], ['2030-01-07', '2030-01-14'])
+        self.assertEqual(
+            [(s['doctor_username'], s['counts']) for s in response.data['series']],
+            [('cardio', [2, 1]), ('neuro', [1, 0])]
+        )
+        self.assertEqual(len([q for q in queries.captured_queries if 'dailyappointmentcount' in q['sql']]), 1)
+
+    def test_monthly_series_grouped_by_status_and_specialization(self):
+        response = self.get(granularity='month', group_by='specialization,status')
+        self.assertEqual(response.data['buckets'], ['2030-01-01'])
+        self.assertEqual(
+            [(s['specialization'], s['status'], s['total']) for s in response.data['series']],
+            [('Cardiology', 'pending', 2), ('Cardiology', 'completed', 1), ('Neurology', 'completed', 1)]
+        )
+
+    def test_hourly_series_count_appointments(self):
+        response = self.get(granularity='hour', end_date='2030-01-07')
+        self.assertEqual(len(response.data['buckets']), 24)
+        self.assertEqual(response.data['total']['counts'][9:11], [1, 1])
+        self.assertEqual(response.data['total']['total'], 2)
+
+    def test_empty_range_is_not_an_error(self):
+        response = self.client.get(reverse('appointment-count'), {'start_date': '2031-01-01', 'end_date': '2031-01-03'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+        response = self.client.get(reverse('appointment-count'), {
+            'start_date': '2031-01-01', 'end_date': '2031-01-03', 'group_by': 'doctor'
+        })
+        self.assertEqual(response.data['total']['counts'], [0, 0, 0])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get(granularity='year').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get(group_by='patient').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.get(granularity='hour', start_date='2020-01-01')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AppointmentTimelineTests(APITestCase):
+    """
+    Test suite for the patient timeline endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, a doctor, two patients, and for the first patient three
+        past, one in-progress and three upcoming appointments.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(
+                username='doctor', password='doctorpassword', is_doctor=True, first_name='Gregory', last_name='House'
+            ),
+            specialization='Diagnostics'
+        )
+        self.patient_user = User.objects.create_user(username='patient', password='patientpassword', is_patient=True)
+        self.patient = Patient.objects.create(user=self.patient_user, date_of_birth='1990-01-01', gender='F')
+        other = Patient.objects.create(
+            user=User.objects.create_user(username='other', password='otherpassword', is_patient=True),
+            date_of_birth='1991-01-01', gender='M'
+        )
+        now = timezone.now()
+        self.past = [
+            Appointment.objects.create(doctor=self.doctor, patient=self.patient,
+                                       scheduled_at=now - timedelta(days=days), is_completed=True)
+            for days in (3, 2, 1)
+        ]
+        self.in_progress = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=now - timedelta(minutes=10)
+        )
+        self.upcoming = [
+            Appointment.objects.create(doctor=self.doctor, patient=self.patient, scheduled_at=now + timedelta(days=days))
+            for days in (1, 2, 3)
+        ]
+        Appointment.objects.create(doctor=self.doctor, patient=other, scheduled_at=now + timedelta(hours=5))
+        self.client = APIClient()
+        self.authenticate(self.patient_user)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(user).access_token))
+
+    def test_upcoming_lists_own_appointments_soonest_first_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('appointment-timeline'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['direction'], 'upcoming')
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [self.in_progress.id] + [appointment.id for appointment in self.upcoming]
+        )
+        self.assertEqual(
+            response.data['results'][0]['doctor'],
+            {'id': self.doctor.id, 'name': 'Gregory House', 'specialization': 'Diagnostics'}
+        )
+        self.assertEqual(len([q for q in queries.captured_queries if 'appointments_appointment' in q['sql']]), 1)
+
+    def test_past_lists_most_recent_first_with_cursor_pages(self):
+        response = self.client.get(reverse('appointment-timeline'), {'direction': 'past', 'page_size': 2})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.past[2].id, self.past[1].id])
+        self.assertIsNone(response.data['previous'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['id'] for row in response.data['results']], [self.past[0].id])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], [self.past[2].id, self.past[1].id])
+
+    def test_unchanged_page_returns_304(self):
+        etag = self.client.get(reverse('appointment-timeline'))['ETag']
+        response = self.client.get(reverse('appointment-timeline'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.doctor.specialization = 'Nephrology'
+        self.doctor.save()
+        response = self.client.get(reverse('appointment-timeline'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_admin_selects_the_patient(self):
+        self.authenticate(self.admin_user)
+        response = self.client.get(reverse('appointment-timeline'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('appointment-timeline'), {'patient': self.patient.id, 'direction': 'past'})
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_doctors_are_forbidden(self):
+        self.authenticate(self.doctor.user)
+        response = self.client.get(reverse('appointment-timeline'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_direction(self):
+        response = self.client.get(reverse('appointment-timeline'), {'direction': 'sideways'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AppointmentFieldsetTests(APITestCase):
+    """
+    Test suite for `?fields=` / `?expand=` and the values() list path.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, two doctors, a patient and a few appointments, and
+        authenticate as the admin.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(
+                username='doctor', password='doctorpassword', is_doctor=True, first_name='Ada', last_name='Lovelace'
+            ),
+            specialization='Cardiology'
+        )
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='nameless', password='doctorpassword', is_doctor=True),
+            specialization='Neurology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(
+                username='patient', password='patientpassword', is_patient=True, first_name='Pat'
+            ),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        start = datetime(2030, 1, 1, 9, 15, 30, 123456, tzinfo=dt_timezone.utc)
+        self.appointments = [
+            Appointment.objects.create(
+                doctor=self.doctor if i % 2 else self.other_doctor, patient=self.patient,
+                scheduled_at=start + timedelta(days=i), duration_minutes=15 + i, is_completed=bool(i % 3)
+            )
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(self.admin_user).access_token))
+
+    def test_default_rows_match_the_serializer(self):
+        response = self.client.get(reverse('appointment-list'))
+        expected = AppointmentSerializer(
+            Appointment.objects.filter(id__in=[row['id'] for row in response.data['results']]).order_by('id'),
+            many=True
+        ).data
+        self.assertEqual(
+            json.loads(response.content)['results'],
+            json.loads(json.dumps(expected))
+        )
+
+    def test_sparse_fields(self):
+        response = self.client.get(reverse('appointment-list'), {'fields': 'scheduled_at,id'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {'id': self.appointments[0].id, 'scheduled_at': '2030-01-01T09:15:30.123456Z'})
+
+    def test_expand_embeds_names_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('appointment-list'), {'expand': 'doctor,patient', 'page_size': 2})
+        first, second = response.data['results']
+        self.assertEqual(first['doctor'], {
+            'id': self.other_doctor.id, 'username': 'nameless', 'first_name': '', 'last_name': '',
+            'specialization': 'Neurology', 'name': 'nameless',
+        })
+        self.assertEqual(second['doctor']['name'], 'Ada Lovelace')
+        self.assertEqual(first['patient']['name'], 'Pat')
+        # Count, page keys and one query loading the rows with the joined names.
+        self.assertEqual(len([q for q in queries.captured_queries if 'appointments_appointment' in q['sql']]), 3)
+
+    def test_expanded_names_change_the_etag(self):
+        etag = self.client.get(reverse('appointment-list'), {'expand': 'doctor'}).headers['ETag']
+        self.assertEqual(
+            self.client.get(reverse('appointment-list'), {'expand': 'doctor'}, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+        self.doctor.user.last_name = 'King'
+        self.doctor.user.save()
+        response = self.client.get(reverse('appointment-list'), {'expand': 'doctor'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][1]['doctor']['name'], 'Ada King')
+
+    def test_cursor_pages_support_fields(self):
+        response = self.client.get(reverse('appointment-list'), {'pagination': 'cursor', 'fields': 'id', 'page_size': 2})
+        self.assertEqual(response.data['results'], [{'id': a.id} for a in self.appointments[:2]])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'id': a.id} for a in self.appointments[2:4]])
+
+    def test_detail_fields(self):
+        appointment = self.appointments[1]
+        response = self.client.get(reverse('appointment-detail', args=[appointment.id]), {'fields': 'is_completed'})
+        self.assertEqual(response.data, {'is_completed': True})
+
+    def test_unknown_names_are_rejected(self):
+        for params in ({'fields': 'id,notes'}, {'expand': 'nurse'}):
+            response = self.client.get(reverse('appointment-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('error', response.data)
+
+
+class AppointmentBulkStatusTests(APITestCase):
+    """
+    Test suite for set-based status updates and completing past appointments.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, two doctors with past and upcoming appointments and a
+        patient, and authenticate as the admin.
+        """
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.doctor_user = User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True)
+        self.doctor = Doctor.objects.create(user=self.doctor_user, specialization='Cardiology')
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='other', password='otherpassword', is_doctor=True),
+            specialization='Neurology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='patient', password='patientpassword', is_patient=True),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        now = timezone.now().replace(microsecond=0)
+        self.past = [
+            Appointment.objects.create(
+                doctor=self.doctor if i % 2 else self.other_doctor, patient=self.patient,
+                scheduled_at=now - timedelta(days=2, hours=i)
+            )
+            for i in range(4)
+        ]
+        # Ended 10 minutes ago: within the default grace period.
+        self.just_ended = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=now - timedelta(minutes=40)
+        )
+        self.upcoming = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, scheduled_at=now + timedelta(days=1)
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(self.admin_user).access_token))
+
+    def completed_ids(self):
+        return set(Appointment.objects.filter(is_completed=True).values_list('id', flat=True))
+
+    def test_updates_listed_ids_with_one_update(self):
+        appointment = self.past[0]
+        etag = self.client.get(reverse('appointment-detail', args=[appointment.id])).headers['ETag']
+        ids = [a.id for a in self.past[:3]]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('appointment-bulk-status'), {'ids': ids, 'is_completed': True}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'updated': 3, 'is_completed': True})
+        self.assertEqual(self.completed_ids(), set(ids))
+        self.assertEqual(
+            len([q for q in queries.captured_queries if q['sql'].startswith('UPDATE "appointments_appointment"')]), 1
+        )
+        self.assertGreater(Appointment.objects.get(id=appointment.id).updated_at, appointment.updated_at)
+        response = self.client.get(reverse('appointment-detail', args=[appointment.id]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_completed'])
+        self.assertEqual(rollup.find_mismatches(), {})
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        Appointment.objects.filter(id=self.past[0].id).update(is_completed=True)
+        response = self.client.post(
+            reverse('appointment-bulk-status'), {'ids': [self.past[0].id, self.past[1].id], 'is_completed': True},
+            format='json'
+        )
+        self.assertEqual(response.data['updated'], 1)
+
+    def test_updates_filtered_set(self):
+        response = self.client.post(reverse('appointment-bulk-status'), {
+            'doctor': self.doctor.id, 'scheduled_before': timezone.now().isoformat(), 'is_completed': True,
+        }, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(self.completed_ids(), {self.past[1].id, self.past[3].id, self.just_ended.id})
+
+        response = self.client.post(reverse('appointment-bulk-status'), {
+            'end_date': (timezone.localdate() - timedelta(days=1)).isoformat(), 'is_completed': False,
+        }, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(self.completed_ids(), {self.just_ended.id})
+        self.assertEqual(rollup.find_mismatches(), {})
+
+    def test_rejects_missing_selectors_and_non_admins(self):
+        response = self.client.post(reverse('appointment-bulk-status'), {'is_completed': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.completed_ids(), set())
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(self.doctor_user).access_token))
+        response = self.client.post(
+            reverse('appointment-bulk-status'), {'ids': [self.past[1].id], 'is_completed': True}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_completes_appointments_past_the_grace_period(self):
+        call_command('complete_past_appointments', '--batch-size', '3', stdout=StringIO())
+        self.assertEqual(self.completed_ids(), {a.id for a in self.past})
+        call_command('complete_past_appointments', '--grace-minutes', '0', stdout=StringIO())
+        self.assertEqual(self.completed_ids(), {a.id for a in self.past} | {self.just_ended.id})
+        self.assertEqual(rollup.find_mismatches(), {})
+
+    def test_command_flag_only_reports_without_changes(self):
+        out = StringIO()
+        call_command('complete_past_appointments', '--flag-only', stdout=out)
+        self.assertIn(f"Doctor {self.doctor.id}: 2 overdue", out.getvalue())
+        self.assertIn(f"Doctor {self.other_doctor.id}: 2 overdue", out.getvalue())
+        self.assertIn(": 4", out.getvalue().splitlines()[-1])
+        self.assertEqual(self.completed_ids(), set())
+
+    def test_command_rejects_non_positive_batches(self):
+        for option in ('--batch-size', '--max-batches'):
+            with self.assertRaisesMessage(CommandError, f"{option} must be a positive integer."):
+                call_command('complete_past_appointments', option, '-1', stdout=StringIO())
+        self.assertEqual(self.completed_ids(), set())
@@ -0,0 +1,256 @@
+"""
+Appointment count time series for `/appointments/count/`.
+
+A `CountQuery` is parsed from the request's query parameters and answered with
+one grouped SQL query: day, week and month buckets are summed from the
+DailyAppointmentCount rollup, which also counts archived appointments; hourly
+buckets are counted from Appointment and ArchivedAppointment (the rollup has no
+time of day). The grouped rows are then spread over the full list of buckets in
+Python, so periods without appointments appear as zeros and every series has
+the same length as `buckets`.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import Trunc, TruncHour
+from django.utils import timezone
+from .models import Appointment, ArchivedAppointment, DailyAppointmentCount
+
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+# group_by name -> (values() fields forming the series key, response key for each field)
+GROUP_BY_FIELDS = {
+    'doctor': (('doctor', 'doctor__user__username'), ('doctor', 'doctor_username')),
+    'status': (('is_completed',), ('status',)),
+    'specialization': (('doctor__specialization',), ('specialization',)),
+}
+
+# Upper bound on buckets per series, e.g. about seven months of hourly counts.
+MAX_BUCKETS = 5000
+
+
+def bucket_start(value, granularity):
+    """
+    Returns the start of the bucket a date (or naive local datetime) falls in.
+    """
+    if granularity == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value, granularity):
+    """
+    Returns the start of the bucket following the one starting at `value`.
+    """
+    if granularity == 'hour':
+        return value + timedelta(hours=1)
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    if granularity == 'month':
+        return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+    return value + timedelta(days=1)
+
+
+@dataclass
+class CountQuery:
+    """
+    A validated request for appointment counts.
+
+    Attributes:
+        start_date: The first day counted.
+        end_date: The last day counted, inclusive.
+        granularity: One of GRANULARITIES.
+        group_by: Names from GROUP_BY_FIELDS; one series is returned per distinct combination.
+        is_completed: Optional completion status filter.
+        doctor_name: Optional case-insensitive doctor username filter.
+        legacy: True when neither `granularity` nor `group_by` was requested, in
+            which case the response keeps the original list-of-days format.
+    """
+    start_date: date
+    end_date: date
+    granularity: str = 'day'
+    group_by: tuple = ()
+    is_completed: bool = None
+    doctor_name: str = None
+    legacy: bool = False
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Validates the query parameters.
+
+        Raises:
+            ValueError: With a client-facing message if a parameter is missing or invalid.
+        """
+        start_date = params.get('start_date')
+        end_date = params.get('end_date')
+        status = params.get('status')
+        granularity = params.get('granularity')
+        group_by = params.get('group_by')
+
+        if not start_date or not end_date:
+            raise ValueError("Please provide 'start_date' and 'end_date' query parameters in 'YYYY-MM-DD' format.")
+
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError("Date format should be 'YYYY-MM-DD'.")
+
+        if start_date_obj > end_date_obj:
+            raise ValueError("'start_date' must be before 'end_date'.")
+
+        is_completed = None
+        if status:
+            if status.lower() == 'completed':
+                is_completed = True
+            elif status.lower() == 'pending':
+                is_completed = False
+            else:
+                raise ValueError("Invalid status value. Use 'completed' or 'pending'.")
+
+        if granularity and granularity not in GRANULARITIES:
+            raise ValueError(f"Invalid granularity. Use one of: {', '.join(GRANULARITIES)}.")
+
+        fields = tuple(dict.fromkeys(field.strip() for field in (group_by or '').split(',') if field.strip()))
+        unknown = [field for field in fields if field not in GROUP_BY_FIELDS]
+        if unknown:
+            raise ValueError(f"Invalid group_by value. Use any of: {', '.join(GROUP_BY_FIELDS)}.")
+
+        query = cls(
+            start_date=start_date_obj,
+            end_date=end_date_obj,
+            granularity=granularity or 'day',
+            group_by=fields,
+            is_completed=is_completed,
+            doctor_name=params.get('doctor') or None,
+            legacy=not granularity and not fields,
+        )
+        if len(query.buckets()) > MAX_BUCKETS:
+            raise ValueError(f"The date range spans more than {MAX_BUCKETS} {query.granularity} buckets.")
+        return query
+
+    def buckets(self):
+        """
+        Returns the start of every bucket overlapping the date range, in order.
+
+        Hourly buckets are naive local datetimes, the others are dates.
+        """
+        if self.granularity == 'hour':
+            current = datetime.combine(self.start_date, datetime.min.time())
+            end = datetime.combine(self.end_date + timedelta(days=1), datetime.min.time())
+        else:
+            current = bucket_start(self.start_date, self.granularity)
+            end = self.end_date + timedelta(days=1)
+        buckets = []
+        while current < end:
+            buckets.append(current)
+            current = next_bucket(current, self.granularity)
+        return buckets
+
+    def key_fields(self):
+        return [field for name in self.group_by for field in GROUP_BY_FIELDS[name][0]]
+
+    def queryset(self):
+        """
+        Returns the single grouped query yielding `bucket`, the group fields and `count`.
+        """
+        if self.granularity == 'hour':
+            tz = timezone.get_current_timezone()
+            filters = Q(
+                scheduled_at__gte=datetime.combine(self.start_date, datetime.min.time(), tzinfo=tz),
+                scheduled_at__lt=datetime.combine(self.end_date + timedelta(days=1), datetime.min.time(), tzinfo=tz),
+            )
+            # Old ranges may reach into the archive, which is indexed on scheduled_at too.
+            querysets = [
+                model.objects.annotate(bucket=TruncHour('scheduled_at')) for model in (Appointment, ArchivedAppointment)
+            ]
+            total = Count('id')
+        else:
+            # Answer from the pre-aggregated daily rollup, so the cost scales with
+            # the number of days and doctors rather than the number of appointments.
+            filters = Q(date__gte=self.start_date, date__lte=self.end_date)
+            bucket = F('date') if self.granularity == 'day' else Trunc('date', self.granularity, output_field=DateField())
+            querysets = [DailyAppointmentCount.objects.annotate(bucket=bucket)]
+            total = Sum('count')
+
+        if self.is_completed is not None:
+            filters &= Q(is_completed=self.is_completed)
+        if self.doctor_name:
+            filters &= Q(doctor__user__username__icontains=self.doctor_name)
+
+        first, *rest = [
+            queryset.filter(filters)
+            .values('bucket', *self.key_fields())
+            .annotate(count=total)
+            .order_by()
+            for queryset in querysets
+        ]
+        # Still one query: archived rows are appended with UNION ALL, and `render`
+        # adds up rows that share a bucket.
+        return first.union(*rest, all=True) if rest else first
+
+    def normalize(self, bucket):
+        if isinstance(bucket, datetime):
+            if timezone.is_aware(bucket):
+                bucket = timezone.localtime(bucket)
+            return bucket.replace(tzinfo=None)
+        return bucket
+
+    def render(self, rows):
+        """
+        Builds the response payload from the rows of `queryset()`.
+
+        In legacy mode this is the list of days with appointments. Otherwise it
+        holds the bucket labels, a zero-filled `total` series and one zero-filled
+        series per group, sorted by group key.
+        """
+        buckets = self.buckets()
+        index = {bucket: position for position, bucket in enumerate(buckets)}
+        fields = self.key_fields()
+        totals = [0] * len(buckets)
+        series = {}
+        for row in rows:
+            position = index[self.normalize(row['bucket'])]
+            totals[position] += row['count']
+            if fields:
+                key = tuple(row[field] for field in fields)
+                counts = series.get(key)
+                if counts is None:
+                    counts = series[key] = [0] * len(buckets)
+                counts[position] += row['count']
+
+        if self.legacy:
+            return [
+                {'date': bucket, 'appointment_count': count}
+                for bucket, count in zip(buckets, totals) if count
+            ]
+
+        if self.granularity == 'hour':
+            labels = [timezone.make_aware(bucket).isoformat() for bucket in buckets]
+        else:
+            labels = [bucket.isoformat() for bucket in buckets]
+        names = [name for group in self.group_by for name in GROUP_BY_FIELDS[group][1]]
+        return {
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'granularity': self.granularity,
+            'group_by': list(self.group_by),
+            'buckets': labels,
+            'total': {'counts': totals, 'total': sum(totals)},
+            'series': [
+                {
+                    **{
+                        name: ('completed' if value else 'pending') if name == 'status' else value
+                        for name, value in zip(names, key)
+                    },
+                    'counts': counts,
+                    'total': sum(counts),
+                }
+                for key, counts in sorted(series.items())
+            ],
+        }
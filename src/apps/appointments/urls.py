@@ -1,9 +1,26 @@
 # urls.py
+from django.conf import settings
 from django.urls import path
-from .views import AppointmentListView, AppointmentDetailView, AppointmentCountView
+from .views import (
+    AppointmentListView, AppointmentExportView, AppointmentDetailView, AppointmentCountView, DoctorAvailabilityView,
+    AppointmentCacheStatsView, AppointmentTimelineView, AppointmentBulkStatusView,
+)
+
+if settings.ASYNC_API_VIEWS:
+    # Native async reads for ASGI deployments; writes are delegated to the DRF views
+    from .async_views import (
+        AsyncAppointmentListView as AppointmentListView,
+        AsyncAppointmentDetailView as AppointmentDetailView,
+        AsyncAppointmentCountView as AppointmentCountView,
+    )
 
 urlpatterns = [
     path('appointments/list/', AppointmentListView.as_view(), name='appointment-list'),
+    path('appointments/export/', AppointmentExportView.as_view(), name='appointment-export'),
     path('appointments/<int:id>/', AppointmentDetailView.as_view(), name='appointment-detail'),
+    path('appointments/status/', AppointmentBulkStatusView.as_view(), name='appointment-bulk-status'),
+    path('appointments/timeline/', AppointmentTimelineView.as_view(), name='appointment-timeline'),
     path('appointments/count/', AppointmentCountView.as_view(), name='appointment-count'),
+    path('appointments/availability/', DoctorAvailabilityView.as_view(), name='appointment-availability'),
+    path('appointments/cache/stats/', AppointmentCacheStatsView.as_view(), name='appointment-cache-stats'),
 ]
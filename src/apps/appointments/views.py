@@ -1,18 +1,29 @@
 import logging
 from rest_framework import generics, permissions
-from .models import Appointment
-from .serializers import AppointmentSerializer
-from .permissions import IsAdminUserOrReadOnlyForDoctors, IsAdminUserOrAppointmentDoctor
+from .models import Appointment, ArchivedAppointment
+from .serializers import AppointmentBulkStatusSerializer, AppointmentSerializer, AppointmentTimelineSerializer
+from .permissions import IsAdminUserOrReadOnlyForDoctors, IsAdminUserOrAppointmentDoctor, IsAdminUserOrPatient
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Count, Q
-from django.db.models.functions import TruncDate
-from datetime import datetime
+from rest_framework.exceptions import APIException, PermissionDenied
+from django.http import Http404, StreamingHttpResponse
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from apps.users.models import Doctor
+from . import availability
+from ..conditional import make_etag, not_modified_response, set_validators
+from ..fieldsets import parse_fields
+from ..sqlite import serialized_writes
+from .response_cache import CACHED_VIEWS, cached_response, get_stats
 from django.core.exceptions import ValidationError
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from rest_framework import pagination
-from rest_framework.pagination import PageNumberPagination
+from .bulk import BULK_CREATE_MAX_ITEMS, BULK_STATUS_MAX_IDS, bulk_create_appointments, bulk_set_completed
+from .export import EXPORT_FORMATS, stream_appointments
+from .pagination import AppointmentCursorPagination, AppointmentPageNumberPagination
+from .rows import AppointmentRows
+from .timeseries import CountQuery
 
 
 # List and create appointments (only admin can create)
@@ -22,10 +33,48 @@ class AppointmentListView(generics.ListCreateAPIView):
     
     This view allows the listing of appointments for admin and doctors. Admins can view
     all appointments and create new ones, while doctors can only view their own appointments.
+    Lists are page-number paginated by default; `?pagination=cursor` (or any `cursor`
+    parameter) switches to keyset pagination ordered by (scheduled_at, id).
     """
     serializer_class = AppointmentSerializer
     permission_classes = [IsAdminUserOrAppointmentDoctor]
 
+    pagination_param = openapi.Parameter(
+        'pagination', openapi.IN_QUERY, description="Pagination mode (page/cursor)", type=openapi.TYPE_STRING
+    )
+    cursor_param = openapi.Parameter(
+        'cursor', openapi.IN_QUERY, description="Opaque cursor returned in 'next'/'previous' links", type=openapi.TYPE_STRING
+    )
+    page_size_param = openapi.Parameter(
+        'page_size', openapi.IN_QUERY, description="Number of appointments per page (max 100)", type=openapi.TYPE_INTEGER
+    )
+    fields_param = openapi.Parameter(
+        'fields', openapi.IN_QUERY, description="Comma-separated fields to return (default: all)", type=openapi.TYPE_STRING
+    )
+    expand_param = openapi.Parameter(
+        'expand', openapi.IN_QUERY, description="Embed names for doctor and/or patient, e.g. doctor,patient",
+        type=openapi.TYPE_STRING
+    )
+
+    @swagger_auto_schema(manual_parameters=[pagination_param, cursor_param, page_size_param, fields_param, expand_param])
+    @cached_response('appointment-list')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    @property
+    def paginator(self):
+        """
+        Returns the paginator for the pagination mode requested by the client.
+        """
+        if not hasattr(self, '_paginator'):
+            request = getattr(self, 'request', None)
+            params = request.query_params if request is not None else {}
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = AppointmentCursorPagination()
+            else:
+                self._paginator = AppointmentPageNumberPagination()
+        return self._paginator
+
     def get_queryset(self):
         """
         Returns the appropriate set of appointments based on the user's role.
@@ -48,6 +97,89 @@ class AppointmentListView(generics.ListCreateAPIView):
             logging.error(f"Error retrieving appointments: {e}")
             return Appointment.objects.none()
 
+    def list(self, request, *args, **kwargs):
+        """
+        Lists one page of appointments, answering 304 when the page is unchanged.
+
+        The page is first resolved with only `id`, `updated_at` and `scheduled_at`
+        loaded. Its ETag is derived from those values and the pagination metadata,
+        so unchanged pages are answered without loading or serializing full rows.
+        Rows are then built from `values_list()` tuples (see `rows.py`), limited
+        to `?fields=` and with `?expand=doctor,patient` names joined in.
+        """
+        try:
+            spec = AppointmentRows.from_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        keys = queryset.only('id', 'updated_at', 'scheduled_at')
+        page = self.paginate_queryset(keys)
+        if page is None:
+            page = list(keys)
+            metadata = None
+        else:
+            metadata = dict(self.paginator.get_paginated_response([]).data)
+            metadata.pop('results', None)
+
+        ids = [row.id for row in page]
+        versions = [(row.id, row.updated_at) for row in page]
+        results = None
+        if spec.expand:
+            # Expanded names can change without touching the appointments (their
+            # saves bump the cache versions too, see signals.invalidate_expanded_names).
+            results = spec.load(queryset, ids)
+            versions.append(results)
+        etag = make_etag('appointment-list', metadata, spec.key(), versions)
+        not_modified = not_modified_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        if results is None:
+            results = spec.load(queryset, ids)
+        if metadata is None:
+            response = Response(results)
+        else:
+            response = self.get_paginated_response(results)
+        return set_validators(response, etag=etag)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Creates one appointment, or many when the payload is a JSON list.
+
+        List payloads are validated and inserted as a set (see `bulk.py`). Invalid
+        items are reported per index without aborting the batch unless the client
+        passes `?atomic=true`, in which case nothing is inserted if any item fails.
+        """
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        if not request.user.is_staff:
+            raise PermissionDenied("Only admin users can create or modify appointments.")
+        if len(request.data) > BULK_CREATE_MAX_ITEMS:
+            return Response(
+                {"error": f"A bulk request may contain at most {BULK_CREATE_MAX_ITEMS} appointments."},
+                status=400
+            )
+
+        all_or_nothing = request.query_params.get('atomic', '').lower() in ('1', 'true')
+        try:
+            with serialized_writes():
+                created, errors = bulk_create_appointments(request.data, all_or_nothing=all_or_nothing)
+        except APIException:
+            raise
+        except Exception as e:
+            logging.error(f"Error bulk creating appointments: {e}")
+            raise ValidationError("An error occurred while creating the appointments.")
+
+        return Response(
+            {
+                'created': AppointmentSerializer(created, many=True).data,
+                'errors': errors,
+            },
+            status=201 if created else 400
+        )
+
     def perform_create(self, serializer):
         """
         Handles the creation of a new appointment.
@@ -56,12 +188,101 @@ class AppointmentListView(generics.ListCreateAPIView):
         appointment instance.
         """
         try:
-            serializer.save()
+            with serialized_writes():
+                serializer.save()
+        except APIException:
+            raise
         except Exception as e:
             logging.error(f"Error creating appointment: {e}")
             raise ValidationError("An error occurred while creating the appointment.")
 
 
+# Stream appointments as CSV or NDJSON (admins and doctors)
+class AppointmentExportView(APIView):
+    """
+    View for exporting appointments in a single streamed response.
+
+    Uses the same visibility rules as `AppointmentListView`: admins export all
+    appointments, doctors only their own. Rows are streamed in (scheduled_at, id)
+    order straight from a chunked database iterator (see `export.py`), so exports
+    of any size use constant memory and no OFFSET queries.
+    """
+    permission_classes = [IsAdminUserOrReadOnlyForDoctors]
+
+    output_param = openapi.Parameter(
+        'output', openapi.IN_QUERY, description="Export format (csv/ndjson, default csv)", type=openapi.TYPE_STRING
+    )
+    start_date_param = openapi.Parameter(
+        'start_date', openapi.IN_QUERY, description="First day to export (YYYY-MM-DD)", type=openapi.TYPE_STRING
+    )
+    end_date_param = openapi.Parameter(
+        'end_date', openapi.IN_QUERY, description="Last day to export (YYYY-MM-DD)", type=openapi.TYPE_STRING
+    )
+    doctor_param = openapi.Parameter(
+        'doctor', openapi.IN_QUERY, description="Filter by doctor id", type=openapi.TYPE_INTEGER
+    )
+    status_param = openapi.Parameter(
+        'status', openapi.IN_QUERY, description="Filter by status (completed/pending)", type=openapi.TYPE_STRING
+    )
+    gzip_param = openapi.Parameter(
+        'gzip', openapi.IN_QUERY, description="Compress the export with gzip (true/false)", type=openapi.TYPE_BOOLEAN
+    )
+
+    def get_queryset(self):
+        """
+        Returns the appointments the user may export, as in `AppointmentListView`.
+        """
+        user = self.request.user
+        if user.is_staff:
+            return Appointment.objects.all()
+        elif hasattr(user, 'doctor'):
+            return Appointment.objects.filter(doctor=user.doctor)
+        return Appointment.objects.none()
+
+    @swagger_auto_schema(
+        manual_parameters=[output_param, start_date_param, end_date_param, doctor_param, status_param, gzip_param]
+    )
+    def get(self, request):
+        params = request.query_params
+        export_format = params.get('output', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": "Invalid output value. Use 'csv' or 'ndjson'."}, status=400)
+
+        queryset = self.get_queryset()
+        try:
+            if params.get('start_date'):
+                start = datetime.strptime(params['start_date'], '%Y-%m-%d')
+                queryset = queryset.filter(scheduled_at__gte=timezone.make_aware(start))
+            if params.get('end_date'):
+                end = datetime.strptime(params['end_date'], '%Y-%m-%d') + timedelta(days=1)
+                queryset = queryset.filter(scheduled_at__lt=timezone.make_aware(end))
+        except ValueError:
+            return Response({"error": "Date format should be 'YYYY-MM-DD'."}, status=400)
+
+        if params.get('doctor'):
+            try:
+                queryset = queryset.filter(doctor_id=int(params['doctor']))
+            except ValueError:
+                return Response({"error": "'doctor' must be a doctor id."}, status=400)
+
+        status = params.get('status', '').lower()
+        if status == 'completed':
+            queryset = queryset.filter(is_completed=True)
+        elif status == 'pending':
+            queryset = queryset.filter(is_completed=False)
+        elif status:
+            return Response({"error": "Invalid status value. Use 'completed' or 'pending'."}, status=400)
+
+        compress = params.get('gzip', '').lower() in ('1', 'true')
+        filename = f'appointments.{export_format}' + ('.gz' if compress else '')
+        response = StreamingHttpResponse(
+            stream_appointments(queryset, export_format, compress=compress),
+            content_type='application/gzip' if compress else EXPORT_FORMATS[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 # Retrieve, update, and delete appointments (only admin can update/delete)
 class AppointmentDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -74,12 +295,15 @@ class AppointmentDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdminUserOrReadOnlyForDoctors]
     lookup_field = 'id'
 
-    def get_queryset(self):
+    def get_queryset(self, model=Appointment):
         """
         Returns the appropriate set of appointments based on the user's role.
         
         Admins see all appointments, while doctors see only their appointments.
         Non-admin, non-doctor users have no access.
+
+        Args:
+            model: Appointment, or ArchivedAppointment for archived history.
         
         Returns:
             QuerySet: A filtered set of appointments.
@@ -87,21 +311,52 @@ class AppointmentDetailView(generics.RetrieveUpdateDestroyAPIView):
         user = self.request.user
         try:
             if user.is_staff:
-                return Appointment.objects.all()
+                return model.objects.all()
             elif hasattr(user, 'doctor'):
-                return Appointment.objects.filter(doctor=user.doctor)
+                return model.objects.filter(doctor=user.doctor)
             else:
-                return Appointment.objects.none()
+                return model.objects.none()
         except Exception as e:
             logging.error(f"Error retrieving appointment details: {e}")
-            return Appointment.objects.none()
+            return model.objects.none()
+
+    @cached_response('appointment-detail')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieves an appointment, answering 304 before serialization when the
+        client's ETag or Last-Modified date still matches its `updated_at`.
+        `?fields=` limits the response to the named fields. Appointments moved to
+        the archive (see `archive.py`) are looked up there when not found.
+        """
+        try:
+            fields = parse_fields(request.query_params, AppointmentSerializer.Meta.fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        try:
+            instance = self.get_object()
+        except Http404:
+            instance = self.get_queryset(ArchivedAppointment).filter(id=kwargs['id']).first()
+            if instance is None:
+                raise
+        etag = make_etag('appointment', instance.pk, instance.updated_at, fields)
+        not_modified = not_modified_response(request, etag=etag, last_modified=instance.updated_at)
+        if not_modified is not None:
+            return not_modified
+        response = Response(self.get_serializer(instance, fields=fields).data)
+        return set_validators(response, etag=etag, last_modified=instance.updated_at)
 
     def perform_update(self, serializer):
         """
         Handles the update of an appointment. Only admin users can update appointments.
         """
         try:
-            serializer.save()
+            with serialized_writes():
+                serializer.save()
+        except APIException:
+            raise
         except Exception as e:
             logging.error(f"Error updating appointment: {e}")
             raise ValidationError("An error occurred while updating the appointment.")
@@ -111,17 +366,134 @@ class AppointmentDetailView(generics.RetrieveUpdateDestroyAPIView):
         Handles the deletion of an appointment. Only admin users can delete appointments.
         """
         try:
-            instance.delete()
+            with serialized_writes():
+                instance.delete()
+        except APIException:
+            raise
         except Exception as e:
             logging.error(f"Error deleting appointment: {e}")
             raise ValidationError("An error occurred while deleting the appointment.")
 
 
+class AppointmentTimelineView(APIView):
+    """
+    View listing a patient's upcoming or past appointments for the patient app.
+
+    Patients see their own timeline; admins pass `?patient=<id>`. Upcoming
+    appointments (not yet ended) are listed soonest first, past ones most
+    recent first, with keyset pagination on (scheduled_at, id). Each page is one
+    query on the (patient, scheduled_at) index with the doctor's name and
+    specialization joined in.
+    """
+    permission_classes = [IsAdminUserOrPatient]
+    directions = ('upcoming', 'past')
+
+    direction_param = openapi.Parameter(
+        'direction', openapi.IN_QUERY, description="upcoming (default) or past", type=openapi.TYPE_STRING
+    )
+    patient_param = openapi.Parameter(
+        'patient', openapi.IN_QUERY, description="Patient id (admins only)", type=openapi.TYPE_INTEGER
+    )
+    cursor_param = openapi.Parameter(
+        'cursor', openapi.IN_QUERY, description="Opaque cursor returned in 'next'/'previous' links", type=openapi.TYPE_STRING
+    )
+    page_size_param = openapi.Parameter(
+        'page_size', openapi.IN_QUERY, description="Number of appointments per page (max 100)", type=openapi.TYPE_INTEGER
+    )
+
+    @swagger_auto_schema(
+        manual_parameters=[direction_param, patient_param, cursor_param, page_size_param],
+        responses={200: AppointmentTimelineSerializer(many=True)},
+    )
+    def get(self, request):
+        direction = request.query_params.get('direction', 'upcoming')
+        if direction not in self.directions:
+            return Response({"error": "Invalid direction. Use 'upcoming' or 'past'."}, status=400)
+
+        if request.user.is_staff:
+            try:
+                patient_id = int(request.query_params['patient'])
+            except (KeyError, ValueError):
+                return Response({"error": "Admins must provide a numeric 'patient' query parameter."}, status=400)
+        else:
+            patient_id = request.user.patient.id
+
+        now = timezone.now()
+        queryset = Appointment.objects.filter(patient_id=patient_id)
+        if direction == 'upcoming':
+            # Appointments in progress are still upcoming; none started more than
+            # MAX_DURATION_MINUTES ago, which keeps the index range scan short.
+            queryset = queryset.filter(
+                scheduled_at__gte=now - timedelta(minutes=Appointment.MAX_DURATION_MINUTES), ends_at__gt=now,
+            )
+        else:
+            queryset = queryset.filter(scheduled_at__lt=now, ends_at__lte=now)
+        queryset = queryset.select_related('doctor__user').only(
+            'id', 'scheduled_at', 'ends_at', 'duration_minutes', 'is_completed', 'updated_at',
+            'doctor__id', 'doctor__specialization',
+            'doctor__user__username', 'doctor__user__first_name', 'doctor__user__last_name',
+        )
+
+        paginator = AppointmentCursorPagination(descending=direction == 'past')
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        metadata = {'next': paginator.get_next_link(), 'previous': paginator.get_previous_link()}
+        # Doctor details are part of the payload but not of the appointment's updated_at.
+        etag = make_etag('appointment-timeline', metadata, [
+            (row.id, row.updated_at, row.doctor.specialization, row.doctor.user.get_full_name(), row.doctor.user.username)
+            for row in page
+        ])
+        not_modified = not_modified_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        response = Response({
+            'direction': direction,
+            **metadata,
+            'results': AppointmentTimelineSerializer(page, many=True).data,
+        })
+        return set_validators(response, etag=etag)
+
+
+class AppointmentBulkStatusView(APIView):
+    """
+    View for marking many appointments completed or pending at once.
+
+    Admin only. The appointments are selected by id list or by doctor and date
+    filters (see `AppointmentBulkStatusSerializer`) and updated with a single
+    UPDATE that also bumps `updated_at` (see `bulk.py`), instead of one PATCH and
+    full-row `save()` per appointment.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(request_body=AppointmentBulkStatusSerializer)
+    def post(self, request):
+        serializer = AppointmentBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if len(serializer.validated_data.get('ids', ())) > BULK_STATUS_MAX_IDS:
+            return Response({"error": f"A bulk status update may list at most {BULK_STATUS_MAX_IDS} ids."}, status=400)
+
+        is_completed = serializer.validated_data['is_completed']
+        try:
+            with serialized_writes():
+                updated = bulk_set_completed(Appointment.objects.filter(serializer.filters()), is_completed)
+        except APIException:
+            raise
+        except Exception as e:
+            logging.error(f"Error updating appointment statuses: {e}")
+            raise ValidationError("An error occurred while updating the appointments.")
+        return Response({'updated': updated, 'is_completed': is_completed})
+
+
 class AppointmentCountView(APIView):
     """
     View to provide the count of appointments over time based on filters.
     This view allows admin users to retrieve the count of appointments over a specified
     date range, optionally filtered by status (completed/pending) and doctor's name.
+
+    Without `granularity` or `group_by` the response is the list of days that have
+    appointments. With either, it is a set of zero-filled series over hour, day,
+    week or month buckets, one per doctor, status and/or specialization plus a
+    total, computed with a single grouped query (see `timeseries.py`).
     """
     permission_classes = [permissions.IsAdminUser]
 
@@ -137,74 +509,126 @@ class AppointmentCountView(APIView):
     doctor_name_param = openapi.Parameter(
         'doctor', openapi.IN_QUERY, description="Filter by doctor's name", type=openapi.TYPE_STRING
     )
+    granularity_param = openapi.Parameter(
+        'granularity', openapi.IN_QUERY, description="Bucket size (hour/day/week/month)", type=openapi.TYPE_STRING
+    )
+    group_by_param = openapi.Parameter(
+        'group_by', openapi.IN_QUERY, description="Comma-separated series keys (doctor/status/specialization)",
+        type=openapi.TYPE_STRING
+    )
 
-
-    @swagger_auto_schema(manual_parameters=[start_date_param, end_date_param, status_param, doctor_name_param])
+    @swagger_auto_schema(manual_parameters=[
+        start_date_param, end_date_param, status_param, doctor_name_param, granularity_param, group_by_param
+    ])
+    @cached_response('appointment-count')
     def get(self, request):
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        status = request.query_params.get('status')
-        doctor_name = request.query_params.get('doctor')
+        try:
+            query = CountQuery.from_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
 
-        if not start_date or not end_date:
-            return Response(
-                {"error": "Please provide 'start_date' and 'end_date' query parameters in 'YYYY-MM-DD' format."},
-                status=400
-            )
+        try:
+            return Response(query.render(query.queryset()))
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            return Response({"error": "An unexpected error occurred. Please try again later."}, status=500)
+
+
+class DoctorAvailabilityView(APIView):
+    """
+    View to find the next free appointment slots for one or more doctors.
+
+    Busy intervals for all requested doctors are loaded with a single indexed
+    range query and searched with `availability.free_slots`, so the cost depends
+    on the number of slots returned rather than on the length of each doctor's
+    schedule.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_doctors = 50
+    max_days = 60
+    max_limit = 100
 
+    doctors_param = openapi.Parameter(
+        'doctors', openapi.IN_QUERY, description="Comma-separated doctor ids", type=openapi.TYPE_STRING, required=True
+    )
+    start_param = openapi.Parameter(
+        'start', openapi.IN_QUERY, description="Earliest slot start (ISO 8601, defaults to now)", type=openapi.TYPE_STRING
+    )
+    end_param = openapi.Parameter(
+        'end', openapi.IN_QUERY, description="Latest slot end (ISO 8601, defaults to start + 14 days)", type=openapi.TYPE_STRING
+    )
+    slot_minutes_param = openapi.Parameter(
+        'slot_minutes', openapi.IN_QUERY, description="Slot length in minutes (default 30)", type=openapi.TYPE_INTEGER
+    )
+    limit_param = openapi.Parameter(
+        'limit', openapi.IN_QUERY, description="Maximum slots per doctor (default 10)", type=openapi.TYPE_INTEGER
+    )
+
+    @swagger_auto_schema(manual_parameters=[doctors_param, start_param, end_param, slot_minutes_param, limit_param])
+    def get(self, request):
         try:
-            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d')
-            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
+            doctor_ids = [int(value) for value in request.query_params.get('doctors', '').split(',') if value.strip()]
+            slot_minutes = int(request.query_params.get('slot_minutes', Appointment.DEFAULT_DURATION_MINUTES))
+            limit = int(request.query_params.get('limit', 10))
         except ValueError:
-            return Response(
-                {"error": "Date format should be 'YYYY-MM-DD'."},
-                status=400
-            )
+            return Response({"error": "'doctors', 'slot_minutes' and 'limit' must be integers."}, status=400)
 
-        if start_date_obj > end_date_obj:
+        if not doctor_ids or len(doctor_ids) > self.max_doctors:
+            return Response({"error": f"Provide between 1 and {self.max_doctors} doctor ids in 'doctors'."}, status=400)
+        if not 1 <= slot_minutes <= Appointment.MAX_DURATION_MINUTES:
             return Response(
-                {"error": "'start_date' must be before 'end_date'."},
-                status=400
+                {"error": f"'slot_minutes' must be between 1 and {Appointment.MAX_DURATION_MINUTES}."}, status=400
             )
+        if not 1 <= limit <= self.max_limit:
+            return Response({"error": f"'limit' must be between 1 and {self.max_limit}."}, status=400)
+
+        start = self.parse_moment(request.query_params.get('start')) if 'start' in request.query_params else timezone.now()
+        if start is None:
+            return Response({"error": "'start' should be an ISO 8601 date or datetime."}, status=400)
+        end = self.parse_moment(request.query_params.get('end')) if 'end' in request.query_params else start + timedelta(days=14)
+        if end is None:
+            return Response({"error": "'end' should be an ISO 8601 date or datetime."}, status=400)
+        if not start < end <= start + timedelta(days=self.max_days):
+            return Response({"error": f"'end' must be after 'start' and at most {self.max_days} days later."}, status=400)
+
+        known_ids = set(Doctor.objects.filter(id__in=doctor_ids).values_list('id', flat=True))
+        busy = availability.busy_intervals(known_ids, start, end)
+        slot = timedelta(minutes=slot_minutes)
+
+        results = []
+        for doctor_id in dict.fromkeys(doctor_ids):
+            if doctor_id not in known_ids:
+                continue
+            slots = availability.free_slots(busy[doctor_id], start, end, slot, limit)
+            results.append({
+                'doctor': doctor_id,
+                'slots': [{'start': slot_start, 'end': slot_end} for slot_start, slot_end in slots],
+            })
 
+        return Response({'slot_minutes': slot_minutes, 'results': results})
+
+    @staticmethod
+    def parse_moment(value):
+        """
+        Parses an ISO 8601 date or datetime into an aware datetime, or returns None.
+        """
         try:
-            filters = Q(scheduled_at__date__gte=start_date_obj.date(), scheduled_at__date__lte=end_date_obj.date())
-
-            if status:
-                if status.lower() == 'completed':
-                    filters &= Q(is_completed=True)
-                elif status.lower() == 'pending':
-                    filters &= Q(is_completed=False)
-                else:
-                    return Response(
-                        {"error": "Invalid status value. Use 'completed' or 'pending'."},
-                        status=400
-                    )
-
-            if doctor_name:
-                filters &= Q(doctor__user__username__icontains=doctor_name)
-
-            appointment_counts = Appointment.objects.filter(filters) \
-                .annotate(date=TruncDate('scheduled_at')) \
-                .values('date') \
-                .annotate(count=Count('id')) \
-                .order_by('date')
-
-            if not appointment_counts:
-                return Response({"message": "No appointments found for the given criteria."}, status=404)
-
-            data = [
-                {'date': entry['date'], 'appointment_count': entry['count']}
-                for entry in appointment_counts
-            ]
-
-            
-            # paginator = PageNumberPagination()
-            # paginator.page_size = 5  # Set page size to 5 appointments per page
-            # paginated_data = paginator.paginate_queryset(data, request)
-
-            # return paginator.get_paginated_response(paginated_data)
+            moment = parse_datetime(value)
+            if moment is None:
+                day = parse_date(value)
+                if day is None:
+                    return None
+                moment = datetime.combine(day, time.min)
+        except ValueError:
+            return None
+        return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
 
-        except Exception as e:
-            logging.error(f"Unexpected error: {e}")
-            return Response({"error": "An unexpected error occurred. Please try again later."}, status=500)
+
+class AppointmentCacheStatsView(APIView):
+    """
+    View reporting hit/miss statistics of the appointment response cache (admin only).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_stats(CACHED_VIEWS))
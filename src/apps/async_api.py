@@ -0,0 +1,98 @@
+"""
+Base class for the native async read endpoints served under ASGI.
+
+DRF views are synchronous, so under an ASGI server every request to them is
+handed to a worker thread. `AsyncAPIView` handles GET/HEAD on the event loop
+instead: it authenticates with `ClaimsJWTAuthentication.aauthenticate`, runs
+the view's DRF permission classes (which only inspect `request.user` and
+`request.method`) and returns JSON shaped like the DRF responses. Any other
+method is delegated to the equivalent DRF view, so one URL keeps serving writes.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from apps.users.authentication import ClaimsJWTAuthentication
+
+
+class APIJsonResponse(JsonResponse):
+    """
+    JSON response that keeps its payload in `data`, like DRF's Response.
+
+    The versioned response cache stores `data`, so entries written by the sync
+    and async views are interchangeable.
+    """
+
+    def __init__(self, data, status=200, **kwargs):
+        kwargs.setdefault('json_dumps_params', {'separators': (',', ':'), 'ensure_ascii': False})
+        super().__init__(data, encoder=DjangoJSONEncoder, safe=False, status=status, **kwargs)
+        self.data = data
+
+
+class AsyncAPIView(View):
+    """
+    Async view with DRF-compatible authentication, permissions and errors.
+
+    Attributes:
+        permission_classes: DRF permission classes checked before the handler runs.
+        sync_view_class: DRF view that serves every method other than GET and HEAD.
+        response_class: The class used for JSON responses.
+    """
+    authentication_class = ClaimsJWTAuthentication
+    permission_classes = []
+    sync_view_class = None
+    response_class = APIJsonResponse
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token authentication only, as with the DRF views.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            if self.sync_view_class is None:
+                return await self.http_method_not_allowed(request, *args, **kwargs)
+            return await self.delegate(request, *args, **kwargs)
+
+        try:
+            await self.initial(request)
+            return await self.get(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    async def delegate(self, request, *args, **kwargs):
+        """
+        Serves the request with `sync_view_class` in a worker thread.
+        """
+        sync_view = sync_to_async(self.sync_view_class.as_view())
+        return await sync_view(request, *args, **kwargs)
+
+    async def initial(self, request):
+        """
+        Authenticates the request and checks the view's permissions.
+        """
+        authenticator = self.authentication_class()
+        result = await authenticator.aauthenticate(request)
+        request.user, request.auth = result if result is not None else (AnonymousUser(), None)
+
+        for permission in (permission_class() for permission_class in self.permission_classes):
+            if not permission.has_permission(request, self):
+                if request.auth is None:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def handle_exception(self, exc):
+        """
+        Renders an APIException the way DRF's default exception handler does.
+        """
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {'detail': exc.detail}
+        response = self.response_class(data, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response.headers['WWW-Authenticate'] = self.authentication_class().authenticate_header(None)
+        return response
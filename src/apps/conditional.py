@@ -0,0 +1,52 @@
+"""
+Helpers for answering conditional GET requests (ETag / Last-Modified).
+
+Views compute validators from cheap data (primary keys and `updated_at`
+timestamps) before serializing anything, and return a 304 straight away when
+the client's `If-None-Match` / `If-Modified-Since` headers still match.
+"""
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """
+    Builds a weak ETag from the repr of the given parts.
+
+    The tag is weak because the same data may be rendered by different DRF
+    renderers; clients only need to know the content is semantically unchanged.
+    """
+    digest = hashlib.md5(repr(parts).encode('utf-8'), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified_response(request, etag=None, last_modified=None):
+    """
+    Returns a 304 response if the request's validators match, otherwise None.
+
+    Only GET and HEAD requests are answered; other methods always return None.
+
+    Args:
+        request: The DRF or Django request.
+        etag: The current ETag of the resource.
+        last_modified: The current modification datetime of the resource.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag=None, last_modified=None):
+    """
+    Sets the ETag and Last-Modified headers on a response.
+    """
+    if etag:
+        response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
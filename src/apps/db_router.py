@@ -0,0 +1,231 @@
+"""
+Primary/replica database routing.
+
+Writes always go to `default`. Reads go to a replica from
+`REPLICA_DATABASES` only while `ReplicaRoutingMiddleware` is handling a
+safe-method request to one of the `REPLICA_READ_ROUTES` URL names; everything
+else (other endpoints, management commands, the shell) reads from the primary.
+
+Read-after-write consistency:
+
+- once a request writes (`select_for_update` counts as a write), the rest of
+  the request reads from the primary;
+- after a request that writes or uses an unsafe method, the client (the JWT's
+  user, else the session) is pinned to the primary for `REPLICA_PIN_SECONDS`,
+  long enough for replicas to catch up. Pins are kept in the shared cache (see
+  `shared_cache.py`), so they hold whichever worker serves the next request;
+- the appointment response cache does not store responses built from replica
+  reads, which could be stale under the version bumped by a write, and pinned
+  clients bypass its lookups (see `reads_from_replica` and `is_pinned`).
+
+Replicas are probed at most every `REPLICA_HEALTH_CHECK_INTERVAL` seconds; a
+replica that fails the probe is skipped for `REPLICA_RETRY_SECONDS`, and reads
+fall back to the primary when no replica is healthy.
+"""
+import random
+import threading
+import time
+from contextvars import ContextVar
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+from rest_framework_simplejwt.settings import api_settings
+from .shared_cache import get_shared_cache
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Routing state of the request being handled in this context
+_state = ContextVar('healthsync_replica_state', default=None)
+
+
+class ReplicaPool:
+    """
+    Picks a healthy replica, probing each one at most once per check interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._checked_at = {}
+            self._down_until = {}
+
+    def choose(self):
+        """
+        Returns the alias of a random healthy replica, or None if there is none.
+        """
+        healthy = [alias for alias in settings.REPLICA_DATABASES if self.is_healthy(alias)]
+        return random.choice(healthy) if healthy else None
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            if self._down_until.get(alias, 0) > now:
+                return False
+            checked_at = self._checked_at.get(alias)
+        if checked_at is not None and now - checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+            return True
+        healthy = self.probe(alias)
+        with self._lock:
+            self._checked_at[alias] = now
+            if not healthy:
+                self._down_until[alias] = now + settings.REPLICA_RETRY_SECONDS
+        return healthy
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+    @staticmethod
+    def probe(alias):
+        """
+        Returns True if the replica answers and has the schema (an empty SQLite
+        file created on connect does not).
+        """
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+                cursor.fetchone()
+            return True
+        except DatabaseError:
+            connections[alias].close()
+            return False
+
+
+replica_pool = ReplicaPool()
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending reads of replica-eligible requests to a replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state['replica'] is None or state['wrote']:
+            return PRIMARY
+        return state['replica']
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state['wrote'] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
+
+
+def reads_from_replica():
+    """
+    Returns True if the request being handled was assigned a replica.
+    """
+    state = _state.get()
+    return state is not None and state['replica'] is not None
+
+
+def is_pinned():
+    """
+    Returns True if the client of the request being handled is pinned to the primary.
+    """
+    state = _state.get()
+    return state is not None and state['pinned']
+
+
+def client_key(request):
+    """
+    Identifies the client for read-after-write pinning: the user id of a
+    bearer token, else the session key, else None.
+
+    The token signature is not checked here; authentication happens in the
+    view, and a forged token can at most send its own reads to the primary.
+    """
+    header = request.headers.get('Authorization', '')
+    parts = header.split()
+    if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+        try:
+            payload = jwt.decode(parts[1], options={'verify_signature': False})
+        except jwt.InvalidTokenError:
+            payload = {}
+        user_id = payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            return f'user:{user_id}'
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return f'session:{session.session_key}'
+    return None
+
+
+def pin_key(client):
+    return f'replica-pin:{client}'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Marks safe requests to `REPLICA_READ_ROUTES` as replica reads and pins
+    clients to the primary after they write.
+
+    Works in both sync and async stacks. Place it after the session and
+    authentication middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = {'replica': None, 'wrote': False, 'pinned': False}
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.pin_after_write(request, response, state)
+        return response
+
+    async def __acall__(self, request):
+        state = {'replica': None, 'wrote': False, 'pinned': False}
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.pin_after_write(request, response, state)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is None or not settings.REPLICA_DATABASES or request.method not in SAFE_METHODS:
+            return None
+        if request.resolver_match.url_name not in settings.REPLICA_READ_ROUTES:
+            return None
+        client = client_key(request)
+        if client is not None and get_shared_cache().get(pin_key(client)):
+            state['pinned'] = True
+            return None
+        state['replica'] = replica_pool.choose()
+        return None
+
+    @staticmethod
+    def pin_after_write(request, response, state):
+        if not settings.REPLICA_DATABASES:
+            return
+        if state['wrote'] or (request.method not in SAFE_METHODS and response.status_code < 400):
+            client = client_key(request)
+            if client is not None:
+                get_shared_cache().set(pin_key(client), 1, settings.REPLICA_PIN_SECONDS)
+
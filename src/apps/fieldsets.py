@@ -0,0 +1,44 @@
+"""
+Sparse fieldsets: `?fields=id,scheduled_at` limits a response to the named fields.
+
+`parse_fields` validates the parameter against the fields a serializer offers,
+and `SparseFieldsetMixin` makes a serializer drop every other field, so only
+the requested values are converted and, where the view supports it, loaded.
+"""
+
+FIELDS_PARAM = 'fields'
+
+
+def parse_fields(params, allowed, param=FIELDS_PARAM):
+    """
+    Returns the requested field names in `allowed` order, or None if the
+    parameter is absent or empty (meaning all fields).
+
+    Args:
+        params: The request's query parameters.
+        allowed: The field names that may be requested.
+        param: The name of the query parameter.
+
+    Raises:
+        ValueError: With a client-facing message if an unknown field is requested.
+    """
+    requested = {name.strip() for name in params.get(param, '').split(',') if name.strip()}
+    if not requested:
+        return None
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"Unknown {param}: {', '.join(sorted(unknown))}. Use any of: {', '.join(allowed)}.")
+    return tuple(name for name in allowed if name in requested)
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin accepting a `fields` argument: a sequence of field names to
+    keep, or None for all of them.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
@@ -0,0 +1,259 @@
+"""
+Lightweight request metrics exported in the Prometheus text format.
+
+`MetricsMiddleware` records, per route pattern and method, request counts by
+status code, latency and response size histograms, and the number and time of
+SQL queries each request ran. Queries are counted by a database execute
+wrapper installed on every connection; it only does work while a request is
+being measured, and it follows requests into `sync_to_async` threads through a
+context variable, so async views are covered too.
+
+Metrics live in process memory, so each worker reports its own series and
+Prometheus aggregates them. They are served by `metrics_view`, which requires
+either the `METRICS_TOKEN` bearer token or a staff user's JWT.
+"""
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from apps.users.authentication import ClaimsJWTAuthentication
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = '<unmatched>'
+
+# [query count, query seconds] of the request being measured in this context
+_query_stats = ContextVar('healthsync_query_stats', default=None)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus sense.
+
+    Attributes:
+        buckets: Sorted upper bounds; an implicit +Inf bucket follows the last one.
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Yields (upper bound label, cumulative count) pairs including +Inf.
+        """
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield ('+Inf' if bound == float('inf') else repr(bound)), total
+
+
+def _labels(**labels):
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of the request metrics of one process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.latency = {}
+            self.sizes = {}
+            self.queries = {}
+            self.query_seconds = defaultdict(float)
+
+    def observe(self, route, method, status, seconds, size=None, queries=0, query_seconds=0.0):
+        """
+        Records one finished request.
+
+        Args:
+            route: The URL pattern that matched, e.g. 'appointments/appointments/<int:id>/'.
+            method: The HTTP method.
+            status: The response status code.
+            seconds: Time spent producing the response.
+            size: Body size in bytes, or None for streamed responses.
+            queries: Number of SQL queries run.
+            query_seconds: Time spent in those queries.
+        """
+        key = (route, method)
+        with self._lock:
+            self.requests[(route, method, status)] += 1
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.sizes[key] = Histogram(SIZE_BUCKETS)
+                self.queries[key] = Histogram(QUERY_BUCKETS)
+            self.latency[key].observe(seconds)
+            if size is not None:
+                self.sizes[key].observe(size)
+            self.queries[key].observe(queries)
+            self.query_seconds[key] += query_seconds
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP healthsync_http_requests_total Requests by route, method and status code.',
+                '# TYPE healthsync_http_requests_total counter',
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'healthsync_http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+            for name, help_text, histograms in (
+                ('healthsync_http_request_duration_seconds', 'Time spent producing responses.', self.latency),
+                ('healthsync_http_response_size_bytes', 'Size of non-streamed response bodies.', self.sizes),
+                ('healthsync_db_queries_per_request', 'SQL queries run per request.', self.queries),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (route, method), histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{_labels(route=route, method=method, le=bound)} {count}')
+                    labels = _labels(route=route, method=method)
+                    lines.append(f'{name}_sum{labels} {histogram.sum}')
+                    lines.append(f'{name}_count{labels} {histogram.count}')
+
+            lines += [
+                '# HELP healthsync_db_query_duration_seconds_total Time spent in SQL queries.',
+                '# TYPE healthsync_db_query_duration_seconds_total counter',
+            ]
+            for (route, method), seconds in sorted(self.query_seconds.items()):
+                lines.append(f'healthsync_db_query_duration_seconds_total{_labels(route=route, method=method)} {seconds}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper adding each query to the current request's statistics.
+    """
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    # Insert first: `connection.execute_wrapper()` blocks pop the last wrapper on exit.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class MetricsMiddleware:
+    """
+    Records every request in the process `registry`.
+
+    Works in both sync and async stacks. Place it first in MIDDLEWARE so the
+    measured latency covers the other middleware. For streamed responses only
+    the time to the first byte is measured and the size is not recorded.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = [0, 0.0]
+        token = _query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = [0, 0.0]
+        token = _query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    @staticmethod
+    def record(request, response, seconds, stats):
+        match = request.resolver_match
+        registry.observe(
+            route=match.route if match is not None else UNMATCHED_ROUTE,
+            method=request.method,
+            status=response.status_code,
+            seconds=seconds,
+            size=None if response.streaming else len(response.content),
+            queries=stats[0],
+            query_seconds=stats[1],
+        )
+
+
+def metrics_authorized(request):
+    """
+    Returns True for requests bearing `METRICS_TOKEN` or a staff user's JWT.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    header = request.headers.get('Authorization', '')
+    if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        return True
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return False
+    return result is not None and result[0].is_staff
+
+
+def metrics_view(request):
+    """
+    Serves the process metrics to Prometheus.
+    """
+    if not metrics_authorized(request):
+        return HttpResponse('Authentication required.\n', status=401, content_type='text/plain',
+                            headers={'WWW-Authenticate': 'Bearer realm="metrics"'})
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
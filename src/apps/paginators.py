@@ -0,0 +1,59 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids an exact `COUNT(*)` over very large, unfiltered tables.
+
+    When the queryset has no filters the row count is read from the database's
+    table statistics (on SQLite, the `sqlite_stat1` table written by `ANALYZE`).
+    Estimates below `exact_count_threshold`, or tables without statistics, fall
+    back to an exact count, so small tables and filtered changelists are still
+    counted exactly.
+
+    Attributes:
+        exact_count_threshold: Estimated row count under which `COUNT(*)` is used.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where or query.distinct:
+            return super().count
+
+        estimate = self.estimate_table_rows(self.object_list)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+    @staticmethod
+    def estimate_table_rows(queryset):
+        """
+        Returns an approximate row count for the queryset's table, or None if unavailable.
+        """
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s", [table]
+                )
+            elif connection.vendor == 'sqlite':
+                # The highest primary key is no estimate: archiving leaves large gaps below it.
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+                if cursor.fetchone() is None:
+                    return None
+                # Each row's `stat` starts with the table's row count when it was last analyzed.
+                cursor.execute("SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+        if not row or row[0] is None or row[0] < 0:
+            return None
+        return int(row[0])
@@ -0,0 +1,36 @@
+"""
+Cache for state that every worker process must see.
+
+Token revocations, the refresh-token blacklist generation and read-after-write
+replica pins are read by whichever worker serves the next request, so they are
+kept in the `SHARED_CACHE_ALIAS` cache rather than the default one. That cache
+must be shared by all processes: the file-based default works for workers on
+one host; use Redis or Memcached when running on several hosts. A system check
+warns when it is configured with a per-process backend.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Tags, Warning, register
+
+PER_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_shared_cache():
+    return caches[settings.SHARED_CACHE_ALIAS]
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get(settings.SHARED_CACHE_ALIAS, {}).get('BACKEND')
+    if backend in PER_PROCESS_BACKENDS:
+        return [Warning(
+            f"The '{settings.SHARED_CACHE_ALIAS}' cache uses {backend.rsplit('.', 1)[-1]}, which is not shared "
+            "between processes.",
+            hint="Token revocations, blacklist updates and replica pins are then only seen by the worker that "
+                 "recorded them. Use a file-based, Redis or Memcached cache when running several workers.",
+            id='healthsync.W001',
+        )]
+    return []
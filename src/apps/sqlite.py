@@ -0,0 +1,48 @@
+"""
+Support for running HealthSync on SQLite under concurrent load.
+
+SQLite allows a single writer at a time. With the tuned settings enabled by
+`HEALTHSYNC_SQLITE_TUNED` (WAL journaling, a busy timeout and `BEGIN
+IMMEDIATE` transactions, see settings.py) readers no longer block behind
+writers and concurrent writers wait for the lock instead of failing at once.
+`serialized_writes` additionally queues the appointment writes of one process
+on an in-process lock, so threads take turns instead of polling SQLite's file
+lock; `busy_timeout` still arbitrates between worker processes.
+"""
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from rest_framework.exceptions import APIException
+
+# Re-entrant so that writes nested in a serialized section (signal handlers,
+# helpers) do not deadlock.
+_write_lock = threading.RLock()
+
+
+class WriteQueueTimeout(APIException):
+    status_code = 503
+    default_detail = "The server is busy. Please retry the request."
+    default_code = 'write_queue_timeout'
+
+
+@contextmanager
+def serialized_writes():
+    """
+    Runs the enclosed block while holding the process-wide write lock.
+
+    Does nothing unless `SQLITE_SERIALIZE_WRITES` is set and the default
+    database is SQLite. Usable as a decorator.
+
+    Raises:
+        WriteQueueTimeout: If the lock is not acquired within `SQLITE_WRITE_LOCK_TIMEOUT` seconds.
+    """
+    if not settings.SQLITE_SERIALIZE_WRITES or connection.vendor != 'sqlite':
+        yield
+        return
+    if not _write_lock.acquire(timeout=settings.SQLITE_WRITE_LOCK_TIMEOUT):
+        raise WriteQueueTimeout()
+    try:
+        yield
+    finally:
+        _write_lock.release()
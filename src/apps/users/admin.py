@@ -1,6 +1,26 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Doctor, Patient
+from .models import User, Doctor, Patient, SearchToken
+from . import search
+from ..paginators import EstimatedCountPaginator
+
+
+class IndexedSearchMixin:
+    """
+    Answers changelist searches from the SearchToken index (word-prefix
+    matching) instead of `icontains` scans over `search_fields`, which stay
+    declared so the search box is shown.
+
+    Attributes:
+        search_kind: The SearchToken kind of the model's rows.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        matches = search.search(search_term, kinds=[self.search_kind])
+        if matches is None:
+            return queryset, False
+        return queryset.filter(pk__in=matches.values('object_id')), False
 
 # Custom User Admin Configuration
 @admin.register(User)
@@ -25,8 +45,13 @@ class UserAdmin(BaseUserAdmin):
 
 # Register Doctor Model in Admin
 @admin.register(Doctor)
-class DoctorAdmin(admin.ModelAdmin):
+class DoctorAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    search_kind = SearchToken.DOCTOR
     list_display = ('user', 'specialization', 'created_at', 'updated_at')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'specialization')
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
@@ -36,8 +61,13 @@ class DoctorAdmin(admin.ModelAdmin):
 
 # Register Patient Model in Admin
 @admin.register(Patient)
-class PatientAdmin(admin.ModelAdmin):
+class PatientAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    search_kind = SearchToken.PATIENT
     list_display = ('user', 'date_of_birth', 'gender', 'created_at', 'updated_at')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = ('user__username', 'user__first_name', 'user__last_name')
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
@@ -0,0 +1,36 @@
+"""
+Native async version of the profile endpoint, selected with `ASYNC_API_VIEWS`.
+"""
+from ..async_api import AsyncAPIView
+from ..conditional import make_etag, not_modified_response, set_validators
+from ..fieldsets import parse_fields
+from .models import User
+from .serializers import UserSerializer
+from .tokens import ClaimsUser
+from .views import ProfileView
+
+
+class AsyncProfileView(AsyncAPIView):
+    """
+    Async profile retrieval, equivalent to `ProfileView`.
+    """
+    permission_classes = ProfileView.permission_classes
+    sync_view_class = ProfileView
+
+    async def get(self, request):
+        try:
+            fields = parse_fields(request.GET, UserSerializer.Meta.fields)
+        except ValueError as e:
+            return self.response_class({"error": str(e)}, status=400)
+        user = request.user
+        if isinstance(user, ClaimsUser):
+            # Claims-authenticated requests carry no User row; load what is serialized
+            users = User.objects.only('updated_at', *fields) if fields else User.objects
+            user = await users.aget(pk=user.pk)
+
+        etag = make_etag('profile', user.pk, user.updated_at, fields)
+        not_modified = not_modified_response(request, etag=etag, last_modified=user.updated_at)
+        if not_modified is not None:
+            return not_modified
+        response = self.response_class(UserSerializer(user, fields=fields).data)
+        return set_validators(response, etag=etag, last_modified=user.updated_at)
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .tokens import ClaimsUser, ais_revoked, has_role_claims, is_revoked
+
+
+class VerifiedTokenCache:
+    """
+    Bounded, thread-safe LRU cache of already verified tokens keyed by their raw bytes.
+
+    A hit skips signature verification and claim decoding. Entries are dropped
+    once their `exp` claim has passed, so a cached token never outlives its expiry.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, raw_token):
+        with self._lock:
+            token = self._entries.get(raw_token)
+            if token is None:
+                return None
+            if token.get('exp', 0) <= time.time():
+                del self._entries[raw_token]
+                return None
+            self._entries.move_to_end(raw_token)
+            return token
+
+    def put(self, raw_token, token):
+        with self._lock:
+            self._entries[raw_token] = token
+            self._entries.move_to_end(raw_token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(getattr(settings, 'JWT_VERIFIED_TOKEN_CACHE_SIZE', 4096))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that avoids database lookups on the common read path.
+
+    Verified tokens are remembered in a process-local LRU cache, and tokens that
+    carry role claims (see `tokens.add_role_claims`) authenticate as a stateless
+    `ClaimsUser` instead of loading the User row. Tokens without role claims fall
+    back to the regular database lookup. Revocations recorded with
+    `tokens.revoke_user_tokens` are checked on every request.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = verified_tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            verified_tokens.put(raw_token, token)
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if is_revoked(validated_token, user_id):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        if has_role_claims(validated_token):
+            return ClaimsUser(validated_token)
+        return super().get_user(validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of `authenticate` for native async views.
+
+        Token verification is pure computation and runs inline; the revocation
+        check uses the async cache API and the database fallback the async ORM.
+
+        Returns:
+            tuple: (user, validated_token), or None if the request carries no token.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if await ais_revoked(validated_token, user_id):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        if has_role_claims(validated_token):
+            return ClaimsUser(validated_token)
+
+        # Load the profiles up front: lazy relation access is not allowed in async code.
+        try:
+            user = await self.user_model.objects.select_related('doctor', 'patient') \
+                .aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
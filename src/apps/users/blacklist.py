@@ -0,0 +1,216 @@
+"""
+Fast refresh-token blacklist checks backed by an in-process Bloom filter.
+
+Every process keeps a Bloom filter of blacklisted JTIs. A token whose JTI is
+not in the filter is certainly not blacklisted, so the database query is only
+issued for the (rare) filter hits. The filter is refreshed incrementally: each
+new BlacklistedToken bumps a generation counter in the shared cache (see
+`shared_cache.py`), and a check that sees a new generation first loads only the
+rows added since its last sync. Independently of the generation, a filter that
+has not synced for `JWT_BLACKLIST_MAX_SYNC_AGE` seconds loads new rows before
+answering, so a generation bump lost to an unshared or evicted cache can only
+delay a blacklisting by that long.
+"""
+import hashlib
+import math
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..shared_cache import get_shared_cache
+from .tokens import RoleTokenRefreshSerializer
+
+GENERATION_KEY = 'auth:blacklist:generation'
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings using double hashing of a BLAKE2b digest.
+
+    Attributes:
+        capacity: The number of items the filter is sized for.
+        error_rate: The target false-positive rate at capacity.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        """
+        Adds an item; `count` only grows when the item set at least one new bit.
+        """
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+    """
+    Process-local view of the token blacklist used to skip most blacklist queries.
+
+    Attributes:
+        initial_capacity: Minimum number of JTIs the Bloom filter is sized for.
+        sync_overlap_rows: Number of already loaded ids re-read on every sync.
+    """
+    initial_capacity = 100000
+    sync_overlap_rows = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._generation = None
+        self._synced_at = 0.0
+        self.stats = {
+            'checks': 0,
+            'skipped_queries': 0,
+            'database_checks': 0,
+            'blacklisted': 0,
+            'syncs': 0,
+            'check_seconds_total': 0.0,
+            'check_seconds_max': 0.0,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._last_id = 0
+            self._generation = None
+            self._synced_at = 0.0
+
+    def _rebuild(self):
+        rows = BlacklistedToken.objects.count()
+        self._bloom = BloomFilter(max(self.initial_capacity, rows * 2))
+        self._last_id = 0
+        self._load_new_rows()
+
+    def _load_new_rows(self):
+        # Re-read a margin of recent ids: ids are allocated before commit, so a
+        # row may become visible after rows with higher ids were already loaded.
+        rows = BlacklistedToken.objects.filter(id__gt=self._last_id - self.sync_overlap_rows).order_by('id') \
+            .values_list('id', 'token__jti').iterator(chunk_size=5000)
+        for row_id, jti in rows:
+            self._bloom.add(jti)
+            self._last_id = max(self._last_id, row_id)
+        self._synced_at = time.monotonic()
+        self.stats['syncs'] += 1
+
+    def sync(self):
+        """
+        Brings the filter up to date if the blacklist changed since the last sync,
+        or if the last sync is older than `JWT_BLACKLIST_MAX_SYNC_AGE` seconds.
+        """
+        cache = get_shared_cache()
+        cache.add(GENERATION_KEY, 0, timeout=None)
+        generation = cache.get(GENERATION_KEY)
+        with self._lock:
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                self._rebuild()
+            elif (
+                generation is None or generation != self._generation
+                or time.monotonic() - self._synced_at > settings.JWT_BLACKLIST_MAX_SYNC_AGE
+            ):
+                self._load_new_rows()
+            self._generation = generation
+
+    def might_contain(self, jti):
+        self.sync()
+        return jti in self._bloom
+
+    def check(self, jti):
+        """
+        Raises TokenError if the JTI is blacklisted, querying the database only on filter hits.
+        """
+        started = time.perf_counter()
+        try:
+            if not self.might_contain(jti):
+                self.stats['skipped_queries'] += 1
+                return
+            self.stats['database_checks'] += 1
+            if BlacklistedToken.objects.filter(token__jti=jti).exists():
+                self.stats['blacklisted'] += 1
+                raise TokenError(_("Token is blacklisted"))
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats['checks'] += 1
+            self.stats['check_seconds_total'] += elapsed
+            self.stats['check_seconds_max'] = max(self.stats['check_seconds_max'], elapsed)
+
+    def metrics(self):
+        """
+        Returns check counters, latency and the current blacklist table sizes.
+        """
+        checks = self.stats['checks']
+        return {
+            **self.stats,
+            'check_seconds_avg': self.stats['check_seconds_total'] / checks if checks else None,
+            'bloom_items': self._bloom.count if self._bloom else 0,
+            'outstanding_tokens': OutstandingToken.objects.count(),
+            'blacklisted_tokens': BlacklistedToken.objects.count(),
+        }
+
+
+blacklist_filter = BlacklistFilter()
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def bump_blacklist_generation(sender, created=False, **kwargs):
+    """
+    Signals every process that its Bloom filter must load newly blacklisted rows.
+    """
+    if not created:
+        return
+    # Bump again on commit so processes that synced before the row was visible reload it.
+    _bump_generation()
+    transaction.on_commit(_bump_generation)
+
+
+def _bump_generation():
+    cache = get_shared_cache()
+    cache.add(GENERATION_KEY, 0, timeout=None)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+class BloomCheckedRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist check goes through the process Bloom filter.
+    """
+
+    def check_blacklist(self):
+        blacklist_filter.check(self.payload[api_settings.JTI_CLAIM])
+
+
+class BloomCheckedTokenRefreshSerializer(RoleTokenRefreshSerializer):
+    """
+    Role-claims refresh serializer using `BloomCheckedRefreshToken`.
+    """
+    token_class = BloomCheckedRefreshToken
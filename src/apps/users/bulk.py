@@ -0,0 +1,194 @@
+"""
+Bulk user onboarding from CSV or JSON.
+
+Rows are validated in Python, usernames are checked against the database with
+one query per chunk, passwords are hashed, and users and their Doctor/Patient
+profiles are inserted with `bulk_create`, one transaction per chunk.
+
+Hashing is CPU-bound and dominates the cost of creating a user. Imports through
+the API are capped at BULK_IMPORT_MAX_ITEMS users and hashed in the request
+thread; the `import_users` management command, which has no such cap, can hash
+in a process pool instead.
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from . import search
+from .models import Doctor, Patient, SearchToken, User
+from .serializers import UserImportSerializer
+
+# Users accepted by one API import; larger files go through `manage.py import_users`.
+BULK_IMPORT_MAX_ITEMS = 100
+BULK_IMPORT_BATCH_SIZE = 500
+
+# Below this many passwords, starting worker processes costs more than it saves.
+PARALLEL_HASHING_THRESHOLD = 8
+
+
+def read_rows(content, fmt):
+    """
+    Parses an import file into a list of row dictionaries.
+
+    Empty CSV cells are dropped, so optional fields may be left blank.
+
+    Args:
+        content: The file content (str or bytes).
+        fmt: 'csv' or 'json'. JSON must be a list of objects.
+
+    Raises:
+        ValueError: If the content cannot be parsed.
+    """
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if fmt == 'csv':
+        return [
+            {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+            for row in csv.DictReader(io.StringIO(content))
+        ]
+    if fmt == 'json':
+        rows = json.loads(content)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("A JSON import must be a list of objects.")
+        return rows
+    raise ValueError("Unsupported format. Use 'csv' or 'json'.")
+
+
+def _init_worker():
+    # Worker processes started with 'spawn' do not inherit the configured app registry.
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hashes passwords with the default hasher, in parallel for large inputs.
+
+    Only the `import_users` management command should ask for several workers:
+    web requests hash in their own thread rather than starting processes.
+
+    Args:
+        passwords: Plain-text passwords.
+        workers: Number of worker processes (1 hashes in the calling thread);
+            None uses the CPU count.
+
+    Returns:
+        list: The hashes, in input order.
+    """
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if workers == 1 or len(passwords) < PARALLEL_HASHING_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+def _build(data, password_hash):
+    user = User(
+        username=data['username'],
+        email=data['email'],
+        first_name=data['first_name'],
+        last_name=data['last_name'],
+        phone_number=data['phone_number'],
+        is_doctor=data['is_doctor'],
+        is_patient=data['is_patient'],
+        password=password_hash,
+    )
+    return user
+
+
+def _insert(rows):
+    """
+    Inserts (index, data, user) rows and their profiles in one transaction.
+    """
+    with transaction.atomic():
+        users = User.objects.bulk_create([user for _, _, user in rows])
+        doctors = Doctor.objects.bulk_create([
+            Doctor(user=user, specialization=data['specialization'])
+            for (_, data, _), user in zip(rows, users) if data['is_doctor']
+        ])
+        patients = Patient.objects.bulk_create([
+            Patient(user=user, date_of_birth=data['date_of_birth'], gender=data['gender'])
+            for (_, data, _), user in zip(rows, users) if data['is_patient']
+        ])
+        # bulk_create skips the signal handlers that maintain the search index.
+        search.index_profiles(SearchToken.DOCTOR, doctors)
+        search.index_profiles(SearchToken.PATIENT, patients)
+    return users
+
+
+def import_users(rows, all_or_nothing=False, workers=1, batch_size=BULK_IMPORT_BATCH_SIZE):
+    """
+    Validates and creates users, with their Doctor/Patient profiles, from row dictionaries.
+
+    Args:
+        rows: A list of dictionaries accepted by `UserImportSerializer`.
+        all_or_nothing: When True, nothing is created if any row is invalid.
+        workers: Number of password hashing processes. The default hashes in
+            the calling thread; None uses the CPU count.
+        batch_size: Users inserted per transaction.
+
+    Returns:
+        tuple: The list of created User instances and a list of
+        `{'index': ..., 'errors': ...}` dictionaries for rejected rows.
+    """
+    errors = []
+    candidates = []
+    seen = set()
+    for index, row in enumerate(rows):
+        serializer = UserImportSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({'index': index, 'errors': serializer.errors})
+            continue
+        username = serializer.validated_data['username']
+        if username in seen:
+            errors.append({'index': index, 'errors': {'username': ["Duplicate username in this import."]}})
+            continue
+        seen.add(username)
+        candidates.append((index, serializer.validated_data))
+
+    taken = set()
+    names = [data['username'] for _, data in candidates]
+    for start in range(0, len(names), batch_size):
+        taken.update(User.objects.filter(username__in=names[start:start + batch_size]).values_list('username', flat=True))
+    valid = []
+    for index, data in candidates:
+        if data['username'] in taken:
+            errors.append({'index': index, 'errors': {'username': ["A user with that username already exists."]}})
+        else:
+            valid.append((index, data))
+
+    if not valid or (all_or_nothing and errors):
+        errors.sort(key=lambda error: error['index'])
+        return [], errors
+
+    hashes = hash_passwords([data['password'] for _, data in valid], workers=workers)
+    prepared = [(index, data, _build(data, password_hash)) for (index, data), password_hash in zip(valid, hashes)]
+
+    created = []
+    if all_or_nothing:
+        with transaction.atomic():
+            for start in range(0, len(prepared), batch_size):
+                created += _insert(prepared[start:start + batch_size])
+        return created, errors
+
+    for start in range(0, len(prepared), batch_size):
+        chunk = prepared[start:start + batch_size]
+        try:
+            created += _insert(chunk)
+        except IntegrityError:
+            # A username was taken concurrently; retry the chunk row by row to
+            # isolate the failing rows.
+            for index, data, user in chunk:
+                user.pk = None
+                try:
+                    created += _insert([(index, data, user)])
+                except IntegrityError:
+                    errors.append({'index': index, 'errors': {'username': ["A user with that username already exists."]}})
+    errors.sort(key=lambda error: error['index'])
+    return created, errors
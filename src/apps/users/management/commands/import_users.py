@@ -0,0 +1,46 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from apps.users.bulk import BULK_IMPORT_BATCH_SIZE, import_users, read_rows
+
+
+class Command(BaseCommand):
+    """
+    Imports users, with optional Doctor/Patient profiles, from a CSV or JSON file.
+
+    Unlike the API, which caps imports at BULK_IMPORT_MAX_ITEMS users, any
+    number of rows is accepted. Passwords are hashed in a process pool (one
+    process per CPU unless `--workers` is given) and rows are inserted with
+    `bulk_create`, one transaction per `--batch-size` users. Rejected rows are
+    listed with their index and errors; the others are still created unless
+    `--atomic` is given.
+    """
+    help = "Bulk import users from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON file to import.")
+        parser.add_argument('--format', choices=['csv', 'json'], default=None,
+                            help="File format (default: taken from the extension).")
+        parser.add_argument('--atomic', action='store_true', help="Create nothing if any row is invalid.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Password hashing processes (default: CPU count).")
+        parser.add_argument('--batch-size', type=int, default=BULK_IMPORT_BATCH_SIZE, help="Users per transaction.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        try:
+            with open(options['path'], 'rb') as f:
+                rows = read_rows(f.read(), fmt)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        started = time.perf_counter()
+        created, errors = import_users(
+            rows, all_or_nothing=options['atomic'], workers=options['workers'], batch_size=options['batch_size'],
+        )
+        for error in errors:
+            self.stderr.write(f"Row {error['index']}: {error['errors']}")
+        self.stdout.write(
+            f"Created {len(created)} of {len(rows)} users in {time.perf_counter() - started:.2f}s "
+            f"({len(errors)} rejected)."
+        )
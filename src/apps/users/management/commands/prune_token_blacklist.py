@@ -0,0 +1,55 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    """
+    Deletes expired outstanding and blacklisted refresh tokens in small batches.
+
+    Unlike simplejwt's `flushexpiredtokens`, which removes every expired row in a
+    single DELETE, each batch here is its own short transaction so the token
+    tables are never locked for long. Meant to be run periodically (e.g. cron).
+    """
+    help = "Prune expired rows from the JWT outstanding/blacklisted token tables in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per transaction.")
+        parser.add_argument('--sleep', type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument('--max-batches', type=int, default=None, help="Stop after this many batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows are expired.")
+
+    def handle(self, *args, **options):
+        now = aware_utcnow()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now)
+        self.stdout.write(
+            f"Before: outstanding={OutstandingToken.objects.count()} blacklisted={BlacklistedToken.objects.count()}"
+        )
+        if options['dry_run']:
+            self.stdout.write(f"Expired outstanding tokens: {expired.count()}")
+            return
+
+        deleted_outstanding = deleted_blacklisted = batches = 0
+        started = time.perf_counter()
+        while options['max_batches'] is None or batches < options['max_batches']:
+            # Walk the primary key so every batch is a short index range scan.
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                deleted_blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                deleted_outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+            batches += 1
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted_outstanding} outstanding and {deleted_blacklisted} blacklisted tokens "
+            f"in {batches} batches ({elapsed:.2f}s)."
+        ))
+        self.stdout.write(
+            f"After: outstanding={OutstandingToken.objects.count()} blacklisted={BlacklistedToken.objects.count()}"
+        )
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.users import search
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the doctor and patient search index from the Doctor and Patient tables.
+
+    The index is maintained by signal handlers; this command repairs it after
+    writes that bypass them (raw SQL, fixtures, queryset updates).
+    """
+    help = "Rebuild the doctor/patient search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Profiles indexed per batch.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt search index with {written} rows in {time.perf_counter() - started:.2f}s."
+        ))
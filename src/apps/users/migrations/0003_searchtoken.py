@@ -0,0 +1,79 @@
+# Generated by Django 5.1.1 on 2026-10-17 07:03
+
+import re
+import unicodedata
+from django.db import migrations, models
+
+# A frozen copy of the tokenizer in apps.users.search as of this migration, so
+# that later changes to it do not change what this migration writes.
+FIELD_WEIGHTS = {
+    'doctor': {'last_name': 4, 'first_name': 3, 'username': 2, 'specialization': 1},
+    'patient': {'last_name': 4, 'first_name': 3, 'username': 2, 'phone_number': 1},
+}
+MAX_TOKEN_LENGTH = 32
+WORD = re.compile(r'\w+')
+BATCH_SIZE = 1000
+
+
+def normalize(text):
+    if not text:
+        return []
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return [word[:MAX_TOKEN_LENGTH] for word in WORD.findall(stripped.casefold())]
+
+
+def document_tokens(kind, values):
+    tokens = {}
+    for field, weight in FIELD_WEIGHTS[kind].items():
+        for token in normalize(values.get(field)):
+            tokens[token] = max(weight, tokens.get(token, 0))
+    return tokens
+
+
+def populate_index(apps, schema_editor):
+    Doctor = apps.get_model('users', 'Doctor')
+    Patient = apps.get_model('users', 'Patient')
+    SearchToken = apps.get_model('users', 'SearchToken')
+    for kind, model, extra in (('doctor', Doctor, 'specialization'), ('patient', Patient, 'user__phone_number')):
+        profiles = model.objects.order_by('id').values('id', 'user__username', 'user__first_name', 'user__last_name', extra)
+        rows = []
+        for profile in profiles.iterator(chunk_size=BATCH_SIZE):
+            values = {
+                'username': profile['user__username'],
+                'first_name': profile['user__first_name'],
+                'last_name': profile['user__last_name'],
+                extra.replace('user__', ''): profile[extra],
+            }
+            rows += [
+                SearchToken(kind=kind, object_id=profile['id'], token=token, weight=weight)
+                for token, weight in document_tokens(kind, values).items()
+            ]
+            if len(rows) >= BATCH_SIZE:
+                SearchToken.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+                rows = []
+        SearchToken.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('doctor', 'Doctor'), ('patient', 'Patient')], max_length=7)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('token', models.CharField(max_length=32)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'kind', 'object_id'], name='search_token_idx'), models.Index(fields=['kind', 'object_id'], name='search_kind_object_idx')],
+            },
+        ),
+        migrations.RunPython(populate_index, migrations.RunPython.noop),
+    ]
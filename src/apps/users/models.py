@@ -14,10 +14,12 @@ class User(AbstractUser):
         is_doctor: A boolean flag indicating whether the user is a doctor.
         is_patient: A boolean flag indicating whether the user is a patient.
         phone_number: An optional field to store the user's phone number.
+        updated_at: Timestamp of the last save, used to validate cached profiles.
     """
     is_doctor = models.BooleanField(default=False)
     is_patient = models.BooleanField(default=False)
     phone_number = models.CharField(max_length=15, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         """
@@ -108,3 +110,40 @@ class Patient(TimeStampedModel):
             str: A string describing the patient, their gender, and their birth date.
         """
         return f"{self.user.username} ({self.get_gender_display()}), born on {self.date_of_birth.strftime('%b %d, %Y')}"
+
+
+class SearchToken(models.Model):
+    """
+    One normalized word of a doctor's or patient's searchable fields.
+
+    Rows are maintained by the signal handlers in `signals.py` (see `search.py`)
+    so that name lookups are index range scans on `token` instead of
+    leading-wildcard `LIKE` scans over the joined user columns. The
+    `rebuild_search_index` command recomputes the table.
+
+    Attributes:
+        kind: Whether `object_id` is a Doctor or a Patient id.
+        object_id: The id of the indexed Doctor or Patient.
+        token: A lower-cased, accent-stripped word (at most 32 characters).
+        weight: How strongly a match on this word ranks the result.
+    """
+    DOCTOR = 'doctor'
+    PATIENT = 'patient'
+    KIND_CHOICES = [
+        (DOCTOR, 'Doctor'),
+        (PATIENT, 'Patient'),
+    ]
+
+    kind = models.CharField(max_length=7, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    token = models.CharField(max_length=32)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['token', 'kind', 'object_id'], name='search_token_idx'),
+            models.Index(fields=['kind', 'object_id'], name='search_kind_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.kind} {self.object_id}"
@@ -0,0 +1,211 @@
+"""
+Prefix search over doctors and patients backed by the SearchToken table.
+
+Every searchable field (names, username, specialization, phone number) is
+split into normalized words which are stored with a weight. A query is split
+the same way and each of its words must be a prefix of some stored word of
+the result. Prefix matches are B-tree range scans on the token index and at
+most MAX_CANDIDATES profiles are scored per query, so lookups stay fast however
+many patients there are. Results are ranked by the sum of the weights of the
+matched words, with exact word matches counting double.
+"""
+import re
+import unicodedata
+from functools import reduce
+from operator import add
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, When
+from .models import Doctor, Patient, SearchToken
+
+MAX_TOKEN_LENGTH = 32
+MAX_QUERY_TERMS = 5
+
+# Profiles scored per query; results beyond the first MAX_CANDIDATES matches of
+# the most selective word are not returned.
+MAX_CANDIDATES = 1000
+
+# Upper bound for prefix range scans: sorts after every string starting with the prefix.
+PREFIX_END = '\U0010ffff'
+
+# Field -> weight of its words in the ranking
+FIELD_WEIGHTS = {
+    SearchToken.DOCTOR: {'last_name': 4, 'first_name': 3, 'username': 2, 'specialization': 1},
+    SearchToken.PATIENT: {'last_name': 4, 'first_name': 3, 'username': 2, 'phone_number': 1},
+}
+
+# User fields whose changes require reindexing the user's profiles
+USER_FIELDS = {'username', 'first_name', 'last_name', 'phone_number'}
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    """
+    Splits text into lower-cased words with accents removed.
+
+    Example: "José O'Brien" -> ['jose', 'o', 'brien'].
+    """
+    if not text:
+        return []
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return [word[:MAX_TOKEN_LENGTH] for word in _WORD.findall(stripped.casefold())]
+
+
+def document_tokens(kind, values):
+    """
+    Returns {token: weight} for a doctor or patient.
+
+    Args:
+        kind: SearchToken.DOCTOR or SearchToken.PATIENT.
+        values: Mapping of the fields in FIELD_WEIGHTS[kind] to their values.
+    """
+    tokens = {}
+    for field, weight in FIELD_WEIGHTS[kind].items():
+        for token in normalize(values.get(field)):
+            tokens[token] = max(weight, tokens.get(token, 0))
+    return tokens
+
+
+def _values(kind, profile):
+    user = profile.user
+    values = {
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+    }
+    if kind == SearchToken.DOCTOR:
+        values['specialization'] = profile.specialization
+    else:
+        values['phone_number'] = user.phone_number
+    return values
+
+
+def index_profiles(kind, profiles, batch_size=1000):
+    """
+    Replaces the index entries of the given doctors or patients.
+
+    Args:
+        kind: SearchToken.DOCTOR or SearchToken.PATIENT.
+        profiles: Doctor or Patient instances with their `user` loaded.
+        batch_size: Rows inserted per statement.
+    """
+    profiles = list(profiles)
+    with transaction.atomic():
+        for start in range(0, len(profiles), batch_size):
+            chunk = profiles[start:start + batch_size]
+            SearchToken.objects.filter(kind=kind, object_id__in=[profile.pk for profile in chunk]).delete()
+            SearchToken.objects.bulk_create(
+                [
+                    SearchToken(kind=kind, object_id=profile.pk, token=token, weight=weight)
+                    for profile in chunk
+                    for token, weight in document_tokens(kind, _values(kind, profile)).items()
+                ],
+                batch_size=batch_size,
+            )
+
+
+def remove_profile(kind, object_id):
+    SearchToken.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def reindex_user(user):
+    """
+    Reindexes the Doctor and Patient profiles of a user.
+    """
+    index_profiles(SearchToken.DOCTOR, Doctor.objects.filter(user=user).select_related('user'))
+    index_profiles(SearchToken.PATIENT, Patient.objects.filter(user=user).select_related('user'))
+
+
+def rebuild(batch_size=1000):
+    """
+    Recomputes the whole index from the Doctor and Patient tables.
+
+    Returns:
+        int: The number of index rows written.
+    """
+    with transaction.atomic():
+        SearchToken.objects.all().delete()
+        for kind, model in ((SearchToken.DOCTOR, Doctor), (SearchToken.PATIENT, Patient)):
+            batch = []
+            for profile in model.objects.select_related('user').iterator(chunk_size=batch_size):
+                batch.append(profile)
+                if len(batch) == batch_size:
+                    index_profiles(kind, batch, batch_size)
+                    batch = []
+            index_profiles(kind, batch, batch_size)
+    return SearchToken.objects.count()
+
+
+def search(query, kinds=None):
+    """
+    Returns a ranked queryset of matches for a free-text query.
+
+    Every word of the query must prefix-match a word of the result. To keep
+    very common prefixes cheap, candidates are taken from the query's most
+    selective word only: its first MAX_CANDIDATES index entries in token order,
+    which puts exact and shortest completions first. The candidates' words are
+    then scored in one grouped query. The queryset yields dictionaries with
+    `kind`, `object_id` and `score`, best first; slice it to paginate.
+
+    Args:
+        query: The text typed by the user.
+        kinds: The profile kinds to search (default: doctors and patients).
+
+    Returns:
+        QuerySet or None: None when the query has no searchable words.
+    """
+    terms = list(dict.fromkeys(normalize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    kinds = kinds or [SearchToken.DOCTOR, SearchToken.PATIENT]
+
+    prefixes = {term: Q(token__gte=term, token__lt=term + PREFIX_END) for term in terms}
+    matching = {term: SearchToken.objects.filter(prefixes[term], kind__in=kinds) for term in terms}
+    rarest = terms[0]
+    if len(terms) > 1:
+        # Each count stops after MAX_CANDIDATES + 1 index entries.
+        rarest = min(terms, key=lambda term: matching[term].order_by()[:MAX_CANDIDATES + 1].count())
+
+    candidates = {kind: [] for kind in kinds}
+    for kind, object_id in matching[rarest].order_by('token').values_list('kind', 'object_id')[:MAX_CANDIDATES]:
+        candidates[kind].append(object_id)
+    restrict = Q(pk__in=[])
+    for kind, ids in candidates.items():
+        if ids:
+            restrict |= Q(kind=kind, object_id__in=ids)
+
+    scores = {
+        f'term_{position}': Max(Case(
+            When(token=term, then=F('weight') * 2),
+            When(prefixes[term], then=F('weight')),
+            default=0,
+            output_field=IntegerField(),
+        ))
+        for position, term in enumerate(terms)
+    }
+    score = reduce(add, (F(name) for name in scores))
+    return SearchToken.objects.filter(restrict) \
+        .values('kind', 'object_id') \
+        .annotate(**scores) \
+        .filter(**{f'{name}__gt': 0 for name in scores}) \
+        .annotate(score=score) \
+        .values('kind', 'object_id', 'score') \
+        .order_by('-score', 'kind', 'object_id')
+
+
+def load_profiles(rows):
+    """
+    Returns the Doctor and Patient instances for search result rows, in order.
+    """
+    ids = {SearchToken.DOCTOR: [], SearchToken.PATIENT: []}
+    for row in rows:
+        ids[row['kind']].append(row['object_id'])
+    profiles = {
+        SearchToken.DOCTOR: Doctor.objects.select_related('user').in_bulk(ids[SearchToken.DOCTOR]),
+        SearchToken.PATIENT: Patient.objects.select_related('user').in_bulk(ids[SearchToken.PATIENT]),
+    }
+    return [
+        (row, profiles[row['kind']][row['object_id']])
+        for row in rows if row['object_id'] in profiles[row['kind']]
+    ]
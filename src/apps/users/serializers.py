@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError as DjangoValidationError
+from ..fieldsets import SparseFieldsetMixin
+from .models import User, Patient
 from django.contrib.auth.password_validation import validate_password
 
 
@@ -52,24 +55,25 @@ class RegisterSerializer(serializers.ModelSerializer):
         Returns:
             user: The newly created user instance.
         """
-        user = User.objects.create(
+        user = User(
             username=validated_data['username'],
             email=validated_data['email'],
             is_doctor=validated_data['is_doctor'],
             is_patient=validated_data['is_patient']
         )
         user.set_password(validated_data['password'])
-        user.save()
+        user.save()  # Single INSERT with the hashed password
         return user
 
 
 # Serializer for retrieving/updating user profile
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for retrieving and updating a user's profile.
     
     This serializer is used to return or update the user's profile details, including 
     their username, email, personal information, and whether they are a doctor or patient.
+    Pass `fields` to render only some fields.
     
     Attributes:
         id: The unique identifier for the user.
@@ -84,3 +88,52 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'phone_number', 'is_doctor', 'is_patient']
+
+
+# Serializer for one row of a bulk user import
+class UserImportSerializer(serializers.Serializer):
+    """
+    Validates one user of a bulk import, optionally with a Doctor or Patient profile.
+
+    Username uniqueness is checked for the whole import at once by
+    `bulk.import_users`, not per row.
+
+    Attributes:
+        specialization: Required when `is_doctor` is set.
+        date_of_birth: Required when `is_patient` is set.
+        gender: Required when `is_patient` is set.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+    password = serializers.CharField(write_only=True)
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    phone_number = serializers.CharField(max_length=15, required=False, allow_null=True, default=None)
+    is_doctor = serializers.BooleanField(default=False)
+    is_patient = serializers.BooleanField(default=False)
+    specialization = serializers.CharField(max_length=100, required=False)
+    date_of_birth = serializers.DateField(required=False)
+    gender = serializers.ChoiceField(choices=Patient.GENDER_CHOICES, required=False)
+
+    def validate(self, attrs):
+        """
+        Checks that profile fields are present for the requested roles and that
+        the password passes the configured validators.
+
+        Raises:
+            serializers.ValidationError: With per-field messages.
+        """
+        errors = {}
+        if attrs['is_doctor'] and not attrs.get('specialization'):
+            errors['specialization'] = ["This field is required for doctors."]
+        if attrs['is_patient']:
+            for field in ('date_of_birth', 'gender'):
+                if not attrs.get(field):
+                    errors[field] = ["This field is required for patients."]
+        try:
+            validate_password(attrs['password'], user=User(username=attrs['username'], email=attrs['email']))
+        except DjangoValidationError as e:
+            errors['password'] = list(e.messages)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
@@ -0,0 +1,92 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from . import search
+from .models import Doctor, Patient, SearchToken, User
+from .tokens import revoke_user_tokens
+
+
+# User fields whose change invalidates the user's tokens
+REVOKING_FIELDS = ('password', 'is_active', 'is_staff', 'is_superuser')
+
+
+@receiver(pre_save, sender=User)
+def detect_credential_changes(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Flags saves that deactivate the user, change their password or change their
+    staff or superuser status, since tokens authenticated from role claims never
+    re-read the User row.
+    """
+    instance._revoke_tokens = False
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(REVOKING_FIELDS) & set(update_fields):
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list(*REVOKING_FIELDS).first()
+    if previous is None:
+        return
+    password, is_active, is_staff, is_superuser = previous
+    instance._revoke_tokens = (
+        password != instance.password
+        or (is_active and not instance.is_active)
+        or (is_staff, is_superuser) != (instance.is_staff, instance.is_superuser)
+    )
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_credential_change(sender, instance, raw=False, **kwargs):
+    """
+    Revokes the user's outstanding access tokens after a flagged save.
+    """
+    if getattr(instance, '_revoke_tokens', False):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Doctor)
+@receiver(post_delete, sender=Patient)
+def revoke_tokens_on_profile_change(sender, instance, created=True, raw=False, **kwargs):
+    """
+    Revokes the user's access tokens when a doctor or patient profile is added
+    or removed, since their `doctor_id`/`patient_id` claims no longer match.
+    Users without issued tokens, like those just registering, are skipped.
+    """
+    if raw or not created:
+        return
+    if OutstandingToken.objects.filter(user_id=instance.user_id).exists():
+        revoke_user_tokens(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def reindex_user_profiles(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Refreshes the search index entries of a doctor or patient whose name,
+    username or phone number may have changed.
+    """
+    if raw or not (instance.is_doctor or instance.is_patient):
+        return
+    if update_fields is not None and not search.USER_FIELDS & set(update_fields):
+        return
+    search.reindex_user(instance)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Patient)
+def index_profile(sender, instance, raw=False, **kwargs):
+    """
+    Indexes a saved doctor or patient for search.
+    """
+    if raw:
+        return
+    kind = SearchToken.DOCTOR if sender is Doctor else SearchToken.PATIENT
+    search.index_profiles(kind, [instance])
+
+
+@receiver(post_delete, sender=Doctor)
+@receiver(post_delete, sender=Patient)
+def unindex_profile(sender, instance, **kwargs):
+    """
+    Removes a deleted doctor or patient from the search index.
+    """
+    search.remove_profile(SearchToken.DOCTOR if sender is Doctor else SearchToken.PATIENT, instance.pk)
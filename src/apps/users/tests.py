@@ -1,3 +1,534 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from ..shared_cache import check_shared_cache, get_shared_cache
+from .authentication import VerifiedTokenCache, verified_tokens
+from .blacklist import BlacklistFilter, BloomFilter, blacklist_filter
+from .bulk import BULK_IMPORT_MAX_ITEMS, PARALLEL_HASHING_THRESHOLD, hash_passwords, import_users
+from . import search
+from .models import User, Doctor, Patient, SearchToken
 
-# Create your tests here.
+
+class ProfileAdminQueryTests(TestCase):
+    """
+    Test suite checking that the doctor and patient changelists run in a bounded number of queries.
+    """
+
+    def setUp(self):
+        """
+        Log in as a superuser.
+        """
+        self.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword', email='admin@test.com'
+        )
+        self.client.force_login(self.admin_user)
+
+    def create_profiles(self, count):
+        """
+        Create `count` doctors and `count` patients.
+        """
+        offset = Doctor.objects.count()
+        for i in range(offset, offset + count):
+            Doctor.objects.create(
+                user=User.objects.create_user(username=f'doctor{i}', password='x', is_doctor=True),
+                specialization='Cardiology'
+            )
+            Patient.objects.create(
+                user=User.objects.create_user(username=f'patient{i}', password='x', is_patient=True),
+                date_of_birth='1990-01-01',
+                gender='M'
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_changelist_query_counts_do_not_grow_with_rows(self):
+        """
+        Ensure rendering more doctors and patients does not add per-row queries.
+        """
+        for name in ('admin:users_doctor_changelist', 'admin:users_patient_changelist'):
+            with self.subTest(changelist=name):
+                self.create_profiles(2)
+                few = self.count_queries(reverse(name))
+                self.create_profiles(10)
+                many = self.count_queries(reverse(name))
+                self.assertEqual(few, many)
+
+
+class ProfileConditionalGetTests(TestCase):
+    """
+    Test suite for ETag / Last-Modified handling on the profile endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='patient', password='patientpassword', is_patient=True)
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def test_profile_returns_304_until_user_changes(self):
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        response = self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.user.first_name = 'Pat'
+        self.user.save()
+        response = self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['first_name'], 'Pat')
+
+    def test_profile_sparse_fieldset(self):
+        response = self.client.get(reverse('profile'), {'fields': 'username,id'})
+        self.assertEqual(response.data, {'id': self.user.id, 'username': 'patient'})
+        full_etag = self.client.get(reverse('profile')).headers['ETag']
+        self.assertNotEqual(response.headers['ETag'], full_etag)
+        response = self.client.get(reverse('profile'), {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    """
+    Test suite for role claims in issued tokens and claims-based authentication.
+    """
+
+    def setUp(self):
+        """
+        Create a doctor user with a profile and obtain tokens through the token endpoint.
+        """
+        cache.clear()
+        get_shared_cache().clear()
+        verified_tokens.clear()
+        self.doctor_user = User.objects.create_user(username='doctor', password='doctorpassword', is_doctor=True)
+        self.doctor = Doctor.objects.create(user=self.doctor_user, specialization='Cardiology')
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'doctor', 'password': 'doctorpassword'})
+        self.assertEqual(response.status_code, 200)
+        self.access = response.data['access']
+        self.refresh = response.data['refresh']
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.access)
+
+    def refresh_access(self):
+        response = APIClient().post(reverse('token_refresh'), {'refresh': self.refresh})
+        if response.status_code == 200:
+            self.access, self.refresh = response.data['access'], response.data['refresh']
+            self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.access)
+        return response
+
+    def test_access_token_carries_role_claims(self):
+        token = AccessToken(self.access)
+        self.assertEqual(token['doctor_id'], self.doctor.id)
+        self.assertIsNone(token['patient_id'])
+        self.assertFalse(token['is_staff'])
+
+    def test_doctor_read_path_skips_user_and_doctor_lookups(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('appointment-list'))
+        self.assertEqual(response.status_code, 200)
+        tables = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('"users_user"', tables)
+        self.assertNotIn('"users_doctor"', tables)
+
+    def test_verified_tokens_are_cached(self):
+        self.client.get(reverse('appointment-list'))
+        with mock.patch('rest_framework_simplejwt.authentication.JWTAuthentication.get_validated_token') as verify:
+            response = self.client.get(reverse('appointment-list'))
+        self.assertEqual(response.status_code, 200)
+        verify.assert_not_called()
+
+    def test_tokens_without_claims_fall_back_to_database_user(self):
+        refresh = RefreshToken.for_user(self.doctor_user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'doctor')
+
+    def test_deactivated_user_tokens_are_revoked(self):
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+        self.doctor_user.is_active = False
+        self.doctor_user.save()
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+
+    def test_deactivated_users_cannot_refresh_after_the_marker_expires(self):
+        self.doctor_user.is_active = False
+        self.doctor_user.save()
+        get_shared_cache().clear()
+        self.assertEqual(self.refresh_access().status_code, 401)
+
+    def test_refresh_rederives_role_claims(self):
+        stats_url = reverse('appointment-cache-stats')
+        self.doctor_user.is_staff = True
+        self.doctor_user.save()
+        self.assertEqual(self.client.get(stats_url).status_code, 401)
+        # Refreshing within the same second as the revocation yields a working token.
+        self.assertEqual(self.refresh_access().status_code, 200)
+        self.assertEqual(self.client.get(stats_url).status_code, 200)
+
+        self.doctor_user.is_staff = False
+        self.doctor_user.save()
+        self.assertEqual(self.client.get(stats_url).status_code, 401)
+        self.assertEqual(self.refresh_access().status_code, 200)
+        self.assertEqual(self.client.get(stats_url).status_code, 403)
+
+    def test_profile_changes_revoke_tokens(self):
+        patient = Patient.objects.create(user=self.doctor_user, date_of_birth='1990-01-01', gender='F')
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+        self.refresh_access()
+        self.assertEqual(AccessToken(self.access)['patient_id'], patient.id)
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+
+    def test_revocations_are_kept_in_the_shared_cache(self):
+        self.doctor_user.set_password('newpassword')
+        self.doctor_user.save()
+        cache.clear()
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                               'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_shared_cache_is_reported(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['healthsync.W001'])
+
+
+class VerifiedTokenCacheTests(TestCase):
+    """
+    Test suite for the bounded LRU cache of verified tokens.
+    """
+
+    def test_evicts_least_recently_used(self):
+        tokens = VerifiedTokenCache(maxsize=2)
+        future = time.time() + 60
+        tokens.put(b'a', {'exp': future})
+        tokens.put(b'b', {'exp': future})
+        tokens.get(b'a')
+        tokens.put(b'c', {'exp': future})
+        self.assertIsNotNone(tokens.get(b'a'))
+        self.assertIsNone(tokens.get(b'b'))
+        self.assertEqual(len(tokens), 2)
+
+    def test_expired_tokens_are_not_returned(self):
+        tokens = VerifiedTokenCache(maxsize=2)
+        tokens.put(b'a', {'exp': time.time() - 1})
+        self.assertIsNone(tokens.get(b'a'))
+        self.assertEqual(len(tokens), 0)
+
+
+class TokenBlacklistTests(TestCase):
+    """
+    Test suite for the Bloom filter blacklist check and the blacklist pruning command.
+    """
+
+    def setUp(self):
+        """
+        Create a user and start every test from an empty filter.
+        """
+        get_shared_cache().clear()
+        self.user = User.objects.create_user(username='patient', password='password123')
+        blacklist_filter.reset()
+        self.addCleanup(blacklist_filter.reset)
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': str(token)})
+
+    def test_bloom_filter_membership(self):
+        bloom = BloomFilter(capacity=100)
+        for i in range(100):
+            bloom.add(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(100)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(1000))
+        self.assertLess(false_positives, 20)
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        refresh = RefreshToken.for_user(self.user)
+        response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh', response.data)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=refresh['jti']).exists())
+
+        response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 401)
+
+    def test_blacklisting_reaches_other_workers(self):
+        # A second filter stands in for another worker process's.
+        other_worker = BlacklistFilter()
+        refresh = RefreshToken.for_user(self.user)
+        other_worker.check(refresh['jti'])
+        self.assertEqual(self.refresh(refresh).status_code, 200)
+        with self.assertRaises(TokenError):
+            other_worker.check(refresh['jti'])
+
+    def test_missed_generation_bumps_are_caught_up_by_age(self):
+        other_worker = BlacklistFilter()
+        other_worker.sync()
+        token = OutstandingToken.objects.create(
+            user=self.user, jti='missed', token='x', expires_at=timezone.now() + timedelta(days=1)
+        )
+        # bulk_create sends no post_save, so the generation is not bumped.
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token)])
+        other_worker.check('missed')
+        with override_settings(JWT_BLACKLIST_MAX_SYNC_AGE=0), self.assertRaises(TokenError):
+            other_worker.check('missed')
+
+    def test_check_skips_query_for_unknown_tokens(self):
+        blacklist_filter.sync()
+        with CaptureQueriesContext(connection) as queries:
+            blacklist_filter.check('not-blacklisted')
+        self.assertEqual(len(queries), 0)
+
+    def test_prune_deletes_expired_tokens_only(self):
+        past = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            token = OutstandingToken.objects.create(user=self.user, jti=f'expired-{i}', token='x', expires_at=past)
+            BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(
+            user=self.user, jti='live', token='x', expires_at=timezone.now() + timedelta(days=1)
+        )
+
+        call_command('prune_token_blacklist', batch_size=2, stdout=StringIO())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_metrics_require_admin(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get(reverse('token_metrics')).status_code, 403)
+        client.force_authenticate(User.objects.create_superuser(username='admin', password='adminpassword'))
+        response = client.get(reverse('token_metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('skipped_queries', response.data)
+
+
+class BulkUserImportTests(TestCase):
+    """
+    Test suite for the bulk user import endpoint, helpers and management command.
+    """
+
+    def setUp(self):
+        """
+        Authenticate as an admin user.
+        """
+        self.admin = User.objects.create_superuser(username='admin', password='adminpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('register-bulk')
+
+    def row(self, username, **extra):
+        return {'username': username, 'email': f'{username}@example.com', 'password': 'Str0ng-passw0rd', **extra}
+
+    def test_creates_users_with_profiles(self):
+        rows = [
+            self.row('doc', is_doctor=True, specialization='Cardiology'),
+            self.row('pat', is_patient=True, date_of_birth='1990-01-01', gender='F'),
+            self.row('plain'),
+        ]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 3)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Doctor.objects.get().user.username, 'doc')
+        self.assertEqual(Patient.objects.get().user.username, 'pat')
+        self.assertTrue(User.objects.get(username='plain').check_password('Str0ng-passw0rd'))
+
+    def test_reports_invalid_rows_by_index(self):
+        User.objects.create_user(username='taken', password='password123')
+        rows = [
+            self.row('ok'),
+            self.row('taken'),
+            self.row('ok'),
+            self.row('doc', is_doctor=True),
+            self.row('weak', password='123'),
+        ]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([user['username'] for user in response.data['created']], ['ok'])
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertIn('specialization', errors[3])
+        self.assertIn('password', errors[4])
+
+    def test_atomic_import_creates_nothing_on_error(self):
+        rows = [self.row('first'), self.row('second', is_patient=True)]
+        response = self.client.post(f'{self.url}?atomic=true', rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(username__in=['first', 'second']).exists())
+
+    def test_csv_upload(self):
+        content = (
+            'username,email,password,is_doctor,specialization,is_patient,date_of_birth,gender\n'
+            'csvdoc,csvdoc@example.com,Str0ng-passw0rd,true,Neurology,false,,\n'
+            'csvpat,csvpat@example.com,Str0ng-passw0rd,false,,true,1985-05-05,M\n'
+        )
+        upload = SimpleUploadedFile('users.csv', content.encode(), content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Doctor.objects.get().specialization, 'Neurology')
+        self.assertEqual(Patient.objects.get().gender, 'M')
+
+    def test_endpoint_hashes_in_the_request_thread(self):
+        rows = [self.row(f'user{i}') for i in range(PARALLEL_HASHING_THRESHOLD)]
+        with mock.patch('apps.users.bulk.ProcessPoolExecutor') as pool:
+            response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        pool.assert_not_called()
+
+    def test_endpoint_caps_the_import_size(self):
+        rows = [self.row(f'user{i}') for i in range(BULK_IMPORT_MAX_ITEMS + 1)]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('import_users', response.data['error'])
+
+    def test_requires_admin(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='patient', password='password123'))
+        self.assertEqual(client.post(self.url, [self.row('x')], format='json').status_code, 403)
+
+    def test_batches_inserts(self):
+        rows = [self.row(f'user{i}') for i in range(10)]
+        with CaptureQueriesContext(connection) as queries:
+            created, errors = import_users(rows, workers=1, batch_size=5)
+        self.assertEqual((len(created), errors), (10, []))
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "users_user"')]
+        self.assertEqual(len(inserts), 2)
+
+    def test_parallel_hashing_matches_inline(self):
+        passwords = [f'password-{i}' for i in range(PARALLEL_HASHING_THRESHOLD)]
+        hashes = hash_passwords(passwords, workers=2)
+        self.assertTrue(all(check_password(p, h) for p, h in zip(passwords, hashes)))
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump([self.row('cmd1'), self.row('cmd2', is_doctor=True)], f)
+        self.addCleanup(os.remove, f.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_users', f.name, workers=1, stdout=out, stderr=err)
+        self.assertIn('Created 1 of 2 users', out.getvalue())
+        self.assertIn('Row 1', err.getvalue())
+        self.assertTrue(User.objects.filter(username='cmd1').exists())
+
+
+class SearchTests(TestCase):
+    """
+    Test suite for the doctor and patient search index and endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create an admin, two doctors and two patients.
+        """
+        self.admin = User.objects.create_superuser(username='admin', password='adminpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.smith = Doctor.objects.create(
+            user=User.objects.create_user(
+                username='dsmith', first_name='John', last_name='Smith', password='password123', is_doctor=True
+            ),
+            specialization='Cardiology'
+        )
+        Doctor.objects.create(
+            user=User.objects.create_user(
+                username='jsmithers', first_name='Jane', last_name='Smithers', password='password123', is_doctor=True
+            ),
+            specialization='Neurology'
+        )
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(
+                username='pjose', first_name='José', last_name='Álvarez', password='password123', is_patient=True
+            ),
+            date_of_birth='1990-01-01',
+            gender='M'
+        )
+        Patient.objects.create(
+            user=User.objects.create_user(
+                username='psmith', first_name='Sam', last_name='Smith', password='password123', is_patient=True
+            ),
+            date_of_birth='1980-01-01',
+            gender='F'
+        )
+
+    def search(self, **params):
+        return self.client.get(reverse('search'), params)
+
+    def test_normalize(self):
+        self.assertEqual(search.normalize("José O'Brien-Núñez"), ['jose', 'o', 'brien', 'nunez'])
+        self.assertEqual(search.normalize(None), [])
+
+    def test_prefix_search_is_ranked(self):
+        response = self.search(q='smi')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['username'] for result in response.data['results']], ['dsmith', 'jsmithers', 'psmith']
+        )
+        # Exact word matches outrank prefix matches.
+        response = self.search(q='smith')
+        self.assertEqual(
+            [result['username'] for result in response.data['results']], ['dsmith', 'psmith', 'jsmithers']
+        )
+
+    def test_all_words_must_match(self):
+        response = self.search(q='john smi')
+        self.assertEqual([result['id'] for result in response.data['results']], [self.smith.id])
+        self.assertEqual(response.data['results'][0]['specialization'], 'Cardiology')
+
+    def test_accents_and_type_filter(self):
+        response = self.search(q='alva', type='patient')
+        self.assertEqual([result['id'] for result in response.data['results']], [self.patient.id])
+        response = self.search(q='cardio', type='patient')
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(self.search(q='x', type='nurse').status_code, 400)
+
+    def test_index_follows_saves_and_deletes(self):
+        user = self.patient.user
+        user.last_name = 'Garcia'
+        user.save()
+        self.assertEqual(self.search(q='alvarez').data['results'], [])
+        self.assertEqual(len(self.search(q='garcia').data['results']), 1)
+        user.delete()
+        self.assertFalse(SearchToken.objects.filter(kind=SearchToken.PATIENT, object_id=self.patient.id).exists())
+
+    def test_pagination(self):
+        response = self.search(q='smi', page_size=2)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['previous'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+    def test_requires_admin(self):
+        client = APIClient()
+        client.force_authenticate(self.smith.user)
+        self.assertEqual(client.get(reverse('search'), {'q': 'smith'}).status_code, 403)
+
+    def test_rebuild_command(self):
+        SearchToken.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.search(q='smith').data['results']), 3)
+
+    def test_bulk_import_is_indexed(self):
+        import_users([{
+            'username': 'bulkdoc', 'last_name': 'Okafor', 'password': 'Str0ng-passw0rd',
+            'is_doctor': True, 'specialization': 'Oncology',
+        }], workers=1)
+        self.assertEqual(self.search(q='okafor onco').data['results'][0]['username'], 'bulkdoc')
@@ -0,0 +1,160 @@
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from ..shared_cache import get_shared_cache
+from .models import Doctor, Patient
+
+ROLE_CLAIMS = ('is_staff', 'is_superuser', 'doctor_id', 'patient_id')
+
+# The user's revocation marker when the role claims were derived (see `is_revoked`)
+REVOCATION_CLAIM = 'rev'
+
+
+def add_role_claims(token, user):
+    """
+    Embeds the user's role information into a token.
+
+    Refresh tokens pass their claims on to the access tokens they mint, so the
+    claims are added to the refresh token issued at login and re-derived from
+    the database on every refresh (see `RoleTokenRefreshSerializer`).
+
+    Args:
+        token: The token to add claims to.
+        user: The user the token is issued for.
+
+    Returns:
+        token: The same token, with `is_staff`, `is_superuser`, `doctor_id`,
+        `patient_id` and `rev` claims.
+    """
+    token[REVOCATION_CLAIM] = get_shared_cache().get(revocation_key(user.pk))
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['doctor_id'] = Doctor.objects.filter(user=user).values_list('id', flat=True).first()
+    token['patient_id'] = Patient.objects.filter(user=user).values_list('id', flat=True).first()
+    return token
+
+
+def has_role_claims(token):
+    return all(claim in token for claim in ROLE_CLAIMS)
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token serializer for `TokenObtainPairView` that adds role claims to issued tokens.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        return add_role_claims(super().get_token(user), user)
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh serializer that re-reads the user before minting tokens.
+
+    Inactive or deleted users can no longer refresh, and the role claims of the
+    new access token and of the rotated refresh token are re-derived from the
+    database, so privilege and profile changes take effect at the next refresh
+    instead of lasting for the whole refresh chain.
+    """
+    default_error_messages = {
+        'no_active_account': _("No active account found for the given token"),
+    }
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_user_model().objects \
+            .filter(**{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}) \
+            .first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        add_role_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class ClaimsUser(TokenUser):
+    """
+    Stateless user built from a token's role claims.
+
+    `doctor` and `patient` behave like the reverse one-to-one accessors of User:
+    they return unsaved Doctor/Patient instances carrying only the primary key
+    (enough for filtering and comparisons), and raise AttributeError when the
+    user has no such profile, so `hasattr(user, 'doctor')` keeps working without
+    a query.
+    """
+
+    @property
+    def doctor(self):
+        doctor_id = self.token.get('doctor_id')
+        if doctor_id is None:
+            raise AttributeError('doctor')
+        return Doctor(id=doctor_id, user_id=self.id)
+
+    @property
+    def patient(self):
+        patient_id = self.token.get('patient_id')
+        if patient_id is None:
+            raise AttributeError('patient')
+        return Patient(id=patient_id, user_id=self.id)
+
+    @property
+    def is_doctor(self):
+        return self.token.get('doctor_id') is not None
+
+    @property
+    def is_patient(self):
+        return self.token.get('patient_id') is not None
+
+
+def revocation_key(user_id):
+    return f'auth:revoked-before:{user_id}'
+
+
+def revoke_user_tokens(user_id):
+    """
+    Rejects every access token issued to the user so far.
+
+    The marker (the revocation time) lives in the shared cache (see
+    `shared_cache.py`), so every worker sees it, and only needs to outlive the
+    access token lifetime: refresh tokens are checked against the User row when
+    they are used.
+    """
+    lifetime = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+    get_shared_cache().set(revocation_key(user_id), time.time(), timeout=int(lifetime) + 1)
+
+
+def _revoked(token, revoked_before):
+    if revoked_before is None:
+        return False
+    if REVOCATION_CLAIM in token:
+        # Claims derived after the revocation carry its marker, even within the same second.
+        return token[REVOCATION_CLAIM] != revoked_before
+    return token.get('iat', 0) <= revoked_before
+
+
+def is_revoked(token, user_id):
+    """
+    Returns True if the token was issued before the user's tokens were last revoked.
+    """
+    return _revoked(token, get_shared_cache().get(revocation_key(user_id)))
+
+
+async def ais_revoked(token, user_id):
+    """
+    Async counterpart of `is_revoked`.
+    """
+    return _revoked(token, await get_shared_cache().aget(revocation_key(user_id)))
@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.urls import path
-from .views import RegisterView, ProfileView
+from .views import BulkRegisterView, RegisterView, ProfileView, SearchView
+
+if settings.ASYNC_API_VIEWS:
+    # Native async profile reads for ASGI deployments
+    from .async_views import AsyncProfileView as ProfileView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
+    path('register/bulk/', BulkRegisterView.as_view(), name='register-bulk'),
+    path('search/', SearchView.as_view(), name='search'),
     path('', ProfileView.as_view(), name='profile'),
 ]
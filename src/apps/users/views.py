@@ -1,7 +1,22 @@
+import logging
+import os
 from rest_framework import generics, permissions
-from .models import User
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from .models import SearchToken, User
+from . import search
 from .serializers import RegisterSerializer, UserSerializer
+from .tokens import ClaimsUser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.pagination import _positive_int
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from .blacklist import blacklist_filter
+from .bulk import BULK_IMPORT_MAX_ITEMS, import_users, read_rows
+from ..conditional import make_etag, not_modified_response, set_validators
+from ..fieldsets import parse_fields
 
 
 # User Registration View
@@ -16,5 +31,155 @@ class ProfileView(generics.RetrieveAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_object(self):
-        return self.request.user  # Return the authenticated user's profile
+    def get_object(self, fields=None):
+        user = self.request.user  # Return the authenticated user's profile
+        if isinstance(user, ClaimsUser):
+            # Claims-authenticated requests carry no User row; load what is serialized
+            users = User.objects.only('updated_at', *fields) if fields else User.objects
+            return users.get(pk=user.pk)
+        return user
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Returns the profile, limited to the `?fields=` given, or 304 if unchanged.
+        """
+        try:
+            fields = parse_fields(request.query_params, UserSerializer.Meta.fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        user = self.get_object(fields)
+        etag = make_etag('profile', user.pk, user.updated_at, fields)
+        not_modified = not_modified_response(request, etag=etag, last_modified=user.updated_at)
+        if not_modified is not None:
+            return not_modified
+        response = Response(self.get_serializer(user, fields=fields).data)
+        return set_validators(response, etag=etag, last_modified=user.updated_at)
+
+
+# Token blacklist metrics (admin only)
+class TokenBlacklistMetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(blacklist_filter.metrics())
+
+
+# Bulk user import (admin only)
+class BulkRegisterView(APIView):
+    """
+    Creates many users, with optional Doctor/Patient profiles, in one request.
+
+    Accepts a JSON list of users, or a multipart upload whose `file` is a CSV or
+    JSON document (the format is taken from `format` or the file extension).
+    Invalid rows are reported per index; with `?atomic=true` nothing is created
+    if any row fails.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is not None:
+            fmt = request.data.get('format') or os.path.splitext(upload.name)[1].lstrip('.').lower()
+            try:
+                rows = read_rows(upload.read(), fmt)
+            except (ValueError, UnicodeDecodeError) as e:
+                return Response({"error": f"Could not read the import file: {e}"}, status=400)
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            return Response({"error": "Send a JSON list of users or upload a CSV/JSON file as 'file'."}, status=400)
+
+        if len(rows) > BULK_IMPORT_MAX_ITEMS:
+            return Response(
+                {"error": f"A bulk import may contain at most {BULK_IMPORT_MAX_ITEMS} users. "
+                          "Use the import_users management command for larger files."},
+                status=400
+            )
+
+        all_or_nothing = request.query_params.get('atomic', '').lower() in ('1', 'true')
+        try:
+            created, errors = import_users(rows, all_or_nothing=all_or_nothing)
+        except Exception as e:
+            logging.error(f"Error importing users: {e}")
+            return Response({"error": "An error occurred while importing the users."}, status=400)
+
+        return Response(
+            {
+                'created': UserSerializer(created, many=True).data,
+                'errors': errors,
+            },
+            status=201 if created else 400
+        )
+
+
+# Doctor and patient search (admin only)
+class SearchView(APIView):
+    """
+    Ranked prefix search over doctors and patients for the front desk.
+
+    Each word of `q` must be the start of a word of the person's name, username,
+    specialization (doctors) or phone number (patients). Lookups go through the
+    SearchToken index (see `search.py`) rather than `icontains` scans. Results
+    are paginated with `page`/`page_size`; no total count is computed, so
+    `next` is set whenever another page exists.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    page_size = 20
+    max_page_size = 100
+
+    q_param = openapi.Parameter('q', openapi.IN_QUERY, description="Search text", type=openapi.TYPE_STRING, required=True)
+    type_param = openapi.Parameter(
+        'type', openapi.IN_QUERY, description="Restrict to doctor or patient", type=openapi.TYPE_STRING
+    )
+    page_param = openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER)
+    page_size_param = openapi.Parameter(
+        'page_size', openapi.IN_QUERY, description="Results per page (max 100)", type=openapi.TYPE_INTEGER
+    )
+
+    @swagger_auto_schema(manual_parameters=[q_param, type_param, page_param, page_size_param])
+    def get(self, request):
+        kind = request.query_params.get('type')
+        if kind and kind not in dict(SearchToken.KIND_CHOICES):
+            return Response({"error": "Invalid type. Use 'doctor' or 'patient'."}, status=400)
+        try:
+            page = _positive_int(request.query_params.get('page', 1), strict=True)
+            page_size = _positive_int(
+                request.query_params.get('page_size', self.page_size), strict=True, cutoff=self.max_page_size
+            )
+        except ValueError:
+            return Response({"error": "'page' and 'page_size' must be positive integers."}, status=400)
+
+        matches = search.search(request.query_params.get('q', ''), kinds=[kind] if kind else None)
+        offset = (page - 1) * page_size
+        # Fetch one extra row to know whether a next page exists.
+        rows = list(matches[offset:offset + page_size + 1]) if matches is not None else []
+        has_next = len(rows) > page_size
+
+        url = request.build_absolute_uri()
+        previous = None
+        if page > 1:
+            previous = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+        return Response({
+            'next': replace_query_param(url, 'page', page + 1) if has_next else None,
+            'previous': previous,
+            'results': [self.result(row, profile) for row, profile in search.load_profiles(rows[:page_size])],
+        })
+
+    @staticmethod
+    def result(row, profile):
+        user = profile.user
+        data = {
+            'type': row['kind'],
+            'id': profile.id,
+            'user_id': user.id,
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'score': row['score'],
+        }
+        if row['kind'] == SearchToken.DOCTOR:
+            data['specialization'] = profile.specialization
+        else:
+            data['date_of_birth'] = profile.date_of_birth
+        return data